@@ -2,7 +2,7 @@
 API v1 routes
 """
 from fastapi import APIRouter
-from app.api.v1 import auth, users, videos, showcase, upload, credits, ai, payments, webhooks
+from app.api.v1 import auth, users, videos, showcase, upload, credits, ai, payments, webhooks, bulk_jobs
 
 api_router = APIRouter()
 
@@ -16,3 +16,4 @@ api_router.include_router(credits.router, prefix="/credits", tags=["Credits"])
 api_router.include_router(ai.router, prefix="/ai", tags=["AI Services"])
 api_router.include_router(payments.router, prefix="/payments", tags=["Payments"])
 api_router.include_router(webhooks.router, prefix="/webhooks", tags=["Webhooks"])
+api_router.include_router(bulk_jobs.router, prefix="/bulk-jobs", tags=["Bulk Jobs"])
@@ -14,9 +14,13 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_current_user, get_db
 from app.models.user import User
 from app.models.uploaded_image import UploadedImage
+from app.models.generated_script import GeneratedScript
 from app.services.openai_script_service import openai_script_service
 from app.services.gcs_service import gcs_service
+from app.services import credit_ledger, generation_cache
+from app.services.image_dedup import image_dedup_index, image_phash, find_reusable_script, record_lookup
 from app.core.config import settings
+from app.core.exceptions import CircuitOpenException, InsufficientCreditsException
 
 logger = logging.getLogger(__name__)
 
@@ -188,75 +192,127 @@ async def generate_script(
         validate_image_for_script(file, content)
         logger.info("  ✅ Image validation passed")
 
-        # Save uploaded image to GCS and database
-        logger.info("💾 Uploading image to GCS and saving to database...")
-        try:
-            # Get image dimensions
-            image = PILImage.open(BytesIO(content))
-            width, height = image.size
-
-            # Reset file pointer for GCS upload
-            await file.seek(0)
-
-            # Upload to Google Cloud Storage
-            blob_name, file_url, _ = gcs_service.upload_file(
-                file=file,
-                user_id=current_user.id,
-                file_type="image",
-                content_type=file.content_type
-            )
+        # Near-identical earlier uploads (re-cropped, re-compressed, re-exported)
+        phash = image_phash(content)
+        near_duplicates = []
+        if phash and settings.IMAGE_DEDUP_ENABLED:
+            near_duplicates = image_dedup_index.find_near_duplicates(db, current_user.id, phash)
+            record_lookup("upload", "hit" if near_duplicates else "miss")
+
+        db_image = None
+        if near_duplicates:
+            db_image = near_duplicates[0]
+            logger.info(f"♻️  Near-duplicate of image {db_image.id}, reusing stored file: {db_image.file_url}")
+        else:
+            # Save uploaded image to GCS and database
+            logger.info("💾 Uploading image to GCS and saving to database...")
+            try:
+                # Get image dimensions
+                image = PILImage.open(BytesIO(content))
+                width, height = image.size
+
+                # Reset file pointer for GCS upload
+                await file.seek(0)
+
+                # Upload to Google Cloud Storage
+                blob_name, file_url, _ = gcs_service.upload_file(
+                    file=file,
+                    user_id=current_user.id,
+                    file_type="image",
+                    content_type=file.content_type
+                )
 
-            logger.info(f"  ✅ File uploaded to GCS: {blob_name}")
-
-            # Save to database
-            db_image = UploadedImage(
-                user_id=current_user.id,
-                filename=file.filename or "untitled.jpg",
-                file_url=file_url,  # GCS public URL
-                file_size=len(content),
-                file_type=file.content_type,
-                width=width,
-                height=height,
+                logger.info(f"  ✅ File uploaded to GCS: {blob_name}")
+
+                # Save to database
+                db_image = UploadedImage(
+                    user_id=current_user.id,
+                    filename=file.filename or "untitled.jpg",
+                    file_url=file_url,  # GCS public URL
+                    file_size=len(content),
+                    file_type=file.content_type,
+                    width=width,
+                    height=height,
+                    content_hash=generation_cache.content_hash(content),
+                    phash=phash,
+                )
+                db.add(db_image)
+                db.commit()
+                db.refresh(db_image)
+
+                logger.info(f"  ✅ Image saved to database (ID: {db_image.id})")
+                logger.info(f"  🔗 GCS URL: {file_url}")
+
+            except Exception as save_error:
+                logger.warning(f"  ⚠️  Failed to save image to GCS/database: {str(save_error)}")
+                db_image = None
+                # Note: Do NOT rollback here! We need the same session for credit deduction
+                # Continue with script generation even if image save fails
+
+        # A script already generated for a near-identical image with the same parameters is reused
+        reused_script = None
+        if near_duplicates and settings.IMAGE_DEDUP_REUSE_SCRIPTS:
+            reused_script = find_reusable_script(db, near_duplicates, duration, language, model, user_description)
+            record_lookup("script", "hit" if reused_script else "miss")
+
+        if reused_script:
+            logger.info(f"♻️  Reusing script {reused_script.id} generated for image {reused_script.uploaded_image_id}")
+            result = {
+                "script": reused_script.script,
+                "structured_script": reused_script.structured_script,
+                "natural_script": reused_script.natural_script,
+                "style": reused_script.style,
+                "camera": reused_script.camera,
+                "lighting": reused_script.lighting,
+                "tokens_used": 0,
+            }
+        else:
+            # Generate script using GPT-4o
+            logger.info("🤖 Calling OpenAI GPT-4o service...")
+            logger.info(f"  Model: gpt-4o")
+            logger.info(f"  Image size: {file_size_mb:.2f}MB")
+            logger.info(f"  Target duration: {duration}s")
+            logger.info(f"  User description: {user_description[:50] if user_description else 'None'}...")
+
+            result = openai_script_service.analyze_image_for_script(
+                image_data=content,
+                duration=duration,
+                mime_type=file.content_type or "image/jpeg",
+                language=language,
+                user_description=user_description  # 🆕 Pass user input to service
             )
-            db.add(db_image)
-            db.commit()
-            db.refresh(db_image)
-
-            logger.info(f"  ✅ Image saved to database (ID: {db_image.id})")
-            logger.info(f"  🔗 GCS URL: {file_url}")
-
-        except Exception as save_error:
-            logger.warning(f"  ⚠️  Failed to save image to GCS/database: {str(save_error)}")
-            # Note: Do NOT rollback here! We need the same session for credit deduction
-            # Continue with script generation even if image save fails
-
-        # Generate script using GPT-4o
-        logger.info("🤖 Calling OpenAI GPT-4o service...")
-        logger.info(f"  Model: gpt-4o")
-        logger.info(f"  Image size: {file_size_mb:.2f}MB")
-        logger.info(f"  Target duration: {duration}s")
-        logger.info(f"  User description: {user_description[:50] if user_description else 'None'}...")
-
-        result = openai_script_service.analyze_image_for_script(
-            image_data=content,
-            duration=duration,
-            mime_type=file.content_type or "image/jpeg",
-            language=language,
-            user_description=user_description  # 🆕 Pass user input to service
-        )
 
         # === 🆕 脚本生成成功后扣除积分 ===
         logger.info("💰 [Script Generation] Deducting credits...")
         previous_credits = current_user.credits
 
         try:
-            current_user.credits -= credits_cost
+            credit_ledger.charge(db, current_user, credits_cost, reason="script")
 
             # 🆕 更新新用户标识 (如果是新用户,第一次生成脚本后设为False)
             if current_user.is_new_user:
                 logger.info(f"  🎉 First-time user {current_user.id} completed script generation")
                 current_user.is_new_user = False
 
+            # Keep the script so later near-identical images can reuse it
+            if not reused_script:
+                db.add(GeneratedScript(
+                    user_id=current_user.id,
+                    uploaded_image_id=db_image.id if db_image else None,
+                    script=result["script"],
+                    structured_script=result.get("structured_script"),
+                    natural_script=result.get("natural_script"),
+                    language=language,
+                    user_description=(user_description or "").strip() or None,
+                    tokens_used=result.get("tokens_used", 0),
+                    target_duration=duration,
+                    target_model=model,
+                    style=(result.get("style") or "")[:255] or None,
+                    camera=(result.get("camera") or "")[:255] or None,
+                    lighting=(result.get("lighting") or "")[:255] or None,
+                    credits_cost=credits_cost,
+                ))
+
             db.commit()
             db.refresh(current_user)
 
@@ -265,6 +321,13 @@ async def generate_script(
             logger.info(f"  💳 New balance: {current_user.credits}")
             logger.info(f"  👤 Is new user: {current_user.is_new_user}")
 
+        except InsufficientCreditsException as credit_error:
+            # Balance spent by a concurrent request since the check above
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_402_PAYMENT_REQUIRED,
+                detail=str(credit_error)
+            )
         except Exception as credit_error:
             logger.error(f"❌ Failed to deduct credits: {str(credit_error)}")
             db.rollback()
@@ -315,6 +378,19 @@ async def generate_script(
             pass
         raise
 
+    except CircuitOpenException as e:
+        # OpenAI is failing: answer fast instead of tying up the request
+        logger.warning(f"🔌 [AI Script Generation] {e.message}")
+        try:
+            db.rollback()
+        except Exception:
+            pass
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The AI service is temporarily busy. Please try again in a few moments.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
     except Exception as e:
         # Log unexpected errors with full context
         logger.error("=" * 60)
@@ -0,0 +1,210 @@
+"""
+Catalog bulk job API routes (manifest of products -> scripts -> videos)
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Form, File, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+from app.database import get_db
+from app.api.deps import get_current_user
+from app.models.bulk_job import BulkJob, BulkJobStatus
+from app.models.user import User
+from app.schemas.bulk_job import BulkJobCreateRequest, BulkJobListResponse, BulkJobResponse
+from app.services import bulk_jobs
+from app.core.exceptions import (
+    InsufficientCreditsException,
+    NotFoundException,
+    SubscriptionExpiredException,
+    SubscriptionRequiredException,
+    ValidationException,
+)
+
+router = APIRouter()
+
+REPORT_POLL_SECONDS = 5
+REPORT_TIMEOUT_SECONDS = 3600  # Followed reports end after an hour; reconnect to continue
+
+
+def _start_bulk_job(db: Session, user: User, request: BulkJobCreateRequest) -> BulkJobResponse:
+    """Create the job, kick off its scheduler and map service errors to HTTP"""
+    try:
+        job, estimated = bulk_jobs.create_bulk_job(db, user, request)
+    except ValidationException as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message)
+    except (SubscriptionRequiredException, SubscriptionExpiredException) as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=e.message)
+    except InsufficientCreditsException as e:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=e.message)
+
+    from app.tasks.bulk_jobs import advance_bulk_job_task
+    advance_bulk_job_task.delay(job.id)
+
+    return BulkJobResponse(**bulk_jobs.job_summary(db, job, estimated))
+
+
+@router.post("", response_model=BulkJobResponse, status_code=status.HTTP_201_CREATED)
+def create_bulk_job(
+    request: BulkJobCreateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Start a bulk job from a JSON manifest
+
+    Each item names a product image (image_url or uploaded_image_id) and
+    optionally a description, duration, model and language (defaults come
+    from the job). Items are processed max_concurrency at a time:
+    image ingest -> GPT-4o script -> Sora video.
+
+    Returns:
+        Job progress, with the credits the whole manifest is expected to cost
+    """
+    logger.info(f"📦 [Bulk] JSON manifest with {len(request.items)} items from user {current_user.id}")
+    return _start_bulk_job(db, current_user, request)
+
+
+@router.post("/manifest", response_model=BulkJobResponse, status_code=status.HTTP_201_CREATED)
+async def create_bulk_job_from_manifest(
+    file: UploadFile = File(..., description="Manifest (.csv with a header row, .json or .ndjson)"),
+    duration: int = Form(8, description="Default video duration in seconds"),
+    model: str = Form("sora-2", description="Default AI model"),
+    language: str = Form("en", description="Default script language"),
+    max_concurrency: Optional[int] = Form(None, description="Items processed at once"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Start a bulk job from an uploaded manifest file
+
+    Columns / keys: sku, image_url, uploaded_image_id, description,
+    duration, model, language (only image_url or uploaded_image_id is required).
+    """
+    content = await file.read()
+    try:
+        items = bulk_jobs.parse_manifest(content, file.filename)
+        request = BulkJobCreateRequest(
+            name=file.filename,
+            items=items,
+            duration=duration,
+            model=model,
+            language=language,
+            max_concurrency=max_concurrency,
+        )
+    except ValidationException as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    logger.info(f"📦 [Bulk] Manifest {file.filename} with {len(items)} items from user {current_user.id}")
+    return _start_bulk_job(db, current_user, request)
+
+
+@router.get("", response_model=BulkJobListResponse)
+def get_bulk_jobs(
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get current user's bulk jobs, newest first
+    """
+    jobs, total = bulk_jobs.get_user_bulk_jobs(db, current_user.id, skip=(page - 1) * page_size, limit=page_size)
+    return BulkJobListResponse(
+        jobs=[BulkJobResponse(**bulk_jobs.job_summary(db, job)) for job in jobs],
+        total=total,
+    )
+
+
+@router.get("/{job_id}", response_model=BulkJobResponse)
+def get_bulk_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Progress of a bulk job: items per stage
+    """
+    try:
+        job = bulk_jobs.get_bulk_job(db, job_id, current_user.id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=e.message)
+    return BulkJobResponse(**bulk_jobs.job_summary(db, job))
+
+
+@router.get("/{job_id}/report")
+async def get_bulk_job_report(
+    job_id: int,
+    follow: bool = Query(False, description="Keep streaming items as they finish until the job ends"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    NDJSON report of a bulk job, one line per item
+
+    Every line is a JSON object: {"type": "item", "position", "sku", "stage",
+    "image_url", "script", "video_id", "video_url", "error", ...}, and the
+    last line is {"type": "summary", ...job progress}.
+
+    Without follow, every item is reported in its current state. With
+    follow=true, items are reported once they are done or failed, as they
+    finish, and the stream ends when the job does.
+    """
+    try:
+        job = bulk_jobs.get_bulk_job(db, job_id, current_user.id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=e.message)
+
+    def line(data: dict) -> str:
+        return json.dumps(data, default=str) + "\n"
+
+    def summary() -> str:
+        db.refresh(job)
+        return line({"type": "summary", **bulk_jobs.job_summary(db, job)})
+
+    async def report_generator():
+        if not follow:
+            for item in bulk_jobs.report_items(db, job):
+                yield line({"type": "item", **item})
+            yield summary()
+            return
+
+        reported = set()
+        start_time = time.time()
+        while True:
+            db.expire_all()
+            running = db.query(BulkJob.status).filter(BulkJob.id == job.id).scalar() == BulkJobStatus.RUNNING
+
+            new_positions = set(bulk_jobs.finished_positions(db, job)) - reported
+            if new_positions:
+                for item in bulk_jobs.report_items(db, job, new_positions):
+                    yield line({"type": "item", **item})
+                reported |= new_positions
+
+            if not running:
+                break
+            if time.time() - start_time > REPORT_TIMEOUT_SECONDS:
+                print(f"⏰ [Bulk] Report stream of job {job.id} timed out after {REPORT_TIMEOUT_SECONDS}s")
+                break
+            await asyncio.sleep(REPORT_POLL_SECONDS)
+
+        yield summary()
+
+    filename = f"bulk-job-{job.id}-{datetime.utcnow():%Y%m%d%H%M%S}.ndjson"
+    return StreamingResponse(
+        report_generator(),
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Deliver lines as they are produced through nginx
+            "Content-Disposition": f'inline; filename="{filename}"',
+        },
+    )
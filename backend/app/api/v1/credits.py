@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.api.deps import get_current_user
 from app.models.user import User
+from app.services import credit_ledger
 from app.schemas.credits import (
     CreditsPurchaseRequest,
     CreditsPurchaseResponse,
@@ -71,7 +72,7 @@ def purchase_credits(
     print(f"   Old Balance: {current_user.credits}")
 
     # Add credits to user account
-    current_user.credits += credits_to_add
+    credit_ledger.grant(db, current_user, credits_to_add, reason="purchase")
     db.commit()
     db.refresh(current_user)
 
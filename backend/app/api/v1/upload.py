@@ -16,6 +16,8 @@ from app.models.user import User
 from app.models.uploaded_image import UploadedImage
 from app.core.config import settings
 from app.services.gcs_service import gcs_service
+from app.services import generation_cache
+from app.services.image_dedup import image_dedup_index, image_phash, record_lookup
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -120,6 +122,18 @@ async def upload_image(
             UploadedImage.file_size == file_size
         ).order_by(UploadedImage.created_at.desc()).first()
 
+        # Re-compressed copies of an earlier upload with the same size reuse its stored file
+        phash = image_phash(file_content)
+        if not existing_image and phash and settings.IMAGE_DEDUP_ENABLED:
+            near_duplicates = [
+                image for image in image_dedup_index.find_near_duplicates(db, current_user.id, phash)
+                if (image.width, image.height) == (width, height)
+            ]
+            record_lookup("upload", "hit" if near_duplicates else "miss")
+            if near_duplicates:
+                existing_image = near_duplicates[0]
+                logger.info(f"  ♻️  Near-duplicate of image {existing_image.id}, reusing stored file")
+
         if existing_image:
             # Image already exists, return existing record
             logger.info(f"  ℹ️  Image already exists in database (ID: {existing_image.id}), skipping save")
@@ -142,6 +156,8 @@ async def upload_image(
                 file_type=file.content_type,
                 width=width,
                 height=height,
+                content_hash=generation_cache.content_hash(file_content),
+                phash=phash,
             )
             db.add(db_image)
             db.commit()
@@ -157,8 +173,8 @@ async def upload_image(
                 "file_path": file_path,  # Keep for backward compatibility
                 "filename": file.filename,
                 "image_id": db_image.id,
-                "width": width,
-                "height": height,
+                "width": db_image.width,
+                "height": db_image.height,
                 "storage_type": "gcs",  # Always GCS
             },
         )
@@ -1,6 +1,7 @@
 """
 Video generation and management API routes
 """
+from datetime import datetime
 from typing import Optional
 import asyncio
 import json
@@ -22,16 +23,21 @@ from app.schemas.video import (
     VideoGenerateFlexibleRequest,
     VideoResponse,
     VideoListResponse,
+    VideoBatchResponse,
+    VideoBatchStatusResponse,
+    VideoVariantSpec,
     VideoStatusResponse,
     ModelListResponse,
     ModelInfo,
 )
 from app.models.user import User
 from app.models.video import VideoStatus, Video
-from app.services import video_service
+from app.services import admission, credit_ledger, video_batches, video_service
 from app.core.exceptions import (
+    CircuitOpenException,
     InsufficientCreditsException,
     NotFoundException,
+    QueueFullException,
     SubscriptionRequiredException,
     SubscriptionExpiredException,
 )
@@ -61,10 +67,10 @@ def generate_video(
         video = video_service.create_video_generation_task(db, current_user, video_request)
 
         # 🔥 Trigger async Celery task for video generation
-        from app.tasks.video_generation import generate_video_task
-        task = generate_video_task.delay(video.id)
+        from app.tasks.video_generation import schedule_video_generation
+        task = schedule_video_generation(video) if video.status == VideoStatus.PENDING else None
 
-        print(f"✅ Video generation task created: video_id={video.id}, task_id={task.id}")
+        print(f"✅ Video generation task created: video_id={video.id}, task_id={task.id if task else ('held' if video.status == VideoStatus.PENDING else 'cached')}")
 
         return video
     except SubscriptionRequiredException as e:
@@ -82,6 +88,12 @@ def generate_video(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail=str(e),
         )
+    except QueueFullException as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
 
 @router.post("/generate-flexible", response_model=VideoResponse, status_code=status.HTTP_201_CREATED)
@@ -218,13 +230,13 @@ async def generate_video_flexible(
         )
 
         # Trigger Celery async task
-        from app.tasks.video_generation import generate_video_task
-        task = generate_video_task.delay(video.id)
+        from app.tasks.video_generation import schedule_video_generation
+        task = schedule_video_generation(video) if video.status == VideoStatus.PENDING else None
 
         logger.info("=" * 80)
         logger.info(f"✅ Video generation task created successfully")
         logger.info(f"  Video ID: {video.id}")
-        logger.info(f"  Task ID: {task.id}")
+        logger.info(f"  Task ID: {task.id if task else ('held' if video.status == VideoStatus.PENDING else 'cached')}")
         logger.info(f"  Mode: {'Mode 1 (Enhanced)' if mode_1 else 'Mode 2 (Auto-generate)'}")
         logger.info(f"  Image: {final_image_url}")
         logger.info(f"  Prompt: {final_prompt[:100]}...")
@@ -247,6 +259,18 @@ async def generate_video_flexible(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail=str(e),
         )
+    except QueueFullException as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except CircuitOpenException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The AI service is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         logger.error(f"❌ Error in generate_video_flexible: {str(e)}")
         logger.error("Stack trace:", exc_info=True)
@@ -322,13 +346,13 @@ async def generate_video_simple(
         )
 
         # Step 3: Trigger Celery async task
-        from app.tasks.video_generation import generate_video_task
-        task = generate_video_task.delay(video.id)
+        from app.tasks.video_generation import schedule_video_generation
+        task = schedule_video_generation(video) if video.status == VideoStatus.PENDING else None
 
         logger.info("=" * 80)
         logger.info(f"✅ [SIMPLE MODE] Video generation task created successfully")
         logger.info(f"  Video ID: {video.id}")
-        logger.info(f"  Task ID: {task.id}")
+        logger.info(f"  Task ID: {task.id if task else ('held' if video.status == VideoStatus.PENDING else 'cached')}")
         logger.info(f"  Image: {image_url}")
         logger.info(f"  Script: {prompt[:100]}...")
         logger.info(f"  ⚡ Skipped GPT-4o (script pre-generated)")
@@ -351,6 +375,12 @@ async def generate_video_simple(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail=str(e),
         )
+    except QueueFullException as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         logger.error(f"❌ Error in generate_video_simple: {str(e)}")
         logger.error("Stack trace:", exc_info=True)
@@ -360,6 +390,239 @@ async def generate_video_simple(
         )
 
 
+@router.post("/generate-batch", response_model=VideoBatchResponse, status_code=status.HTTP_201_CREATED)
+async def generate_video_batch(
+    image_file: UploadFile = File(..., description="Product image file"),
+    prompt: str = Form(..., description="Video script shared by all variants"),
+    variants: str = Form(
+        ...,
+        description='JSON list of variants, e.g. [{"duration": 4}, {"duration": 8, "orientation": "portrait"}]',
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Batch variant generation: several durations/orientations from one upload
+
+    The image is validated once and resized once per orientation, the total
+    credits of all variants are checked up front, and one video (Sora job)
+    is created per variant. Progress of the whole batch is available from
+    GET /videos/batches/{batch_id} and /videos/batches/{batch_id}/stream.
+
+    Parameters:
+        - image_file: Uploaded product image
+        - prompt: Script used for every variant
+        - variants: JSON list of {"duration": 4|8|12,
+          "orientation": "landscape"|"portrait" (optional), "model": "sora-2"}
+
+    Returns:
+        Batch ID, total credits and the created videos
+    """
+    try:
+        specs = [VideoVariantSpec(**item) for item in json.loads(variants)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid variants: {e}",
+        )
+    if not specs or len(specs) > settings.VIDEO_BATCH_MAX_VARIANTS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A batch needs 1 to {settings.VIDEO_BATCH_MAX_VARIANTS} variants",
+        )
+    if len({(s.duration, s.orientation, s.model) for s in specs}) < len(specs):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Duplicate variants in batch",
+        )
+
+    try:
+        logger.info(f"📦 [BATCH MODE] {len(specs)} variants for user {current_user.id}: "
+                    f"{[(s.duration, s.orientation or 'auto', s.model) for s in specs]}")
+
+        # Ingest once: one read + validation, one resize/upload per orientation
+        content = await image_file.read()
+        metadata = video_service.validate_uploaded_image(content)
+        image_urls = {
+            orientation: video_service.store_image_content(
+                content, image_file.filename, metadata, current_user, db, orientation
+            )
+            for orientation in {s.orientation for s in specs}
+        }
+
+        batch_id, videos, total_credits = video_batches.create_video_batch(
+            db, current_user, prompt, image_urls, specs
+        )
+
+        from app.tasks.video_generation import schedule_video_generation
+        for video in videos:
+            if video.status == VideoStatus.PENDING:
+                schedule_video_generation(video)
+
+        logger.info(f"✅ [BATCH MODE] Batch {batch_id} created: videos {[v.id for v in videos]}")
+        return VideoBatchResponse(batch_id=batch_id, total_credits=total_credits, videos=videos)
+
+    except HTTPException:
+        raise
+    except (SubscriptionRequiredException, SubscriptionExpiredException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e),
+        )
+    except InsufficientCreditsException as e:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=str(e),
+        )
+    except QueueFullException as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        logger.error(f"❌ Error in generate_video_batch: {str(e)}")
+        logger.error("Stack trace:", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch video generation failed: {str(e)}"
+        )
+
+
+@router.get("/batches/{batch_id}", response_model=VideoBatchStatusResponse)
+def get_video_batch(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Aggregate progress of a batch created by /generate-batch
+    """
+    try:
+        videos = video_batches.get_batch_videos(db, batch_id, current_user.id)
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    return VideoBatchStatusResponse(**video_batches.batch_summary(batch_id, videos))
+
+
+@router.get("/batches/{batch_id}/stream")
+async def stream_video_batch_progress(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_header_or_query),
+):
+    """
+    SSE endpoint streaming the progress of every video in a batch
+
+    Subscribes to the Redis channels of all unfinished videos of the batch
+    (video:{video_id}) and forwards their messages on one stream. Each event
+    is the video's own message plus:
+    {
+        "video_id": 42,
+        "batch_progress": 0-100,   # Mean progress over the batch
+        "batch_completed": n,
+        "batch_failed": n,
+        "batch_total": n
+    }
+    The stream ends with {"step": 9 or -1, "status": "batch_finished", ...}
+    once every video completed or failed.
+    """
+    async def event_generator():
+        redis_client = None
+        pubsub = None
+
+        try:
+            try:
+                videos = video_batches.get_batch_videos(db, batch_id, current_user.id)
+            except NotFoundException:
+                yield f"data: {json.dumps({'error': 'Batch not found', 'step': -1})}\n\n"
+                return
+
+            progress = video_batches.BatchProgress(videos)
+            channels = {f"video:{video_id}": video_id for video_id in progress.pending_video_ids()}
+
+            if channels:
+                try:
+                    redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+                    pubsub = redis_client.pubsub()
+                    pubsub.subscribe(*channels)
+                    print(f"📡 [SSE] Subscribed to {len(channels)} channels of batch {batch_id}")
+                except redis.ConnectionError as e:
+                    print(f"❌ [SSE] Redis connection failed: {e}")
+                    yield f"data: {json.dumps({'error': 'Redis connection failed', 'step': -1, 'message': '❌ Failed to connect to message queue'})}\n\n"
+                    return
+
+            yield f"data: {json.dumps({'step': 0, 'message': '🔌 Connected to batch stream', 'batch_id': batch_id, 'timestamp': time.time(), **progress.snapshot()})}\n\n"
+
+            timeout_seconds = 1800  # 30 minutes max
+            start_time = time.time()
+            last_heartbeat = time.time()
+            heartbeat_interval = 15
+
+            while not progress.finished:
+                if time.time() - start_time > timeout_seconds:
+                    print(f"⏰ [SSE] Batch stream timeout after {timeout_seconds}s")
+                    yield f"data: {json.dumps({'step': -1, 'error': 'Stream timeout', 'message': '⏰ Connection timeout after 30 minutes'})}\n\n"
+                    return
+
+                if time.time() - last_heartbeat > heartbeat_interval:
+                    yield f": heartbeat\n\n"
+                    last_heartbeat = time.time()
+
+                message = pubsub.get_message(timeout=1.0)
+                if message and message['type'] == 'message':
+                    video_id = channels.get(message['channel'])
+                    try:
+                        event = json.loads(message['data'])
+                    except json.JSONDecodeError:
+                        print(f"⚠️  [SSE] Failed to parse message as JSON: {message['data']}")
+                        continue
+
+                    progress.update(video_id, event)
+                    yield f"data: {json.dumps({**event, 'video_id': video_id, **progress.snapshot()})}\n\n"
+
+                await asyncio.sleep(0.1)
+
+            snapshot = progress.snapshot()
+            final_step = -1 if snapshot["batch_failed"] == snapshot["batch_total"] else 9
+            yield f"data: {json.dumps({'step': final_step, 'status': 'batch_finished', 'batch_id': batch_id, 'message': '🏁 All variants finished', **snapshot})}\n\n"
+            print(f"🏁 [SSE] Batch stream ended for {batch_id}")
+
+        except Exception as e:
+            import traceback
+            print(f"❌ [SSE] Unexpected error: {e}")
+            print(traceback.format_exc())
+            yield f"data: {json.dumps({'step': -1, 'error': str(e), 'message': f'❌ Stream error: {str(e)}'})}\n\n"
+
+        finally:
+            if pubsub:
+                try:
+                    pubsub.unsubscribe()
+                    pubsub.close()
+                except Exception as e:
+                    print(f"⚠️  [SSE] Error during cleanup: {e}")
+
+            if redis_client:
+                try:
+                    redis_client.close()
+                except Exception as e:
+                    print(f"⚠️  [SSE] Error closing Redis connection: {e}")
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # Disable buffering for nginx
+            "Access-Control-Allow-Origin": "*",  # CORS for SSE
+        }
+    )
+
+
 @router.get("/count")
 def get_videos_count(
     db: Session = Depends(get_db),
@@ -415,7 +678,7 @@ def get_video(
     """
     try:
         video = video_service.get_video_by_id(db, video_id, current_user.id)
-        return video
+        return admission.annotate_queue_position(db, video)
     except NotFoundException as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -450,6 +713,9 @@ def retry_video_generation(
 ):
     """
     Retry failed video generation
+
+    If the video's Sora job is still alive (or already rendered) the pipeline
+    reattaches to it instead of submitting a new job.
     """
     try:
         video = video_service.get_video_by_id(db, video_id, current_user.id)
@@ -460,6 +726,10 @@ def retry_video_generation(
                 detail="Can only retry failed videos",
             )
 
+        # Failed videos are refunded: reserve the credits again
+        if video.credits_cost and credit_ledger.was_refunded(db, video.id):
+            credit_ledger.reserve(db, current_user, video.credits_cost, video_id=video.id)
+
         # Reset status to pending
         video = video_service.update_video_status(
             db,
@@ -468,6 +738,12 @@ def retry_video_generation(
             error_message=None,
         )
 
+        video.queued_at = datetime.utcnow()
+        db.commit()
+
+        from app.tasks.video_generation import schedule_video_generation
+        schedule_video_generation(video)
+
         return video
 
     except NotFoundException as e:
@@ -475,6 +751,12 @@ def retry_video_generation(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    except InsufficientCreditsException as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=str(e),
+        )
 
 
 @router.get("/models/list", response_model=ModelListResponse)
@@ -1,5 +1,5 @@
 """
-Stripe Webhook Handlers
+Webhook Handlers
 
 Receives and processes Stripe webhook events:
 - checkout.session.completed
@@ -8,13 +8,22 @@ Receives and processes Stripe webhook events:
 - customer.subscription.deleted
 - invoice.payment_succeeded
 - invoice.payment_failed
+
+And OpenAI Sora video job events (Standard Webhooks signatures):
+- video.completed
+- video.failed
 """
+import json
+
 from fastapi import APIRouter, Request, HTTPException, Depends, status
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.database import get_db
 from app.schemas.payment import WebhookEventResponse
+from app.services import sora_webhooks
 from app.services.stripe_service import stripe_service
+from app.utils.webhook_signature import WebhookVerificationError, verify
 
 router = APIRouter()
 
@@ -144,3 +153,75 @@ async def stripe_webhook(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process webhook: {str(e)}",
         )
+
+
+@router.post("/sora", response_model=WebhookEventResponse)
+async def sora_webhook(
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Handle OpenAI Sora video job webhook events
+
+    Important: This endpoint does NOT require authentication (OpenAI calls it).
+    The webhook-signature header is verified against SORA_WEBHOOK_SECRET.
+
+    Supported events:
+    - video.completed: Render finished, the download stage is queued
+    - video.failed: Render failed, the video is re-submitted or failed
+
+    Unknown jobs and already-advanced videos are acknowledged with 200 so
+    OpenAI does not keep re-delivering them.
+
+    Args:
+        request: FastAPI request object (contains raw body and headers)
+        db: Database session
+
+    Returns:
+        Confirmation that the event was received
+
+    Raises:
+        HTTPException: If webhooks are disabled or the signature is invalid
+    """
+    if not settings.SORA_WEBHOOKS_ENABLED or not settings.SORA_WEBHOOK_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sora webhooks are not enabled",
+        )
+
+    payload = await request.body()
+
+    try:
+        webhook_id = verify(
+            settings.SORA_WEBHOOK_SECRET,
+            request.headers,
+            payload,
+            tolerance=settings.SORA_WEBHOOK_TOLERANCE_SECONDS,
+        )
+        event = json.loads(payload)
+    except (WebhookVerificationError, ValueError) as e:
+        print(f"❌ Invalid Sora webhook: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature or payload",
+        )
+
+    event_type = event.get("type", "unknown")
+    print(f"\n🔔 Received Sora webhook: {event_type} (webhook-id {webhook_id})")
+
+    try:
+        result = sora_webhooks.handle_event(db, event)
+    except Exception as e:
+        # 5xx makes OpenAI retry the delivery later
+        print(f"❌ Error processing Sora webhook: {e}\n")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process webhook: {str(e)}",
+        )
+
+    print(f"   Result: {result}")
+    return WebhookEventResponse(
+        received=True,
+        event_type=event_type,
+        message=f"Webhook {event_type} {result}",
+    )
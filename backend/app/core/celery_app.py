@@ -2,8 +2,22 @@
 Celery application configuration for background tasks
 """
 from celery import Celery
+from kombu import Queue
 from app.core.config import settings
 
+# Priority lanes for the generation submit stage, chosen from the user's plan
+# at enqueue time (app.services.queue_lanes). Workers started without -Q
+# consume every lane round-robin, so a trial backlog only ever gets its share
+# of pickups; dedicated "-Q video.premium" workers add premium-only capacity.
+VIDEO_LANES = ("premium", "basic", "trial")
+DEFAULT_QUEUE = "celery"
+
+
+def lane_queue(lane: str) -> str:
+    """Celery queue name of a priority lane"""
+    return f"video.{lane}"
+
+
 # Create Celery app
 celery_app = Celery(
     "aivideo_tasks",
@@ -19,13 +33,46 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
-    task_time_limit=1800,  # 30 minutes max per task
-    task_soft_time_limit=1500,  # 25 minutes soft limit
+    # Generation is split into short stages (submit/poll/download/upload),
+    # so no single task should come close to these limits
+    task_time_limit=600,  # 10 minutes max per task
+    task_soft_time_limit=540,  # 9 minutes soft limit
     worker_prefetch_multiplier=1,  # Process one task at a time
-    worker_max_tasks_per_child=10,  # Restart worker after 10 tasks to prevent memory leaks
+    worker_direct=True,  # Per-worker queue: upload stage runs where the file was downloaded
+    task_acks_late=True,  # Ack after completion so crashed tasks are redelivered...
+    task_reject_on_worker_lost=True,  # ...and resume their recorded Sora job (no re-submit)
+    # Children keep their clients warm (app.core.worker_bootstrap) and are
+    # replaced once a task leaves them above the RSS limit (KiB), not every N tasks
+    worker_max_memory_per_child=settings.WORKER_MAX_MEMORY_PER_CHILD_MB * 1024 or None,
+    worker_max_tasks_per_child=settings.WORKER_MAX_TASKS_PER_CHILD or None,
+    worker_proc_alive_timeout=30,  # worker_process_init warms clients over the network
+    task_default_queue=DEFAULT_QUEUE,
+    task_queues=[Queue(DEFAULT_QUEUE)] + [Queue(lane_queue(lane)) for lane in VIDEO_LANES],
+    broker_transport_options={"queue_order_strategy": "round_robin"},
 )
 
+# Periodic tasks (run with: celery -A app.core.celery_app beat)
+celery_app.conf.beat_schedule = {
+    "reap-stuck-videos": {
+        "task": "reap_stuck_videos_task",
+        "schedule": settings.VIDEO_REAPER_INTERVAL_SECONDS,
+    },
+    "release-held-videos": {
+        "task": "release_held_videos_task",
+        "schedule": settings.USER_RELEASE_INTERVAL_SECONDS,
+    },
+    "reconcile-credit-reservations": {
+        "task": "reconcile_credit_reservations_task",
+        "schedule": settings.CREDIT_RECONCILE_INTERVAL_SECONDS,
+    },
+    "advance-bulk-jobs": {
+        "task": "advance_bulk_jobs_task",
+        "schedule": settings.BULK_JOB_INTERVAL_SECONDS,
+    },
+}
+
 # Auto-discover tasks
 celery_app.autodiscover_tasks(["app.tasks"])
 
-print("✅ Celery app initialized")
+# Per-child client warm-up, health checks and setup-time metrics
+from app.core import worker_bootstrap  # noqa: E402,F401
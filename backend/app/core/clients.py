@@ -0,0 +1,152 @@
+"""
+Process-wide clients shared by every task and request of one process
+
+Each generation stage used to build its own clients: SSELogger opened a new
+Redis connection per task, the OpenAI clients of the Sora and script services
+each kept a private connection pool, and metrics, the rate limiter, circuit
+breakers, fair share and stage timings each had their own Redis client. A ClientSlot holds one client
+per process instead:
+
+    slot.get()     -> the process's client, built on first use
+    slot.ensure()  -> health check (at most every WORKER_CLIENT_CHECK_SECONDS),
+                      rebuilding the client if the check fails
+
+Slots remember the PID that built their client. A forked Celery child never
+uses (or closes) sockets inherited from its parent: the first get() in the
+child builds a fresh client. app.core.worker_bootstrap warms the slots when a
+worker child starts and checks them before each task.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ClientSlot:
+    """One lazily built, health-checked client per process"""
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        check: Optional[Callable[[Any], None]] = None,
+        close: Optional[Callable[[Any], None]] = None,
+    ):
+        """
+        Args:
+            name: Client name (metric label, logs)
+            factory: Builds a new client
+            check: Raises if the client is unusable
+            close: Releases the client's connections
+        """
+        self.name = name
+        self._factory = factory
+        self._check = check
+        self._close = close
+        self._client = None
+        self._pid: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Client of the current process, built on first use"""
+        client = self._client
+        if client is not None and self._pid == os.getpid():
+            return client
+
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                # Inherited from the parent process: drop without closing its sockets
+                self._client = self._factory()
+                self._pid = os.getpid()
+                self._checked_at = time.monotonic()
+            return self._client
+
+    @property
+    def built(self) -> bool:
+        """Whether this process already has a client"""
+        return self._client is not None and self._pid == os.getpid()
+
+    def ensure(self, max_age: Optional[float] = None) -> bool:
+        """
+        Health-check the client if the last check is older than max_age
+
+        A failing client is closed and rebuilt.
+
+        Args:
+            max_age: Seconds a check stays valid (default WORKER_CLIENT_CHECK_SECONDS, 0 = always check)
+
+        Returns:
+            True if the client was built or rebuilt
+        """
+        max_age = settings.WORKER_CLIENT_CHECK_SECONDS if max_age is None else max_age
+        if not self.built:
+            self.get()
+            return True
+        if self._check is None or time.monotonic() - self._checked_at < max_age:
+            return False
+
+        try:
+            self._check(self._client)
+            self._checked_at = time.monotonic()
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️  [Clients] {self.name} failed its health check, rebuilding: {e}")
+            self.reset()
+            self.get()
+            return True
+
+    def reset(self):
+        """Close and forget the current process's client"""
+        with self._lock:
+            client, owned = self._client, self._pid == os.getpid()
+            self._client = None
+            self._pid = None
+        if client is not None and owned and self._close is not None:
+            try:
+                self._close(client)
+            except Exception as e:
+                logger.warning(f"⚠️  [Clients] Failed to close {self.name}: {e}")
+
+
+def _new_openai_client():
+    from openai import OpenAI
+    # Retries are handled by app.services.resilience (classified, with circuit breakers)
+    return OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+
+
+def _check_http_client(client):
+    closed = client.is_closed
+    if callable(closed):  # openai.OpenAI.is_closed() vs httpx.Client.is_closed
+        closed = closed()
+    if closed:
+        raise RuntimeError("client is closed")
+
+
+def _new_redis_client(timeout: float = 5):
+    import redis
+    pool = redis.ConnectionPool.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=timeout,
+        socket_timeout=timeout,
+        health_check_interval=settings.WORKER_CLIENT_CHECK_SECONDS,  # PING idle connections before reuse
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+# Global client slots
+openai_client = ClientSlot("openai", _new_openai_client, check=_check_http_client, close=lambda c: c.close())
+redis_client = ClientSlot("redis", _new_redis_client, check=lambda c: c.ping(),
+                          close=lambda c: c.connection_pool.disconnect())
+# Metrics, rate limits, circuit breakers, fair share, stage timings: short
+# timeouts, since callers fail open rather than stall a request or task on Redis
+redis_control_client = ClientSlot("redis_control", lambda: _new_redis_client(timeout=2), check=lambda c: c.ping(),
+                                  close=lambda c: c.connection_pool.disconnect())
+
+CLIENT_SLOTS = (openai_client, redis_client, redis_control_client)
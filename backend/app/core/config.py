@@ -1,7 +1,7 @@
 """
 Application configuration using pydantic-settings
 """
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -50,6 +50,9 @@ class Settings(BaseSettings):
     # AI Models (Placeholder - need real API keys)
     SORA_API_KEY: str = ""
     RUNWAY_API_KEY: str = ""
+    RUNWAY_API_URL: str = "https://api.dev.runwayml.com/v1"
+    RUNWAY_API_VERSION: str = "2024-11-06"  # X-Runway-Version header
+    RUNWAY_MODEL: str = "gen4_turbo"
 
     # OpenAI Configuration
     OPENAI_API_KEY: str = ""  # From .env
@@ -63,6 +66,120 @@ class Settings(BaseSettings):
     SORA_DURATION: int = 6  # seconds
     SORA_RESOLUTION: str = "1280x720"  # Landscape format
 
+    # Video Download (parallel HTTP range requests)
+    VIDEO_DOWNLOAD_CONNECTIONS: int = 4  # Concurrent byte ranges per download
+    VIDEO_DOWNLOAD_MIN_PART_SIZE: int = 4 * 1024 * 1024  # Smaller files use a single stream
+    VIDEO_DOWNLOAD_TIMEOUT_SECONDS: int = 300
+
+    # Video Post-processing (runs between download and upload)
+    VIDEO_POSTPROCESS_ENABLED: bool = True  # Read MP4 metadata and extract a poster frame
+    VIDEO_FASTSTART_ENABLED: bool = True  # Move moov ahead of mdat before upload (no re-encode)
+    FFMPEG_BINARY: str = "ffmpeg"  # Optional system dependency; posters are skipped without it
+    FFMPEG_TIMEOUT_SECONDS: int = 120
+    VIDEO_RENDITIONS_ENABLED: bool = False  # Build HLS ladders for completed videos (background, needs ffmpeg)
+    VIDEO_RENDITION_HEIGHTS: List[int] = [360, 540, 720]  # Short-side sizes of the HLS ladder
+    VIDEO_RENDITION_TIMEOUT_SECONDS: int = 480
+    VIDEO_PREVIEWS_ENABLED: bool = True  # Short preview clips for gallery grids (background, needs ffmpeg)
+    VIDEO_PREVIEW_FORMAT: str = "mp4"  # "mp4" (H.264) or "webp" (animated WebP)
+    VIDEO_PREVIEW_SECONDS: float = 3
+    VIDEO_PREVIEW_SHORT_SIDE: int = 240
+
+    # Generation Result Cache (identical image + prompt + duration + model)
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # Completed videos older than this are not reused
+    GENERATION_CACHE_SCOPE: str = "user"  # "user" (own videos only) or "global" (any user's video)
+    GENERATION_CACHE_CHARGE_CREDITS: bool = True  # Charge the normal cost on a cache hit
+
+    # Batch Variants (several durations/orientations of one image in one request)
+    VIDEO_BATCH_MAX_VARIANTS: int = 6
+
+    # Catalog Bulk Jobs (manifest of products -> script -> video, see app.tasks.bulk_jobs)
+    BULK_JOB_MAX_ITEMS: int = 500  # Manifest rows per job
+    BULK_JOB_DEFAULT_CONCURRENCY: int = 5  # Items between ingest and rendering at once, per job
+    BULK_JOB_MAX_CONCURRENCY: int = 20
+    BULK_ITEM_LEASE_SECONDS: int = 660  # Lease of an item's ingest/script/video step (exceeds task_time_limit)
+    BULK_ITEM_MAX_ATTEMPTS: int = 3  # Retries of a failing step before the item fails
+    BULK_JOB_INTERVAL_SECONDS: int = 30  # Celery beat interval for advance_bulk_jobs_task
+
+    # Near-duplicate Reference Images (perceptual hash)
+    IMAGE_DEDUP_ENABLED: bool = True  # Reuse stored images/scripts for near-identical uploads
+    IMAGE_DEDUP_REUSE_SCRIPTS: bool = True  # Return the stored script for a near-identical image + same parameters
+    IMAGE_DEDUP_MAX_DISTANCE: int = 4  # Max differing bits (of 64) between dHashes
+    IMAGE_DEDUP_INDEX_MAX_USERS: int = 1000  # Per-user BK-trees kept in memory per process
+
+    # Priority Lanes (submit stage routed by subscription plan)
+    VIDEO_LANE_MAX_ACTIVE: Dict[str, int] = {"premium": 0, "basic": 0, "trial": 4}  # PROCESSING videos per lane, 0 = no cap
+    VIDEO_LANE_DEFER_SECONDS: int = 15  # Re-check delay when a lane is at its cap
+
+    # Per-user Fair Share (videos in flight per user; extra videos wait in a held list)
+    USER_FAIR_SHARE_ENABLED: bool = True
+    USER_MAX_IN_FLIGHT: Dict[str, int] = {"premium": 4, "basic": 2, "trial": 1}  # By lane, 0 = no cap
+    USER_SLOT_TTL_SECONDS: int = 3600  # Slot of a video that never reported back is freed after this
+    USER_RELEASE_INTERVAL_SECONDS: int = 30  # Celery beat interval for release_held_videos_task
+
+    # Admission Control (queue position / ETA, load shedding with 429)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_BACKLOG: int = 500  # Reject new videos while this many are pending, 0 = no limit
+    ADMISSION_MAX_WAIT_SECONDS: Dict[str, int] = {"premium": 0, "basic": 3600, "trial": 900}  # By lane, 0 = never shed
+    ADMISSION_THROUGHPUT_WINDOW_SECONDS: int = 900  # History used for the submits-per-minute rate
+    ADMISSION_DEFAULT_RENDER_SECONDS: int = 240  # Render time estimate before any video completed
+    ADMISSION_MIN_RETRY_AFTER_SECONDS: int = 30
+
+    # Sora Job Polling
+    SORA_POLL_INTERVAL_SECONDS: int = 10  # Delay between status checks of one job
+    SORA_POLLER_ENABLED: bool = False  # Use dedicated asyncio poller instead of Celery poll tasks
+    SORA_POLLER_CONCURRENCY: int = 20  # Max concurrent videos.retrieve calls in the poller
+    SORA_POLLER_REFRESH_SECONDS: int = 5  # How often the poller picks up newly submitted jobs
+    SORA_WEBHOOKS_ENABLED: bool = False  # Completion via POST /api/v1/webhooks/sora; polling becomes a safety net
+    SORA_WEBHOOK_SECRET: str = ""  # "whsec_..." signing secret of the OpenAI webhook endpoint
+    SORA_WEBHOOK_TOLERANCE_SECONDS: int = 300  # Max age of a delivery's webhook-timestamp
+    SORA_WEBHOOK_SAFETY_POLL_SECONDS: int = 120  # Status check interval while webhooks are enabled
+    SORA_POLL_ETA_ENABLED: bool = True  # Time status checks from the render ETA (stage_timings)
+    SORA_POLL_ETA_FRACTION: float = 0.5  # Next check after this share of the remaining render time
+    SORA_POLL_MIN_SECONDS: int = 3  # Closest spacing of checks near the expected finish
+    SORA_POLL_MAX_SECONDS: int = 60  # Widest spacing of checks early in a render
+
+    # OpenAI/Sora resilience (error classification, backoff, circuit breakers)
+    OPENAI_RETRY_ATTEMPTS: int = 3  # Attempts per call for retryable/rate-limited errors
+    OPENAI_RETRY_BASE_SECONDS: float = 1.0  # First backoff step, doubled per attempt (with jitter)
+    OPENAI_RETRY_MAX_SECONDS: float = 20.0  # Longest in-process wait; longer waits are left to the caller
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Failures within the window that open an endpoint's circuit
+    CIRCUIT_FAILURE_WINDOW_SECONDS: int = 60
+    CIRCUIT_OPEN_SECONDS: int = 30  # Open circuit rejects calls this long before letting a probe through
+    STAGE_RETRY_BASE_SECONDS: int = 15  # Backoff of pipeline stage retries, doubled per retry (with jitter)
+    STAGE_RETRY_MAX_SECONDS: int = 300
+
+    # Sora Rate Limiting (shared by all workers through Redis)
+    SORA_RATE_LIMIT_ENABLED: bool = True
+    SORA_REQUESTS_PER_MINUTE: Dict[str, int] = {"sora-2": 60, "sora-2-pro": 30, "gen4_turbo": 60}  # create + retrieve calls, 0 = no limit
+    SORA_REQUEST_BURST: Dict[str, int] = {"sora-2": 10, "sora-2-pro": 5, "gen4_turbo": 10}  # Token bucket size
+    SORA_MAX_IN_FLIGHT: Dict[str, int] = {"sora-2": 20, "sora-2-pro": 10, "gen4_turbo": 10}  # Rendering jobs at once, 0 = no limit
+    SORA_IN_FLIGHT_LEASE_SECONDS: int = 1500  # Slot held without a status check is freed after this
+    SORA_IN_FLIGHT_RETRY_SECONDS: int = 20  # Wait before retrying a submit when no slot is free
+
+    # Video Providers (routing between Sora, Runway and the mock backend)
+    VIDEO_PROVIDERS: List[str] = ["sora"]  # Candidates in order of preference: "sora", "runway", "mock"
+    VIDEO_PROVIDER_SUBSTITUTES: Dict[str, Dict[str, str]] = {"runway": {"sora-2": "gen4_turbo"}}  # Provider -> requested model -> its model
+    VIDEO_PROVIDER_COST_PER_SECOND: Dict[str, float] = {"sora-2": 0.10, "sora-2-pro": 0.30, "gen4_turbo": 0.05}  # USD per rendered second
+    VIDEO_ROUTER_SECONDS_PER_DOLLAR: float = 600.0  # Render seconds the router trades for one dollar saved
+
+    # Stuck Generation Reaper
+    VIDEO_LEASE_SECONDS: int = 660  # Lease renewed by each stage (must exceed Celery task_time_limit)
+    VIDEO_REAPER_INTERVAL_SECONDS: int = 60  # Celery beat interval for reap_stuck_videos_task
+    VIDEO_REAPER_BATCH_SIZE: int = 100  # Max videos resumed per reaper run
+
+    # Credit Ledger (reservations captured on completion, refunded on failure)
+    CREDIT_RECONCILE_INTERVAL_SECONDS: int = 300  # Celery beat interval for reconcile_credit_reservations_task
+    CREDIT_RECONCILE_MIN_AGE_SECONDS: int = 120  # Reservations younger than this are left to the pipeline
+    CREDIT_RECONCILE_BATCH_SIZE: int = 500  # Max reservations settled per run
+
+    # Celery Worker Children (clients built once per child, recycled by memory)
+    WORKER_MAX_MEMORY_PER_CHILD_MB: int = 512  # Child is replaced after a task leaves it above this RSS, 0 = never
+    WORKER_MAX_TASKS_PER_CHILD: int = 0  # Optional task-count backstop, 0 = no limit
+    WORKER_CLIENT_CHECK_SECONDS: int = 60  # Shared clients are health-checked before a task at most this often
+    WORKER_IMPORT_BUDGET_MS: int = 3000  # Median cold import of the worker entry point (~1-1.5s today; 2x headroom over run-to-run noise)
+
     # Mock Mode for Testing
     USE_MOCK_SORA: bool = False  # Set to False to use real OpenAI API
 
@@ -136,6 +253,10 @@ class Settings(BaseSettings):
     GCS_PUBLIC_URL_BASE: str = "https://storage.googleapis.com"
     GCS_FOLDER_PREFIX: str = "video4ads"  # 文件夹前缀
 
+    # GCS 流式上传 (resumable upload, CRC32C 校验)
+    GCS_UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024  # 每个请求的分块大小, 必须是 256KB 的倍数
+    VIDEO_STREAM_UPLOAD: bool = True  # 直接把 Sora 输出流式写入 GCS (不落地临时文件; 开启后处理时不适用)
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
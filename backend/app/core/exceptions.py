@@ -57,3 +57,21 @@ class SubscriptionExpiredException(AIVideoException):
     """Subscription expired exception"""
     def __init__(self, message: str = "Your subscription has expired"):
         super().__init__(message, status_code=403)
+
+
+class QueueFullException(AIVideoException):
+    """Generation backlog too deep - request shed by admission control"""
+    def __init__(self, message: str = "Video generation is at capacity", retry_after: int = 60):
+        self.retry_after = retry_after  # Seconds, sent as the Retry-After header
+        super().__init__(message, status_code=429)
+
+
+class CircuitOpenException(AIVideoException):
+    """Calls to an upstream endpoint are suspended by its circuit breaker"""
+    def __init__(self, endpoint: str, retry_after: int = 30):
+        self.endpoint = endpoint
+        self.retry_after = retry_after  # Seconds until the breaker lets a probe through
+        super().__init__(
+            f"{endpoint} is temporarily unavailable, retry in {retry_after}s",
+            status_code=503,
+        )
@@ -0,0 +1,153 @@
+"""
+Celery worker bootstrap: warm, health-checked clients in each worker child
+
+Children used to be replaced every 10 tasks, and every replacement paid again
+for the OpenAI and GCS clients, Redis connections and database connections
+its first tasks needed. Now each prefork child:
+
+    worker_process_init     -> drops database connections inherited from the
+                               parent, builds the shared clients once
+                               (app.core.clients, GCS, video providers) and
+                               opens a database connection
+    task_prerun             -> health-checks the shared clients at most every
+                               WORKER_CLIENT_CHECK_SECONDS, rebuilding failed
+                               ones; its duration is the task's setup time
+    task_postrun            -> records the child's peak RSS
+    worker_process_shutdown -> closes the clients
+
+Children are recycled by memory (worker_max_memory_per_child, from
+WORKER_MAX_MEMORY_PER_CHILD_MB) rather than after a fixed number of tasks.
+Warm-up is best effort: a client that can't be built is logged and built
+again on first use.
+
+Metrics:
+    worker_child_init_seconds{client}    warm-up time per client ("total" = whole bootstrap)
+    worker_task_setup_seconds{task}      client checks/rebuilds before a task
+    worker_client_rebuilds_total{client} clients rebuilt after a failed health check
+    worker_child_rss_megabytes           peak RSS after each task
+    worker_child_recycles_total          children over the memory limit
+"""
+import logging
+import resource
+import sys
+import time
+from typing import Callable
+
+from celery.signals import task_postrun, task_prerun, worker_process_init, worker_process_shutdown
+
+from app.core.clients import CLIENT_SLOTS
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Setup steps are milliseconds when the clients are warm
+SETUP_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+RSS_BUCKETS = (128, 256, 512, 768, 1024, 2048)
+
+
+def _warm_database():
+    from app.database import engine
+    # Pooled connections were opened by the parent: never share their sockets
+    engine.dispose(close=False)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+def _warm_gcs():
+    from app.services.gcs_service import gcs_service
+    gcs_service.bucket  # Created on first access
+
+
+def _warm_providers():
+    from app.services.video_providers import get_provider
+    for name in settings.VIDEO_PROVIDERS:
+        get_provider(name).service
+
+
+def _timed(name: str, warm: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    try:
+        warm()
+    except Exception as e:
+        logger.warning(f"⚠️  [Worker] Could not warm {name}, it will be built on first use: {e}")
+    return time.perf_counter() - start
+
+
+def warm_clients() -> dict:
+    """
+    Build the clients a worker child needs before its first task
+
+    Returns:
+        Seconds spent per client
+    """
+    timings = {"database": _timed("database", _warm_database)}
+    for slot in CLIENT_SLOTS:
+        timings[slot.name] = _timed(slot.name, lambda: slot.ensure(max_age=0))
+    timings["gcs"] = _timed("gcs", _warm_gcs)
+    timings["providers"] = _timed("providers", _warm_providers)
+    return timings
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    from app.utils import metrics
+
+    start = time.perf_counter()
+    timings = warm_clients()
+    total = time.perf_counter() - start
+
+    for name, seconds in timings.items():
+        metrics.observe("worker_child_init_seconds", seconds, buckets=SETUP_BUCKETS, client=name)
+    metrics.observe("worker_child_init_seconds", total, buckets=SETUP_BUCKETS, client="total")
+    logger.info(f"🔥 [Worker] Child ready in {total * 1000:.0f}ms "
+                f"({', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items())})")
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    from app.utils import metrics
+
+    start = time.perf_counter()
+    for slot in CLIENT_SLOTS:
+        try:
+            # Clients this child never needed stay unbuilt until first use
+            if slot.built and slot.ensure():
+                metrics.incr("worker_client_rebuilds_total", client=slot.name)
+        except Exception as e:
+            # Left to the task: it fails (and retries) like it would without a warm client
+            logger.warning(f"⚠️  [Worker] {slot.name} unavailable before {task.name}: {e}")
+    setup = time.perf_counter() - start
+
+    metrics.observe("worker_task_setup_seconds", setup, buckets=SETUP_BUCKETS, task=task.name)
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, **kwargs):
+    from app.utils import metrics
+
+    rss = peak_rss_mb()
+    metrics.observe("worker_child_rss_megabytes", rss, buckets=RSS_BUCKETS)
+
+    limit = settings.WORKER_MAX_MEMORY_PER_CHILD_MB
+    if limit and rss > limit:
+        # Celery replaces the child after this task (worker_max_memory_per_child)
+        metrics.incr("worker_child_recycles_total")
+        logger.info(f"♻️  [Worker] Child at {rss:.0f}MB (limit {limit}MB) after {task.name}, recycling")
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    for slot in CLIENT_SLOTS:
+        slot.reset()
+    try:
+        from app.database import engine
+        engine.dispose()
+    except Exception as e:
+        logger.warning(f"⚠️  [Worker] Failed to close database connections: {e}")
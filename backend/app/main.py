@@ -3,13 +3,14 @@ FastAPI main application
 """
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 import os
 
 from app.core.config import settings
 from app.core.exceptions import AIVideoException
 from app.api.v1 import api_router
+from app.utils import metrics
 
 # Create FastAPI application
 app = FastAPI(
@@ -98,6 +99,17 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Metrics endpoint (Prometheus text format)
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Pipeline metrics aggregated from all API and worker processes"""
+    from app.services.queue_lanes import record_lane_gauges
+    from app.services.resilience import record_circuit_gauges
+    record_lane_gauges()
+    record_circuit_gauges()
+    return metrics.render_prometheus()
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
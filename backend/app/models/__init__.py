@@ -2,19 +2,28 @@
 Database models
 """
 from app.models.user import User
-from app.models.video import Video, VideoStatus, AIModel
+from app.models.video import Video, VideoStatus, AIModel, GenerationStage
 from app.models.showcase import ShowcaseVideo
 from app.models.trial_image import TrialImage
 from app.models.uploaded_image import UploadedImage
 from app.models.generated_script import GeneratedScript
+from app.models.bulk_job import BulkJob, BulkJobItem, BulkJobStatus, BulkItemStage
+from app.models.credit_ledger import CreditLedgerEntry, CreditEntryStatus
 
 __all__ = [
     "User",
     "Video",
     "VideoStatus",
     "AIModel",
+    "GenerationStage",
     "ShowcaseVideo",
     "TrialImage",
     "UploadedImage",
     "GeneratedScript",
+    "BulkJob",
+    "BulkJobItem",
+    "BulkJobStatus",
+    "BulkItemStage",
+    "CreditLedgerEntry",
+    "CreditEntryStatus",
 ]
@@ -0,0 +1,101 @@
+"""
+Bulk job models - catalog manifests processed item by item (image -> script -> video)
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+import enum
+from app.database import Base
+
+
+class BulkJobStatus(str, enum.Enum):
+    """Bulk job status"""
+    RUNNING = "running"
+    COMPLETED = "completed"  # Every item finished (some may have failed)
+    FAILED = "failed"  # Every item failed
+
+
+class BulkItemStage(str, enum.Enum):
+    """Per-item pipeline stages (a stage is re-run from scratch after a crash)"""
+    QUEUED = "queued"  # Waiting for a concurrency slot
+    INGEST = "ingest"  # Read, validate and store the product image
+    SCRIPT = "script"  # GPT-4o script from the stored image
+    VIDEO = "video"  # Create the video and queue it for Sora
+    RENDERING = "rendering"  # Video in the generation pipeline
+    DONE = "done"
+    FAILED = "failed"
+
+
+class BulkJob(Base):
+    __tablename__ = "bulk_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(255), nullable=True)  # Manifest filename or client label
+
+    status = Column(SQLEnum(BulkJobStatus), default=BulkJobStatus.RUNNING, nullable=False, index=True)
+    total_items = Column(Integer, nullable=False, default=0)
+    max_concurrency = Column(Integer, nullable=False, default=5)  # Items between INGEST and RENDERING at once
+
+    # Defaults for items that don't set their own
+    duration = Column(Integer, nullable=False, default=8)
+    model = Column(String(50), nullable=False, default="sora-2")
+    language = Column(String(10), nullable=False, default="en")
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    items = relationship(
+        "BulkJobItem", back_populates="bulk_job", cascade="all, delete-orphan", order_by="BulkJobItem.position"
+    )
+
+    def __repr__(self):
+        return f"<BulkJob(id={self.id}, user_id={self.user_id}, status={self.status}, items={self.total_items})>"
+
+
+class BulkJobItem(Base):
+    __tablename__ = "bulk_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bulk_job_id = Column(Integer, ForeignKey("bulk_jobs.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)  # Row of the manifest (0-based)
+
+    # Manifest row
+    sku = Column(String(100), nullable=True)
+    image_url = Column(String(500), nullable=True)  # Product image URL (or the upload's URL)
+    source_image_id = Column(Integer, ForeignKey("uploaded_images.id", ondelete="SET NULL"), nullable=True)
+    description = Column(Text, nullable=True)  # Product description / ideas for the script
+    duration = Column(Integer, nullable=True)  # NULL = job default
+    model = Column(String(50), nullable=True)
+    language = Column(String(10), nullable=True)
+
+    # Pipeline state (each stage reads/writes these between tasks)
+    stage = Column(SQLEnum(BulkItemStage), default=BulkItemStage.QUEUED, nullable=False)
+    stored_image_url = Column(String(500), nullable=True)  # Sora-ready image (ingest result)
+    uploaded_image_id = Column(Integer, ForeignKey("uploaded_images.id", ondelete="SET NULL"), nullable=True)
+    generated_script_id = Column(Integer, ForeignKey("generated_scripts.id", ondelete="SET NULL"), nullable=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="SET NULL"), nullable=True, index=True)
+    attempts = Column(Integer, default=0, nullable=False)  # Stage runs that failed and were retried
+    error_message = Column(Text, nullable=True)
+
+    # Worker lease - an expired lease on an active stage means the worker died
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    bulk_job = relationship("BulkJob", back_populates="items")
+    generated_script = relationship("GeneratedScript")
+    video = relationship("Video")
+
+    __table_args__ = (
+        # Scheduler lookups: items of a job by stage, in manifest order
+        Index("ix_bulk_job_items_job_stage_position", "bulk_job_id", "stage", "position"),
+    )
+
+    def __repr__(self):
+        return f"<BulkJobItem(id={self.id}, bulk_job_id={self.bulk_job_id}, stage={self.stage})>"
@@ -0,0 +1,45 @@
+"""
+Credit ledger model - every change to a user's credit balance
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+import enum
+from app.database import Base
+
+
+class CreditEntryStatus(str, enum.Enum):
+    """Credit ledger entry status"""
+    RESERVED = "reserved"  # Debited, pending the outcome of the work (video generation)
+    CAPTURED = "captured"  # Final (completed video, script, purchase)
+    RELEASED = "released"  # Refunded to the balance (failed video)
+
+
+class CreditLedgerEntry(Base):
+    __tablename__ = "credit_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="SET NULL"), nullable=True)
+
+    amount = Column(Float, nullable=False)  # Change to the balance (negative = debit)
+    reason = Column(String(30), nullable=False)  # video, script, purchase, subscription, admin
+    status = Column(SQLEnum(CreditEntryStatus), nullable=False)
+    balance_after = Column(Float, nullable=True)  # Balance right after the entry was applied
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    settled_at = Column(DateTime, nullable=True)  # Captured or released
+
+    # Relationships
+    user = relationship("User")
+    video = relationship("Video")
+
+    __table_args__ = (
+        # Capture/release lookup: open reservations of a video
+        Index("ix_credit_ledger_video_id_status", "video_id", "status"),
+        # Reconciliation sweep: reservations by status and age
+        Index("ix_credit_ledger_status_created_at", "status", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<CreditLedgerEntry(id={self.id}, user_id={self.user_id}, amount={self.amount}, status={self.status})>"
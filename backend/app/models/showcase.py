@@ -15,6 +15,8 @@ class ShowcaseVideo(Base):
     category = Column(String(100), nullable=False, index=True)  # Product, Fashion, F&B, etc.
     video_url = Column(String(500), nullable=False)
     poster_url = Column(String(500), nullable=False)
+    hls_url = Column(String(500), nullable=True)  # HLS master playlist (adaptive bitrate renditions)
+    preview_url = Column(String(500), nullable=True)  # 2-3s low-res clip for gallery hover/autoplay
     is_featured = Column(Boolean, default=False, index=True)
     order = Column(Integer, default=0, index=True)  # Display order
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -13,11 +13,13 @@ class UploadedImage(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     filename = Column(String(255), nullable=False)
-    file_url = Column(String(500), nullable=False)  # HTTPS URL of uploaded image
+    file_url = Column(String(500), nullable=False, index=True)  # HTTPS URL of uploaded image (cache lookups)
     file_size = Column(Integer, nullable=True)  # File size in bytes
     file_type = Column(String(50), nullable=True)  # MIME type (image/jpeg, image/png)
     width = Column(Integer, nullable=True)  # Image width in pixels
     height = Column(Integer, nullable=True)  # Image height in pixels
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the stored bytes
+    phash = Column(String(16), nullable=True)  # 64-bit dHash (hex) for near-duplicate lookup
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -2,7 +2,7 @@
 Video model - User generated videos
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 import enum
 from app.database import Base
@@ -16,6 +16,15 @@ class VideoStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class GenerationStage(str, enum.Enum):
+    """Generation pipeline stages (one short Celery task each)"""
+    SUBMIT = "submit"
+    POLL = "poll"
+    DOWNLOAD = "download"
+    PROCESS = "process"
+    UPLOAD = "upload"
+
+
 class AIModel(str, enum.Enum):
     """Available AI models"""
     SORA_2 = "sora-2"
@@ -37,14 +46,43 @@ class Video(Base):
     reference_image_url = Column(String(500), nullable=True)  # Keep for backward compatibility
     video_url = Column(String(500), nullable=True)
     poster_url = Column(String(500), nullable=True)
+    hls_url = Column(String(500), nullable=True)  # HLS master playlist (adaptive bitrate renditions)
+    preview_url = Column(String(500), nullable=True)  # 2-3s low-res clip for gallery hover/autoplay
     status = Column(SQLEnum(VideoStatus), default=VideoStatus.PENDING, nullable=False, index=True)
     duration = Column(Integer, nullable=True)  # Duration in seconds
     resolution = Column(String(50), nullable=True)  # e.g., "1920x1080"
+    bitrate = Column(Integer, nullable=True)  # Average bits per second, read from the MP4
     error_message = Column(Text, nullable=True)
 
     # Credits tracking
     credits_cost = Column(Float, nullable=True)  # Credits consumed for this video
 
+    # Generation result cache: sha256(image hash | prompt | duration | model)
+    cache_key = Column(String(64), nullable=True, index=True)
+    cache_source_video_id = Column(Integer, ForeignKey("videos.id", ondelete="SET NULL"), nullable=True)  # Set on cache hits
+
+    # Batch variant generation: videos created together from one image share a batch ID
+    batch_id = Column(String(32), nullable=True, index=True)
+
+    # Generation pipeline state (each Celery stage reads/writes these between tasks)
+    generation_stage = Column(String(20), nullable=True)  # submit, poll, download, process, upload
+    provider = Column(String(20), nullable=True)  # Video provider rendering the job (sora, runway, mock); NULL = sora
+    sora_job_id = Column(String(100), nullable=True, index=True)  # Provider job ID (OpenAI video / Runway task)
+    sora_submitted_at = Column(DateTime, nullable=True)  # When the Sora job was submitted
+    sora_attempt = Column(Integer, default=0, nullable=False)  # Number of Sora jobs submitted
+    sora_last_status = Column(String(20), nullable=True)  # Last observed job status (queued, in_progress, ...)
+    local_video_path = Column(String(500), nullable=True)  # Downloaded file awaiting upload
+
+    # Priority lane (premium, basic, trial) - chosen from the plan at enqueue time
+    queue_lane = Column(String(20), nullable=True)
+    queued_at = Column(DateTime, nullable=True)  # When the video became eligible for the submit stage
+    estimated_start_at = Column(DateTime, nullable=True)  # Admission control estimate
+    estimated_finish_at = Column(DateTime, nullable=True)
+
+    # Worker lease - renewed by every stage; an expired lease means the worker died
+    heartbeat_at = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -53,5 +91,15 @@ class Video(Base):
     generated_script = relationship("GeneratedScript", back_populates="videos")
     uploaded_image = relationship("UploadedImage")
 
+    __table_args__ = (
+        # Reaper lookup: PROCESSING videos with an expired lease
+        Index("ix_videos_status_lease_expires_at", "status", "lease_expires_at"),
+        # Lane caps and queue depth: videos per lane and status
+        Index("ix_videos_queue_lane_status", "queue_lane", "status"),
+    )
+
+    # Current position in the lane (not stored; set by admission.annotate_queue_position)
+    queue_position = None
+
     def __repr__(self):
         return f"<Video(id={self.id}, status={self.status}, user_id={self.user_id})>"
@@ -0,0 +1,74 @@
+"""
+Bulk job schemas for catalog manifests (product image -> script -> video)
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from app.models.bulk_job import BulkItemStage, BulkJobStatus
+
+
+def _check_duration(value: Optional[int]) -> Optional[int]:
+    if value is not None and value not in (4, 8, 12):
+        raise ValueError("Duration must be one of 4, 8, or 12 seconds")
+    return value
+
+
+class BulkJobItemSpec(BaseModel):
+    """One manifest row: a product image plus what to say about it"""
+    sku: Optional[str] = Field(None, max_length=100, description="Client product reference, echoed in the report")
+    image_url: Optional[str] = Field(None, max_length=500, description="Product image URL")
+    uploaded_image_id: Optional[int] = Field(None, description="ID of an image already uploaded by the user")
+    description: Optional[str] = Field(None, max_length=2000, description="Product description and ideas for the script")
+    duration: Optional[int] = Field(None, description="Video duration in seconds (default: the job's)")
+    model: Optional[str] = Field(None, description="AI model (default: the job's)")
+    language: Optional[str] = Field(None, max_length=10, description="Script language (default: the job's)")
+
+    @field_validator("duration")
+    @classmethod
+    def validate_duration(cls, value: Optional[int]) -> Optional[int]:
+        return _check_duration(value)
+
+    @model_validator(mode="after")
+    def require_image(self):
+        if not self.image_url and not self.uploaded_image_id:
+            raise ValueError("Each item needs an image_url or an uploaded_image_id")
+        return self
+
+
+class BulkJobCreateRequest(BaseModel):
+    """Schema for a bulk job created from a JSON manifest"""
+    name: Optional[str] = Field(None, max_length=255)
+    items: List[BulkJobItemSpec] = Field(..., min_length=1)
+    duration: int = Field(8, description="Default video duration in seconds (4, 8 or 12)")
+    model: str = Field("sora-2", description="Default AI model")
+    language: str = Field("en", max_length=10, description="Default script language")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Items processed at once (default: server setting)")
+
+    @field_validator("duration")
+    @classmethod
+    def validate_duration(cls, value: int) -> int:
+        return _check_duration(value)
+
+
+class BulkJobResponse(BaseModel):
+    """Schema for bulk job progress"""
+    id: int
+    name: Optional[str] = None
+    status: BulkJobStatus
+    total_items: int
+    max_concurrency: int
+    duration: int
+    model: str
+    language: str
+    progress: int  # 0-100, share of items done or failed
+    stages: Dict[BulkItemStage, int]  # Items per stage
+    estimated_credits: Optional[float] = None  # Set on creation
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class BulkJobListResponse(BaseModel):
+    """Schema for the user's bulk jobs"""
+    jobs: List[BulkJobResponse]
+    total: int
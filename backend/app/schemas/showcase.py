@@ -14,6 +14,8 @@ class ShowcaseVideoResponse(BaseModel):
     category: str
     video_url: str
     poster_url: str
+    hls_url: Optional[str] = None
+    preview_url: Optional[str] = None
     is_featured: bool
     order: int
 
@@ -51,6 +53,8 @@ class HeroVideoResponse(BaseModel):
     title: str
     video_url: str
     poster_url: str
+    hls_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -2,7 +2,7 @@
 Video schemas for API requests and responses
 """
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from pydantic import BaseModel, Field, field_validator
 from app.models.video import VideoStatus, AIModel
 
@@ -76,10 +76,18 @@ class VideoResponse(BaseModel):
     reference_image_url: Optional[str] = None
     video_url: Optional[str] = None
     poster_url: Optional[str] = None
+    hls_url: Optional[str] = None
+    preview_url: Optional[str] = None
     status: VideoStatus
     duration: Optional[int] = None
     resolution: Optional[str] = None
+    provider: Optional[str] = None  # Backend that rendered the video
+    batch_id: Optional[str] = None  # Set for videos created by /videos/generate-batch
+    bitrate: Optional[int] = None
     error_message: Optional[str] = None
+    queue_position: Optional[int] = None  # PENDING videos only
+    estimated_start_at: Optional[datetime] = None
+    estimated_finish_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -95,6 +103,42 @@ class VideoListResponse(BaseModel):
     page_size: int
 
 
+class VideoVariantSpec(BaseModel):
+    """One variant of a batch: duration, orientation and model"""
+    duration: int = Field(8, description="Video duration in seconds (4, 8 or 12)")
+    orientation: Optional[Literal["landscape", "portrait"]] = Field(
+        None, description="Output orientation (default: the image's own orientation)"
+    )
+    model: str = Field("sora-2", description="AI model to use")
+
+    @field_validator("duration")
+    @classmethod
+    def validate_duration(cls, value: int) -> int:
+        if value not in (4, 8, 12):
+            raise ValueError("Duration must be one of 4, 8, or 12 seconds")
+        return value
+
+
+class VideoBatchResponse(BaseModel):
+    """Schema for a created batch of variants"""
+    batch_id: str
+    total_credits: float
+    videos: List[VideoResponse]
+
+
+class VideoBatchStatusResponse(BaseModel):
+    """Schema for aggregate batch progress"""
+    batch_id: str
+    status: str  # processing, completed, partial (some failed), failed
+    progress: int  # 0-100, mean over the batch's videos
+    total: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    videos: List[VideoResponse]
+
+
 class VideoStatusResponse(BaseModel):
     """Schema for video status response"""
     id: int
@@ -1,6 +1,7 @@
 """
 Business logic services
-"""
-from app.services import auth_service, video_service, showcase_service
 
+Submodules are not imported here: `from app.services import video_service`
+loads just that module, so Celery workers don't pay for the API-only ones.
+"""
 __all__ = ["auth_service", "video_service", "showcase_service"]
@@ -0,0 +1,181 @@
+"""
+Admission control for video generation
+
+Before a new video is created the controller estimates when it would start:
+
+    position     - PENDING videos ahead of it in its lane, plus one
+    free slots   - SORA_MAX_IN_FLIGHT minus jobs currently rendering
+    throughput   - Sora submits per minute over ADMISSION_THROUGHPUT_WINDOW_SECONDS,
+                   split evenly between lanes that have a backlog (lanes are
+                   consumed round-robin)
+    render time  - expected render plus download/process/upload time of a new
+                   job, from the shared stage timings (stage_timings.estimate_render)
+
+Requests whose estimated wait exceeds ADMISSION_MAX_WAIT_SECONDS[lane], or
+that arrive while ADMISSION_MAX_BACKLOG videos are pending, are rejected with
+429 + Retry-After instead of piling more work onto Redis. Admitted videos get
+estimated_start_at / estimated_finish_at, and PENDING videos report their
+current queue_position in VideoResponse.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import QueueFullException
+from app.models.video import Video, VideoStatus
+from app.services import queue_lanes
+from app.services.sora_rate_limiter import sora_rate_limiter
+from app.services.stage_timings import stage_timings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueueEstimate:
+    """Where a video stands in its lane and when it should start/finish"""
+    lane: str
+    position: int
+    backlog: int
+    free_slots: int
+    starts_per_minute: float
+    wait_seconds: float
+    render_seconds: float
+    start_at: datetime
+    finish_at: datetime
+
+
+def _starts_per_minute(db: Session, since: datetime) -> float:
+    submitted = db.query(func.count(Video.id)).filter(Video.sora_submitted_at >= since).scalar()
+    return submitted * 60.0 / settings.ADMISSION_THROUGHPUT_WINDOW_SECONDS
+
+
+def _render_seconds(model: str, duration: Optional[int]) -> float:
+    """Submit-to-finish time of a new job, as the pipeline's own ETA predicts it"""
+    eta = stage_timings.estimate_render(model, duration, 0).eta_seconds
+    return eta if eta is not None else float(settings.ADMISSION_DEFAULT_RENDER_SECONDS)
+
+
+def estimate(
+    db: Session,
+    lane: str,
+    model: str,
+    queued_before: Optional[datetime] = None,
+    duration: Optional[int] = None,
+) -> QueueEstimate:
+    """
+    Queue position and start/finish estimate in a lane
+
+    Args:
+        db: Database session
+        lane: Priority lane
+        model: Sora model ID
+        queued_before: queued_at of an existing PENDING video (None for a
+            new request at the back of the lane)
+        duration: Video duration in seconds (render time is estimated per duration)
+
+    Returns:
+        QueueEstimate
+    """
+    now = datetime.utcnow()
+    lane_stats = queue_lanes.lane_stats(db)
+
+    ahead = db.query(func.count(Video.id)).filter(
+        Video.queue_lane == lane,
+        Video.status == VideoStatus.PENDING,
+        Video.queued_at < (queued_before or now),
+    ).scalar()
+    position = ahead + 1
+
+    max_in_flight = settings.SORA_MAX_IN_FLIGHT.get(model, 0)
+    free_slots = max(0, max_in_flight - sora_rate_limiter.in_flight(model)) if max_in_flight else position
+    render_seconds = _render_seconds(model, duration)
+
+    starts_per_minute = _starts_per_minute(db, now - timedelta(seconds=settings.ADMISSION_THROUGHPUT_WINDOW_SECONDS))
+    if starts_per_minute <= 0:
+        # No recent history: assume steady state at full provider concurrency
+        starts_per_minute = (max_in_flight or 1) * 60.0 / render_seconds
+    busy_lanes = sum(1 for stat in lane_stats.values() if stat["pending"]) or 1
+    lane_rate = starts_per_minute / busy_lanes
+
+    wait_seconds = 0.0 if position <= free_slots else (position - free_slots) * 60.0 / lane_rate
+    start_at = now + timedelta(seconds=wait_seconds)
+
+    return QueueEstimate(
+        lane=lane,
+        position=position,
+        backlog=sum(int(stat["pending"]) for stat in lane_stats.values()),
+        free_slots=free_slots,
+        starts_per_minute=starts_per_minute,
+        wait_seconds=wait_seconds,
+        render_seconds=render_seconds,
+        start_at=start_at,
+        finish_at=start_at + timedelta(seconds=render_seconds),
+    )
+
+
+def admit(db: Session, lane: str, model: str, duration: Optional[int] = None) -> QueueEstimate:
+    """
+    Estimate a new request and shed it if the backlog is too deep
+
+    Args:
+        db: Database session
+        lane: Priority lane of the request
+        model: Sora model ID
+        duration: Video duration in seconds
+
+    Returns:
+        QueueEstimate for the admitted request
+
+    Raises:
+        QueueFullException: If the backlog or estimated wait exceeds the limits
+    """
+    queue_estimate = estimate(db, lane, model, duration=duration)
+    max_wait = settings.ADMISSION_MAX_WAIT_SECONDS.get(lane, 0)
+
+    over_backlog = settings.ADMISSION_MAX_BACKLOG and queue_estimate.backlog >= settings.ADMISSION_MAX_BACKLOG
+    over_wait = max_wait and queue_estimate.wait_seconds > max_wait
+
+    if over_backlog or over_wait:
+        excess_seconds = queue_estimate.wait_seconds - max_wait if over_wait else queue_estimate.wait_seconds
+        retry_after = int(min(max(excess_seconds, settings.ADMISSION_MIN_RETRY_AFTER_SECONDS), 3600))
+        metrics.incr("video_admission_rejected_total", lane=lane, reason="backlog" if over_backlog else "wait")
+        logger.warning(
+            f"🚦 [Admission] Rejected {lane} request: position {queue_estimate.position}, "
+            f"backlog {queue_estimate.backlog}, estimated wait {int(queue_estimate.wait_seconds)}s"
+        )
+        raise QueueFullException(
+            f"Video generation is at capacity (estimated wait {int(queue_estimate.wait_seconds // 60)} min). "
+            f"Please try again in {retry_after} seconds.",
+            retry_after=retry_after,
+        )
+
+    metrics.incr("video_admission_admitted_total", lane=lane)
+    return queue_estimate
+
+
+def annotate_queue_position(db: Session, video: Video) -> Video:
+    """
+    Set the transient queue_position of a PENDING video (for VideoResponse)
+
+    The stored estimated_start_at / estimated_finish_at are refreshed too.
+    """
+    if video.status != VideoStatus.PENDING or not video.queued_at:
+        return video
+
+    try:
+        model = video.model.value if hasattr(video.model, "value") else video.model
+        queue_estimate = estimate(db, queue_lanes.normalize_lane(video.queue_lane), model, video.queued_at, video.duration)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not estimate queue position of video {video.id}: {e}")
+        return video
+
+    video.queue_position = queue_estimate.position
+    video.estimated_start_at = queue_estimate.start_at
+    video.estimated_finish_at = queue_estimate.finish_at
+    return video
@@ -0,0 +1,306 @@
+"""
+Catalog bulk jobs: a manifest of products turned into scripts and videos
+
+POST /api/v1/bulk-jobs takes a manifest (JSON body, or a CSV/JSON/NDJSON
+file) with one row per product: an image URL or an already uploaded image,
+plus an optional description, duration, model and language. Every row
+becomes a BulkJobItem that goes through the same steps a shop does by hand
+with /ai/generate-script and /videos/generate-simple:
+
+    queued -> ingest (read, validate, resize and store the image)
+           -> script (GPT-4o script, charged like /ai/generate-script)
+           -> video  (video created and queued for Sora)
+           -> rendering -> done | failed
+
+The item's state lives in the bulk_job_items table, so the pipeline
+(app.tasks.bulk_jobs) can resume every item from its recorded stage after a
+crash. At most max_concurrency items of a job are between ingest and
+rendering at once; the rest wait in queued.
+
+Subscription and total credits are checked for the whole manifest before
+the job is created. Results are read back as an NDJSON report, one line
+per item (GET /bulk-jobs/{id}/report).
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import InsufficientCreditsException, NotFoundException, ValidationException
+from app.models.bulk_job import BulkItemStage, BulkJob, BulkJobItem, BulkJobStatus
+from app.models.uploaded_image import UploadedImage
+from app.models.user import User
+from app.models.video import Video
+from app.schemas.bulk_job import BulkJobCreateRequest, BulkJobItemSpec
+from app.services import video_service
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STAGES = (BulkItemStage.DONE, BulkItemStage.FAILED)
+
+# Manifest columns (CSV header / JSON keys)
+MANIFEST_FIELDS = ("sku", "image_url", "uploaded_image_id", "description", "duration", "model", "language")
+
+
+def _manifest_row(row: Dict, number: int) -> BulkJobItemSpec:
+    """Validate one manifest row (number is 1-based, for error messages)"""
+    values = {}
+    for field in MANIFEST_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        values[field] = value
+    try:
+        return BulkJobItemSpec(**values)
+    except ValidationError as e:
+        problems = "; ".join(error["msg"] for error in e.errors())
+        raise ValidationException(f"Manifest row {number}: {problems}")
+
+
+def parse_manifest(content: bytes, filename: Optional[str]) -> List[BulkJobItemSpec]:
+    """
+    Parse a manifest file into item specs
+
+    CSV files need a header row with any of MANIFEST_FIELDS; JSON files hold
+    a list of rows (or {"items": [...]}); .ndjson/.jsonl files one row per line.
+
+    Raises:
+        ValidationException: If the file can't be parsed or a row is invalid
+    """
+    name = (filename or "").lower()
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValidationException("Manifest must be UTF-8 encoded")
+
+    try:
+        if name.endswith((".ndjson", ".jsonl")):
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        elif name.endswith(".json"):
+            data = json.loads(text)
+            rows = data.get("items", []) if isinstance(data, dict) else data
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+    except (ValueError, csv.Error) as e:
+        raise ValidationException(f"Could not parse manifest: {e}")
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValidationException("Manifest rows must be objects")
+
+    return [_manifest_row(row, number) for number, row in enumerate(rows, start=1)]
+
+
+def item_settings(item: BulkJobItem, job: BulkJob) -> Tuple[int, str, str]:
+    """(duration, model, language) of an item, falling back to the job's defaults"""
+    return item.duration or job.duration, item.model or job.model, item.language or job.language
+
+
+def estimate_credits(request: BulkJobCreateRequest) -> float:
+    """Credits of a manifest if every item gets a script and a video"""
+    return sum(
+        settings.SCRIPT_GENERATION_COST
+        + video_service.get_credits_cost(spec.model or request.model, spec.duration or request.duration)
+        for spec in request.items
+    )
+
+
+def create_bulk_job(db: Session, user: User, request: BulkJobCreateRequest) -> Tuple[BulkJob, float]:
+    """
+    Create a bulk job with one queued item per manifest row
+
+    Args:
+        db: Database session
+        user: User submitting the manifest
+        request: Manifest and job defaults
+
+    Returns:
+        (job, estimated credits)
+
+    Raises:
+        ValidationException: Too many items, or an uploaded image that isn't the user's
+        SubscriptionRequiredException / SubscriptionExpiredException: If any
+            item needs a subscription the user doesn't have
+        InsufficientCreditsException: If the manifest costs more than the balance
+    """
+    if len(request.items) > settings.BULK_JOB_MAX_ITEMS:
+        raise ValidationException(f"A bulk job takes at most {settings.BULK_JOB_MAX_ITEMS} items")
+
+    for model, duration in {(s.model or request.model, s.duration or request.duration) for s in request.items}:
+        video_service.check_subscription(user, model, duration)
+
+    estimated = estimate_credits(request)
+    if user.credits < estimated:
+        raise InsufficientCreditsException(
+            f"Insufficient credits. Required: {estimated} for {len(request.items)} items, "
+            f"Available: {user.credits}"
+        )
+
+    # Uploaded images must be the user's own; their URL is the item's source
+    image_ids = {s.uploaded_image_id for s in request.items if s.uploaded_image_id}
+    image_urls = {}
+    if image_ids:
+        image_urls = dict(
+            db.query(UploadedImage.id, UploadedImage.file_url)
+            .filter(UploadedImage.id.in_(image_ids), UploadedImage.user_id == user.id)
+            .all()
+        )
+        missing = image_ids - set(image_urls)
+        if missing:
+            raise ValidationException(f"Uploaded images not found: {sorted(missing)}")
+
+    concurrency = request.max_concurrency or settings.BULK_JOB_DEFAULT_CONCURRENCY
+    job = BulkJob(
+        user_id=user.id,
+        name=request.name,
+        status=BulkJobStatus.RUNNING,
+        total_items=len(request.items),
+        max_concurrency=min(concurrency, settings.BULK_JOB_MAX_CONCURRENCY),
+        duration=request.duration,
+        model=request.model,
+        language=request.language,
+    )
+    db.add(job)
+    db.flush()
+
+    db.add_all([
+        BulkJobItem(
+            bulk_job_id=job.id,
+            position=position,
+            sku=spec.sku,
+            image_url=image_urls.get(spec.uploaded_image_id) or spec.image_url,
+            source_image_id=spec.uploaded_image_id,
+            description=spec.description,
+            duration=spec.duration,
+            model=spec.model,
+            language=spec.language,
+            stage=BulkItemStage.QUEUED,
+        )
+        for position, spec in enumerate(request.items)
+    ])
+    db.commit()
+    db.refresh(job)
+
+    metrics.incr("bulk_jobs_created_total")
+    metrics.incr("bulk_job_items_total", job.total_items)
+    logger.info(f"📦 [Bulk] Job {job.id}: {job.total_items} items for user {user.id}, ~{estimated} credits")
+    return job, estimated
+
+
+def get_bulk_job(db: Session, job_id: int, user_id: int) -> BulkJob:
+    """
+    Bulk job of a user
+
+    Raises:
+        NotFoundException: If the job doesn't exist or belongs to another user
+    """
+    job = db.query(BulkJob).filter(BulkJob.id == job_id, BulkJob.user_id == user_id).first()
+    if not job:
+        raise NotFoundException(f"Bulk job {job_id} not found")
+    return job
+
+
+def get_user_bulk_jobs(db: Session, user_id: int, skip: int = 0, limit: int = 20) -> Tuple[List[BulkJob], int]:
+    """Bulk jobs of a user, newest first, with the total count"""
+    query = db.query(BulkJob).filter(BulkJob.user_id == user_id)
+    return query.order_by(desc(BulkJob.created_at)).offset(skip).limit(limit).all(), query.count()
+
+
+def stage_counts(db: Session, job: BulkJob) -> Dict[BulkItemStage, int]:
+    """Items per stage (every stage present)"""
+    counts = {stage: 0 for stage in BulkItemStage}
+    rows = (
+        db.query(BulkJobItem.stage, func.count(BulkJobItem.id))
+        .filter(BulkJobItem.bulk_job_id == job.id)
+        .group_by(BulkJobItem.stage)
+        .all()
+    )
+    for stage, count in rows:
+        counts[stage] = count
+    return counts
+
+
+def job_summary(db: Session, job: BulkJob, estimated_credits: Optional[float] = None) -> Dict:
+    """Progress of a job (BulkJobResponse fields)"""
+    counts = stage_counts(db, job)
+    finished = sum(counts[stage] for stage in TERMINAL_STAGES)
+    return {
+        "id": job.id,
+        "name": job.name,
+        "status": job.status,
+        "total_items": job.total_items,
+        "max_concurrency": job.max_concurrency,
+        "duration": job.duration,
+        "model": job.model,
+        "language": job.language,
+        "progress": round(100 * finished / job.total_items) if job.total_items else 100,
+        "stages": counts,
+        "estimated_credits": estimated_credits,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def item_report(item: BulkJobItem, job: BulkJob, video: Optional[Video] = None) -> Dict:
+    """One NDJSON report line for an item"""
+    duration, model, language = item_settings(item, job)
+    script = item.generated_script
+    return {
+        "position": item.position,
+        "sku": item.sku,
+        "stage": item.stage.value,
+        "image_url": item.stored_image_url or item.image_url,
+        "duration": duration,
+        "model": model,
+        "language": language,
+        "generated_script_id": item.generated_script_id,
+        "script": script.script if script else None,
+        "video_id": item.video_id,
+        "video_status": video.status.value if video else None,
+        "video_url": video.video_url if video else None,
+        "poster_url": video.poster_url if video else None,
+        "error": item.error_message if item.stage == BulkItemStage.FAILED else None,
+        "finished_at": _isoformat(item.finished_at),
+    }
+
+
+def report_items(db: Session, job: BulkJob, positions: Optional[Iterable[int]] = None) -> List[Dict]:
+    """
+    Report lines of a job's items, in manifest order
+
+    Args:
+        positions: Only these items (default: all)
+    """
+    query = db.query(BulkJobItem).filter(BulkJobItem.bulk_job_id == job.id)
+    if positions is not None:
+        query = query.filter(BulkJobItem.position.in_(list(positions)))
+    items = query.order_by(BulkJobItem.position).all()
+
+    video_ids = [item.video_id for item in items if item.video_id]
+    videos = {}
+    if video_ids:
+        videos = {video.id: video for video in db.query(Video).filter(Video.id.in_(video_ids)).all()}
+
+    return [item_report(item, job, videos.get(item.video_id)) for item in items]
+
+
+def finished_positions(db: Session, job: BulkJob) -> List[int]:
+    """Positions of the job's items that are done or failed"""
+    return [
+        position
+        for (position,) in db.query(BulkJobItem.position)
+        .filter(BulkJobItem.bulk_job_id == job.id, BulkJobItem.stage.in_(TERMINAL_STAGES))
+        .all()
+    ]
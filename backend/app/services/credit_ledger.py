@@ -0,0 +1,254 @@
+"""
+Credit ledger: atomic balance changes with reservations for video generation
+
+Balances used to be updated read-modify-write in Python (user.credits -= cost
+on a loaded row, then commit). Two requests of the same user racing through
+that path both read the old balance and the later commit overwrites the
+earlier one - a lost update - and both can pass the "enough credits" check.
+
+Every balance change is now one conditional statement executed by the
+database, recorded as a credit_ledger row:
+
+    UPDATE users SET credits = credits - :cost
+    WHERE id = :user_id AND credits >= :cost
+    RETURNING credits
+
+Zero rows means insufficient credits; no lock is held between the check and
+the debit. Video credits follow the generation states:
+
+    create_video_generation_task  -> reserve  (RESERVED, balance debited)
+    video COMPLETED               -> capture  (CAPTURED)
+    video FAILED (error, timeout) -> release  (RELEASED, balance refunded)
+
+capture and release are conditional UPDATEs on the entry's status, so each
+reservation is settled exactly once even when several workers (or the
+reconciliation sweep in app.tasks.reaper) race on it. Scripts are charged
+and purchases granted as entries that are CAPTURED immediately.
+
+The ORM copy of the user's balance is refreshed from RETURNING without
+marking it dirty, so a later commit of the same session never writes a
+stale balance back.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.core.exceptions import InsufficientCreditsException
+from app.models.credit_ledger import CreditEntryStatus, CreditLedgerEntry
+from app.models.user import User
+from app.models.video import Video, VideoStatus
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _apply(db: Session, user_id: int, delta: float) -> Optional[float]:
+    """
+    Add delta to a balance in one statement (debits only if the balance covers them)
+
+    Returns:
+        New balance, or None if the debit was refused (or the user doesn't exist)
+    """
+    stmt = update(User).where(User.id == user_id)
+    if delta < 0:
+        stmt = stmt.where(User.credits >= -delta)
+    stmt = stmt.values(credits=User.credits + delta).returning(User.credits)
+    return db.execute(stmt, execution_options={"synchronize_session": False}).scalar()
+
+
+def _sync_balance(db: Session, user_id: int, balance: float, user: Optional[User] = None):
+    """Refresh the session's copy of the balance without marking it for write-back"""
+    user = user if user is not None else db.identity_map.get(identity_key(User, user_id))
+    if user is not None:
+        set_committed_value(user, "credits", balance)
+
+
+def _debit(db: Session, user: User, amount: float, reason: str, status: CreditEntryStatus,
+           video_id: Optional[int]) -> CreditLedgerEntry:
+    balance = _apply(db, user.id, -amount)
+    if balance is None:
+        metrics.incr("credit_debits_refused_total", reason=reason)
+        current = db.query(User.credits).filter(User.id == user.id).scalar()
+        raise InsufficientCreditsException(
+            f"Insufficient credits. Required: {amount}, Available: {current}"
+        )
+    _sync_balance(db, user.id, balance, user)
+
+    now = datetime.utcnow()
+    entry = CreditLedgerEntry(
+        user_id=user.id,
+        video_id=video_id,
+        amount=-amount,
+        reason=reason,
+        status=status,
+        balance_after=balance,
+        created_at=now,
+        settled_at=now if status == CreditEntryStatus.CAPTURED else None,
+    )
+    db.add(entry)
+    metrics.incr("credits_debited_total", amount, reason=reason)
+    return entry
+
+
+def reserve(db: Session, user: User, amount: float, video_id: Optional[int] = None,
+            reason: str = "video") -> CreditLedgerEntry:
+    """
+    Debit credits pending the outcome of a video (caller commits)
+
+    Args:
+        db: Database session
+        user: User paying
+        amount: Credits to reserve
+        video_id: Video the reservation pays for
+        reason: Ledger reason
+
+    Returns:
+        RESERVED ledger entry
+
+    Raises:
+        InsufficientCreditsException: If the balance doesn't cover the amount
+    """
+    return _debit(db, user, amount, reason, CreditEntryStatus.RESERVED, video_id)
+
+
+def charge(db: Session, user: User, amount: float, reason: str) -> CreditLedgerEntry:
+    """
+    Debit credits for work that is already done (caller commits)
+
+    Raises:
+        InsufficientCreditsException: If the balance doesn't cover the amount
+    """
+    return _debit(db, user, amount, reason, CreditEntryStatus.CAPTURED, None)
+
+
+def grant(db: Session, user: User, amount: float, reason: str) -> CreditLedgerEntry:
+    """Add credits (purchases, subscriptions, admin top-ups; caller commits)"""
+    balance = _apply(db, user.id, amount)
+    _sync_balance(db, user.id, balance, user)
+
+    now = datetime.utcnow()
+    entry = CreditLedgerEntry(
+        user_id=user.id,
+        amount=amount,
+        reason=reason,
+        status=CreditEntryStatus.CAPTURED,
+        balance_after=balance,
+        created_at=now,
+        settled_at=now,
+    )
+    db.add(entry)
+    metrics.incr("credits_granted_total", amount, reason=reason)
+    return entry
+
+
+def capture(db: Session, video_id: int) -> int:
+    """
+    Make a video's reservations final (video completed; caller commits)
+
+    Returns:
+        Number of reservations captured (0 if already settled)
+    """
+    captured = db.execute(
+        update(CreditLedgerEntry)
+        .where(CreditLedgerEntry.video_id == video_id, CreditLedgerEntry.status == CreditEntryStatus.RESERVED)
+        .values(status=CreditEntryStatus.CAPTURED, settled_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if captured:
+        metrics.incr("credit_reservations_settled_total", captured, outcome="captured")
+    return captured
+
+
+def release(db: Session, video_id: int) -> float:
+    """
+    Refund a video's open reservations (video failed or timed out; caller commits)
+
+    The status transition and the refund happen in the caller's transaction,
+    so a reservation is refunded at most once.
+
+    Returns:
+        Credits refunded (0 if already settled)
+    """
+    released = db.execute(
+        update(CreditLedgerEntry)
+        .where(CreditLedgerEntry.video_id == video_id, CreditLedgerEntry.status == CreditEntryStatus.RESERVED)
+        .values(status=CreditEntryStatus.RELEASED, settled_at=datetime.utcnow())
+        .returning(CreditLedgerEntry.user_id, CreditLedgerEntry.amount),
+        execution_options={"synchronize_session": False},
+    ).all()
+
+    refunded = 0.0
+    for user_id, amount in released:
+        balance = _apply(db, user_id, -amount)
+        if balance is not None:
+            _sync_balance(db, user_id, balance)
+        refunded += -amount
+
+    if released:
+        metrics.incr("credit_reservations_settled_total", len(released), outcome="released")
+        metrics.incr("credits_refunded_total", refunded)
+        logger.info(f"💸 [Credits] Refunded {refunded} credits for video {video_id}")
+    return refunded
+
+
+def was_refunded(db: Session, video_id: int) -> bool:
+    """Whether the video's latest reservation was released (videos from before the ledger: False)"""
+    status = (
+        db.query(CreditLedgerEntry.status)
+        .filter(CreditLedgerEntry.video_id == video_id)
+        .order_by(CreditLedgerEntry.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    return status == CreditEntryStatus.RELEASED
+
+
+def reconcile(db: Session, older_than_seconds: int, limit: int = 100) -> dict:
+    """
+    Settle reservations whose video finished without settling them
+
+    Covers crashes between a video's final status and its capture/release,
+    and videos deleted while generating (their reservation is captured).
+
+    Returns:
+        Dict with the video IDs captured and released
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+    rows = (
+        db.query(CreditLedgerEntry.id, CreditLedgerEntry.video_id, Video.status)
+        .outerjoin(Video, Video.id == CreditLedgerEntry.video_id)
+        .filter(
+            CreditLedgerEntry.status == CreditEntryStatus.RESERVED,
+            CreditLedgerEntry.created_at < cutoff,
+            or_(Video.id.is_(None), Video.status.in_((VideoStatus.COMPLETED, VideoStatus.FAILED))),
+        )
+        .order_by(CreditLedgerEntry.created_at)
+        .limit(limit)
+        .all()
+    )
+
+    captured: List[int] = []
+    released: List[int] = []
+    for entry_id, video_id, video_status in rows:
+        if video_id is None:
+            # Video deleted: the work may have been done, keep the charge
+            db.execute(
+                update(CreditLedgerEntry)
+                .where(CreditLedgerEntry.id == entry_id, CreditLedgerEntry.status == CreditEntryStatus.RESERVED)
+                .values(status=CreditEntryStatus.CAPTURED, settled_at=datetime.utcnow()),
+                execution_options={"synchronize_session": False},
+            )
+        elif video_status == VideoStatus.COMPLETED:
+            if capture(db, video_id):
+                captured.append(video_id)
+        elif video_status == VideoStatus.FAILED:
+            if release(db, video_id):
+                released.append(video_id)
+        db.commit()
+
+    return {"captured": captured, "released": released}
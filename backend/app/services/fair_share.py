@@ -0,0 +1,211 @@
+"""
+Per-user in-flight caps with fair-share release
+
+Without a cap one user can queue dozens of /videos/generate-simple calls and
+occupy every worker while everyone else waits. Each user may have at most
+USER_MAX_IN_FLIGHT[lane] videos in the pipeline; further videos stay PENDING
+in a per-user held list in Redis:
+
+    fairshare:active:{user}  ZSET  video IDs holding a slot, scored by expiry
+    fairshare:held:{user}    LIST  video IDs waiting for a slot (FIFO)
+    fairshare:ring           LIST  users with held videos, in round-robin order
+    fairshare:ring_members   SET   users currently in the ring
+    fairshare:caps           HASH  user -> cap (from the user's last admission)
+
+When a video finishes, a release pass walks the ring once and releases at
+most one held video per user that has a free slot, so a heavy user's backlog
+is interleaved with everyone else's instead of being flushed ahead of it.
+Slots expire after USER_SLOT_TTL_SECONDS as a safety net, and
+release_held_videos_task re-runs the pass periodically.
+
+Both scripts build per-user key names inside Lua, so all keys must live on
+one Redis node (no Redis Cluster). If Redis is unreachable admission fails
+open and videos are queued immediately.
+"""
+import logging
+from typing import List, Optional, Tuple
+
+import redis
+
+from app.core.clients import redis_control_client
+from app.core.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "fairshare:"
+
+# KEYS[1] ring, KEYS[2] ring members, KEYS[3] caps
+# ARGV: key prefix, user id, video id, cap, slot ttl
+# Returns 1 if the video may start now, 0 if it was held
+ADMIT_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local user, video = ARGV[2], ARGV[3]
+local cap, ttl = tonumber(ARGV[4]), tonumber(ARGV[5])
+local active = ARGV[1] .. 'active:' .. user
+local held = ARGV[1] .. 'held:' .. user
+
+redis.call('HSET', KEYS[3], user, cap)
+redis.call('ZREMRANGEBYSCORE', active, '-inf', now)
+
+if redis.call('ZSCORE', active, video) then
+    redis.call('ZADD', active, now + ttl, video)
+    return 1
+end
+
+if redis.call('LPOS', held, video) then
+    return 0
+end
+if redis.call('LLEN', held) == 0 and redis.call('ZCARD', active) < cap then
+    redis.call('ZADD', active, now + ttl, video)
+    return 1
+end
+
+redis.call('RPUSH', held, video)
+if redis.call('SADD', KEYS[2], user) == 1 then
+    redis.call('RPUSH', KEYS[1], user)
+end
+return 0
+"""
+
+# KEYS[1] ring, KEYS[2] ring members, KEYS[3] caps
+# ARGV: key prefix, slot ttl, finished user ('' for none), finished video
+# Returns a flat list {user, video, user, video, ...} of released videos
+RELEASE_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local ttl = tonumber(ARGV[2])
+
+if ARGV[3] ~= '' then
+    redis.call('ZREM', ARGV[1] .. 'active:' .. ARGV[3], ARGV[4])
+end
+
+local released = {}
+local users = redis.call('LLEN', KEYS[1])
+for i = 1, users do
+    local user = redis.call('LPOP', KEYS[1])
+    if not user then break end
+
+    local active = ARGV[1] .. 'active:' .. user
+    local held = ARGV[1] .. 'held:' .. user
+    redis.call('ZREMRANGEBYSCORE', active, '-inf', now)
+
+    local cap = tonumber(redis.call('HGET', KEYS[3], user)) or 1
+    if redis.call('ZCARD', active) < cap then
+        local video = redis.call('LPOP', held)
+        if video then
+            redis.call('ZADD', active, now + ttl, video)
+            table.insert(released, user)
+            table.insert(released, video)
+        end
+    end
+
+    if redis.call('LLEN', held) > 0 then
+        redis.call('RPUSH', KEYS[1], user)
+    else
+        redis.call('SREM', KEYS[2], user)
+    end
+end
+return released
+"""
+
+
+class FairShareScheduler:
+    """Per-user slot accounting and round-robin release of held videos"""
+
+    def __init__(self, key_prefix: str = KEY_PREFIX):
+        self.key_prefix = key_prefix
+        self._admit = None
+        self._release = None
+
+    def _client(self) -> redis.Redis:
+        client = redis_control_client.get()
+        if self._admit is None:
+            self._admit = client.register_script(ADMIT_SCRIPT)
+            self._release = client.register_script(RELEASE_SCRIPT)
+        return client
+
+    def _keys(self):
+        return [f"{self.key_prefix}ring", f"{self.key_prefix}ring_members", f"{self.key_prefix}caps"]
+
+    @staticmethod
+    def cap_for_lane(lane: Optional[str]) -> int:
+        """In-flight cap for a user in a lane (0 = no cap)"""
+        return settings.USER_MAX_IN_FLIGHT.get(lane or "", 0)
+
+    def admit(self, user_id: int, video_id: int, cap: int) -> bool:
+        """
+        Take a slot for a video, or hold it behind the user's earlier videos
+
+        Args:
+            user_id: Owner of the video
+            video_id: Video about to be queued
+            cap: Max videos of this user in flight (0 = no cap)
+
+        Returns:
+            True if the video may be queued now, False if it was held
+        """
+        if not settings.USER_FAIR_SHARE_ENABLED or cap <= 0:
+            return True
+
+        try:
+            client = self._client()
+            admitted = bool(self._admit(
+                client=client,
+                keys=self._keys(),
+                args=[self.key_prefix, user_id, video_id, cap, settings.USER_SLOT_TTL_SECONDS],
+            ))
+        except Exception as e:
+            logger.warning(f"⚠️  Fair-share admission unavailable, queueing video {video_id}: {e}")
+            return True
+
+        metrics.incr("video_fair_share_admissions_total", result="admitted" if admitted else "held")
+        return admitted
+
+    def release(self, user_id: Optional[int] = None, video_id: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Free a finished video's slot and run one round-robin release pass
+
+        Args:
+            user_id: Owner of the finished video (None for a plain pass)
+            video_id: Finished video
+
+        Returns:
+            (user_id, video_id) pairs released from the held lists
+        """
+        if not settings.USER_FAIR_SHARE_ENABLED:
+            return []
+
+        try:
+            client = self._client()
+            flat = self._release(
+                client=client,
+                keys=self._keys(),
+                args=[
+                    self.key_prefix,
+                    settings.USER_SLOT_TTL_SECONDS,
+                    "" if user_id is None else user_id,
+                    "" if video_id is None else video_id,
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Fair-share release failed: {e}")
+            return []
+
+        return [(int(flat[i]), int(flat[i + 1])) for i in range(0, len(flat), 2)]
+
+    def held_count(self, user_id: int) -> int:
+        """Number of the user's videos waiting for a slot"""
+        try:
+            return self._client().llen(f"{self.key_prefix}held:{user_id}")
+        except Exception:
+            return 0
+
+
+# Global fair-share scheduler instance
+fair_share = FairShareScheduler()
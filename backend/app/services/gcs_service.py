@@ -1,31 +1,110 @@
 """
 Google Cloud Storage Service
 Handles file upload, deletion, and URL generation for GCS
+
+The GCS client is created on first use, and google-cloud-storage and FastAPI
+are imported only then (or when an HTTP error is raised), so importing this
+module is cheap for Celery workers.
 """
 import os
 import uuid
 import json
 import logging
-from typing import Optional, Tuple
-from io import BytesIO
-
-from google.cloud import storage
-from google.oauth2 import service_account
-from fastapi import UploadFile, HTTPException, status
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+from io import BytesIO, UnsupportedOperation
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from fastapi import UploadFile
+    from google.cloud import storage
+
 logger = logging.getLogger(__name__)
 
 
+def _storage_error(detail: str) -> Exception:
+    """HTTP 500 for the API (FastAPI is only imported when one is raised)"""
+    from fastapi import HTTPException, status
+    return HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail)
+
+
+class ChunkStreamReader:
+    """
+    Read-only file object over an iterator of byte chunks
+
+    Lets a resumable upload pull data straight from a download stream.
+    read(n) always returns n bytes until the source is exhausted (a short
+    read marks the final chunk of a resumable upload), and only the most
+    recently read block is kept so the upload can seek back and resend it
+    after a recoverable error.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = b""  # Fetched from the source but not returned yet
+        self._last = b""  # Last block returned by read()
+        self._last_start = 0
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence != 0 or not (self._last_start <= offset <= self._position):
+            raise UnsupportedOperation("Can only seek back within the last read block")
+
+        replay = self._last[offset - self._last_start:self._position - self._last_start]
+        self._pending = replay + self._pending
+        self._position = offset
+        return offset
+
+    def read(self, size: int = -1) -> bytes:
+        parts = [self._pending]
+        available = len(self._pending)
+
+        while size < 0 or available < size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                break
+            parts.append(chunk)
+            available += len(chunk)
+
+        data = b"".join(parts)
+        if size >= 0:
+            data, self._pending = data[:size], data[size:]
+        else:
+            self._pending = b""
+
+        self._last, self._last_start = data, self._position
+        self._position += len(data)
+        return data
+
+
 class GCSService:
     """Google Cloud Storage service for file operations"""
 
     def __init__(self):
-        """Initialize GCS client with credentials"""
-        self.client: Optional[storage.Client] = None
-        self.bucket: Optional[storage.Bucket] = None
-        self._initialize_client()
+        """GCS service; the client is created with credentials on first use"""
+        self._client: Optional["storage.Client"] = None
+        self._bucket: Optional["storage.Bucket"] = None
+
+    @property
+    def client(self) -> "storage.Client":
+        """GCS client, initialized on first access"""
+        if self._client is None:
+            self._initialize_client()
+        return self._client
+
+    @property
+    def bucket(self) -> "storage.Bucket":
+        """Configured bucket, initialized on first access"""
+        if self._bucket is None:
+            self._initialize_client()
+        return self._bucket
 
     def _initialize_client(self):
         """
@@ -37,6 +116,9 @@ class GCSService:
 
         Note: GCS is now the only storage method (USE_GCS_STORAGE switch removed)
         """
+        from google.cloud import storage
+        from google.oauth2 import service_account
+
         try:
             credentials = None
 
@@ -57,17 +139,17 @@ class GCSService:
 
             # Create client
             if credentials:
-                self.client = storage.Client(
+                client = storage.Client(
                     project=settings.GOOGLE_CLOUD_PROJECT,
                     credentials=credentials
                 )
             else:
                 # Fallback to Application Default Credentials (适合 GCP 环境内部署)
                 logger.info("  🔑 Using Application Default Credentials")
-                self.client = storage.Client(project=settings.GOOGLE_CLOUD_PROJECT)
+                client = storage.Client(project=settings.GOOGLE_CLOUD_PROJECT)
 
             # Get bucket
-            self.bucket = self.client.bucket(settings.GOOGLE_CLOUD_BUCKET)
+            self._client, self._bucket = client, client.bucket(settings.GOOGLE_CLOUD_BUCKET)
             logger.info(f"  ✅ GCS client initialized successfully (bucket: {settings.GOOGLE_CLOUD_BUCKET})")
 
         except Exception as e:
@@ -109,7 +191,7 @@ class GCSService:
 
     def upload_file(
         self,
-        file: UploadFile,
+        file: "UploadFile",
         user_id: int,
         file_type: str = "image",
         content_type: Optional[str] = None
@@ -130,10 +212,7 @@ class GCSService:
             HTTPException: If upload fails
         """
         if not self.client or not self.bucket:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="GCS client not initialized. Please check GCS configuration."
-            )
+            raise _storage_error("GCS client not initialized. Please check GCS configuration.")
 
         try:
             # Read file content
@@ -175,10 +254,162 @@ class GCSService:
 
         except Exception as e:
             logger.error(f"  ❌ Failed to upload file to GCS: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload file to GCS: {str(e)}"
+            raise _storage_error(f"Failed to upload file to GCS: {str(e)}")
+
+    def _new_upload_blob(self, blob_name: str):
+        """Blob configured for chunked resumable uploads"""
+        return self.bucket.blob(blob_name, chunk_size=settings.GCS_UPLOAD_CHUNK_SIZE)
+
+    def upload_stream(
+        self,
+        chunks: Iterable[bytes],
+        user_id: int,
+        filename: str,
+        file_type: str = "video",
+        content_type: str = "video/mp4",
+    ) -> Tuple[str, str, int]:
+        """
+        Stream data into a GCS resumable upload session
+
+        Memory use is bounded by GCS_UPLOAD_CHUNK_SIZE regardless of the file
+        size. The upload is verified end-to-end with CRC32C: on a mismatch
+        the object is deleted and DataCorruption is raised.
+
+        Args:
+            chunks: Iterable of byte chunks (e.g. a download's iter_bytes())
+            user_id: User ID
+            filename: Original filename (used for the extension)
+            file_type: File type (image, video, etc.)
+            content_type: Content type of the object
+
+        Returns:
+            Tuple of (blob_name, public_url, file_size)
+
+        Raises:
+            HTTPException: If GCS is not configured
+            Exception: Errors from the source iterator or the upload are re-raised
+        """
+        if not self.client or not self.bucket:
+            raise _storage_error("GCS client not initialized. Please check GCS configuration.")
+
+        blob_name = self._generate_blob_name(user_id, filename, file_type)
+        blob = self._new_upload_blob(blob_name)
+        stream = ChunkStreamReader(chunks)
+
+        try:
+            # size=None forces a resumable upload; if_generation_match=0 makes
+            # the create-only upload idempotent, so chunk requests are retried
+            blob.upload_from_file(
+                stream,
+                content_type=content_type,
+                checksum="crc32c",
+                if_generation_match=0,
+                timeout=60,
             )
+        except Exception as e:
+            logger.error(f"  ❌ Failed to stream upload to GCS ({blob_name}): {e}")
+            raise
+
+        file_size = stream.tell()
+        logger.info(f"  ✅ File streamed to GCS: {blob_name} ({file_size} bytes)")
+        return blob_name, self._get_public_url(blob_name), file_size
+
+    def upload_local_file(
+        self,
+        file_path: str,
+        user_id: int,
+        file_type: str = "video",
+        content_type: str = "video/mp4",
+    ) -> Tuple[str, str, int]:
+        """
+        Upload a file from local disk without reading it into memory
+
+        Args:
+            file_path: Local file path
+            user_id: User ID
+            file_type: File type (image, video, etc.)
+            content_type: Content type of the object
+
+        Returns:
+            Tuple of (blob_name, public_url, file_size)
+        """
+        blob_name = self._generate_blob_name(user_id, os.path.basename(file_path), file_type)
+        public_url = self.upload_local_file_as(file_path, blob_name, content_type)
+        return blob_name, public_url, os.path.getsize(file_path)
+
+    def upload_local_file_as(
+        self,
+        file_path: str,
+        blob_name: str,
+        content_type: str,
+        cache_control: Optional[str] = None,
+    ) -> str:
+        """
+        Upload a local file to a fixed blob name (CRC32C-verified, create-only)
+
+        Args:
+            file_path: Local file path
+            blob_name: Destination blob name (path in GCS)
+            content_type: Content type of the object
+            cache_control: Optional Cache-Control header
+
+        Returns:
+            Public URL
+        """
+        if not self.client or not self.bucket:
+            raise _storage_error("GCS client not initialized. Please check GCS configuration.")
+
+        blob = self._new_upload_blob(blob_name)
+        if cache_control:
+            blob.cache_control = cache_control
+
+        try:
+            blob.upload_from_filename(
+                file_path,
+                content_type=content_type,
+                checksum="crc32c",
+                if_generation_match=0,
+                timeout=60,
+            )
+        except Exception as e:
+            logger.error(f"  ❌ Failed to upload {file_path} to GCS: {e}")
+            raise
+
+        logger.info(f"  ✅ File uploaded to GCS: {blob_name} ({os.path.getsize(file_path)} bytes)")
+        return self._get_public_url(blob_name)
+
+    def upload_directory(
+        self,
+        local_dir: str,
+        blob_prefix: str,
+        content_types: Dict[str, str],
+        cache_control: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """
+        Upload every file below a local directory, keeping relative paths
+
+        Args:
+            local_dir: Local directory
+            blob_prefix: Blob name prefix (e.g., "video4ads/users/1/videos/abc/hls")
+            content_types: Content type by file extension (e.g., {".m3u8": ...})
+            cache_control: Optional Cache-Control header for every object
+
+        Returns:
+            Dict of relative path to public URL
+        """
+        urls = {}
+        for root, _, files in os.walk(local_dir):
+            for filename in sorted(files):
+                file_path = os.path.join(root, filename)
+                relative_path = os.path.relpath(file_path, local_dir).replace(os.sep, "/")
+                content_type = content_types.get(os.path.splitext(filename)[1], "application/octet-stream")
+                urls[relative_path] = self.upload_local_file_as(
+                    file_path,
+                    f"{blob_prefix.rstrip('/')}/{relative_path}",
+                    content_type,
+                    cache_control=cache_control,
+                )
+        return urls
 
     def delete_file(self, blob_name: str) -> bool:
         """
@@ -252,10 +483,7 @@ class GCSService:
             Signed URL
         """
         if not self.client or not self.bucket:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="GCS client not initialized"
-            )
+            raise _storage_error("GCS client not initialized")
 
         try:
             from datetime import timedelta
@@ -270,10 +498,7 @@ class GCSService:
 
         except Exception as e:
             logger.error(f"  ❌ Failed to generate signed URL: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to generate signed URL: {str(e)}"
-            )
+            raise _storage_error(f"Failed to generate signed URL: {str(e)}")
 
 
 # Global GCS service instance
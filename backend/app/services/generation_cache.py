@@ -0,0 +1,141 @@
+"""
+Generation result cache
+
+Identical requests - same reference image bytes, prompt, duration and
+model - produce interchangeable videos, so a second render is wasted money.
+Every new Video stores a cache key:
+
+    sha256(sha256(image bytes) | normalized prompt | duration | model)
+
+and a later request with the same key is linked to the completed Video's
+GCS objects immediately instead of going to Sora. Policy (scope, TTL,
+whether hits are charged) lives in the GENERATION_CACHE_* settings.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.uploaded_image import UploadedImage
+from app.models.video import Video, VideoStatus
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Copied from the cached video onto the new row on a hit
+CACHED_VIDEO_FIELDS = (
+    "video_url",
+    "poster_url",
+    "hls_url",
+    "preview_url",
+    "duration",
+    "resolution",
+    "bitrate",
+)
+
+
+def content_hash(data: bytes) -> str:
+    """sha256 hex digest of raw bytes (stored as UploadedImage.content_hash)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Unicode-normalize and collapse whitespace so cosmetic edits still hit"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", prompt or "")).strip()
+
+
+def image_content_hash(db: Session, image_url: Optional[str]) -> Optional[str]:
+    """
+    Content hash of a reference image
+
+    Only uploaded images qualify: their hash was recorded at upload time and
+    is found through the indexed file_url. Any other URL skips the cache
+    rather than downloading the image on the request path.
+
+    Returns:
+        sha256 hex digest, or None if the image has no recorded hash
+    """
+    if not image_url:
+        return None
+
+    uploaded = (
+        db.query(UploadedImage.content_hash)
+        .filter(UploadedImage.file_url == image_url, UploadedImage.content_hash.isnot(None))
+        .first()
+    )
+    return uploaded.content_hash if uploaded else None
+
+
+def compute_cache_key(image_hash: str, prompt: str, duration: int, model: str) -> str:
+    """
+    Cache key of a generation request
+
+    Args:
+        image_hash: sha256 of the reference image bytes
+        prompt: Sora prompt (normalized here)
+        duration: Duration in seconds
+        model: Model ID (e.g., "sora-2")
+
+    Returns:
+        sha256 hex digest
+    """
+    material = "|".join([image_hash, normalize_prompt(prompt), str(duration), str(model)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _candidates(db: Session, cache_key: str, user_id: int):
+    query = db.query(Video).filter(
+        Video.cache_key == cache_key,
+        Video.created_at >= datetime.utcnow() - timedelta(seconds=settings.GENERATION_CACHE_TTL_SECONDS),
+    )
+    if settings.GENERATION_CACHE_SCOPE == "user":
+        query = query.filter(Video.user_id == user_id)
+    return query
+
+
+def find_cached_video(db: Session, cache_key: str, user_id: int) -> Optional[Video]:
+    """Most recent completed video with this cache key (within TTL and scope)"""
+    return (
+        _candidates(db, cache_key, user_id)
+        .filter(Video.status == VideoStatus.COMPLETED, Video.video_url.isnot(None))
+        .order_by(Video.created_at.desc())
+        .first()
+    )
+
+
+def find_inflight_video(db: Session, cache_key: str, user_id: int) -> Optional[Video]:
+    """
+    The user's own pending/processing video with this cache key
+
+    A double-click or client retry then returns the existing generation
+    instead of creating (and charging for) a second one.
+    """
+    return (
+        db.query(Video)
+        .filter(
+            Video.cache_key == cache_key,
+            Video.user_id == user_id,
+            Video.status.in_([VideoStatus.PENDING, VideoStatus.PROCESSING]),
+            Video.created_at >= datetime.utcnow() - timedelta(seconds=settings.GENERATION_CACHE_TTL_SECONDS),
+        )
+        .order_by(Video.created_at.desc())
+        .first()
+    )
+
+
+def record_lookup(result: str):
+    """Count a cache lookup outcome ("hit", "inflight" or "miss")"""
+    metrics.incr("generation_cache_lookups_total", result=result)
+
+
+def link_cached_result(video: Video, cached: Video):
+    """Point a new Video at a completed video's GCS objects and metadata"""
+    for field in CACHED_VIDEO_FIELDS:
+        setattr(video, field, getattr(cached, field))
+    video.cache_source_video_id = cached.cache_source_video_id or cached.id
+    video.status = VideoStatus.COMPLETED
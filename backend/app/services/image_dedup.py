@@ -0,0 +1,149 @@
+"""
+Near-duplicate reference image index
+
+Users re-upload the same product photo after cropping, re-compressing or
+re-exporting it, which the exact content_hash never matches. Every
+UploadedImage stores a 64-bit dHash (phash column); lookups go through a
+per-user BK-tree so finding the images within IMAGE_DEDUP_MAX_DISTANCE bits
+does not scan all of a user's uploads.
+
+Trees are built lazily per process from the database and then topped up
+incrementally (rows with a higher id than the last one loaded), so uploads
+handled by other workers are picked up on the next lookup. Candidates are
+re-read from the database, so deleted images simply drop out.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.generated_script import GeneratedScript
+from app.models.uploaded_image import UploadedImage
+from app.utils import metrics
+from app.utils.perceptual_hash import BKTree, dhash_hex
+
+logger = logging.getLogger(__name__)
+
+
+def image_phash(content: bytes) -> Optional[str]:
+    """dHash hex of image bytes, or None if the image can't be decoded"""
+    try:
+        return dhash_hex(content)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not compute perceptual hash: {e}")
+        return None
+
+
+class ImageDedupIndex:
+    """Per-user BK-trees over UploadedImage.phash"""
+
+    def __init__(self, max_users: int):
+        self._max_users = max_users
+        self._trees: "OrderedDict[int, tuple[BKTree, int]]" = OrderedDict()  # user_id -> (tree, last id)
+        self._lock = threading.Lock()
+
+    def _tree_for(self, db: Session, user_id: int) -> BKTree:
+        with self._lock:
+            tree, last_id = self._trees.pop(user_id, (BKTree(), 0))
+
+            rows = (
+                db.query(UploadedImage.id, UploadedImage.phash)
+                .filter(
+                    UploadedImage.user_id == user_id,
+                    UploadedImage.id > last_id,
+                    UploadedImage.phash.isnot(None),
+                )
+                .order_by(UploadedImage.id)
+                .all()
+            )
+            for row in rows:
+                tree.add(int(row.phash, 16), row.id)
+                last_id = row.id
+
+            self._trees[user_id] = (tree, last_id)
+            while len(self._trees) > self._max_users:
+                self._trees.popitem(last=False)
+            return tree
+
+    def find_near_duplicates(self, db: Session, user_id: int, phash: Optional[str]) -> List[UploadedImage]:
+        """
+        The user's images within IMAGE_DEDUP_MAX_DISTANCE of a hash
+
+        Args:
+            db: Database session
+            user_id: Owner of the images
+            phash: dHash hex of the new image
+
+        Returns:
+            Matching images, closest (then newest) first
+        """
+        if not phash or not settings.IMAGE_DEDUP_ENABLED:
+            return []
+
+        matches = self._tree_for(db, user_id).search(int(phash, 16), settings.IMAGE_DEDUP_MAX_DISTANCE)
+        if not matches:
+            return []
+
+        rank = {image_id: (distance, -image_id) for distance, image_id in matches}
+        images = db.query(UploadedImage).filter(
+            UploadedImage.id.in_(rank.keys()),
+            UploadedImage.user_id == user_id,
+        ).all()
+        return sorted(images, key=lambda image: rank[image.id])
+
+    def invalidate(self, user_id: int):
+        """Drop a user's tree (e.g., after deleting images)"""
+        with self._lock:
+            self._trees.pop(user_id, None)
+
+
+def find_reusable_script(
+    db: Session,
+    images: List[UploadedImage],
+    duration: int,
+    language: str,
+    model: str,
+    user_description: Optional[str],
+) -> Optional[GeneratedScript]:
+    """
+    Most recent script generated for one of the given images with the same parameters
+
+    Args:
+        db: Database session
+        images: Near-duplicate images (from find_near_duplicates)
+        duration: Target video duration
+        language: Script language
+        model: Target video model
+        user_description: User's product description
+
+    Returns:
+        GeneratedScript or None
+    """
+    if not images:
+        return None
+
+    query = db.query(GeneratedScript).filter(
+        GeneratedScript.uploaded_image_id.in_([image.id for image in images]),
+        GeneratedScript.target_duration == duration,
+        GeneratedScript.language == language,
+        GeneratedScript.target_model == model,
+    )
+    description = (user_description or "").strip()
+    if description:
+        query = query.filter(GeneratedScript.user_description == description)
+    else:
+        query = query.filter((GeneratedScript.user_description.is_(None)) | (GeneratedScript.user_description == ""))
+
+    return query.order_by(GeneratedScript.created_at.desc()).first()
+
+
+def record_lookup(kind: str, result: str):
+    """Count a near-duplicate lookup ("upload"/"script", "hit"/"miss")"""
+    metrics.incr("image_dedup_lookups_total", kind=kind, result=result)
+
+
+# Global near-duplicate index instance
+image_dedup_index = ImageDedupIndex(max_users=settings.IMAGE_DEDUP_INDEX_MAX_USERS)
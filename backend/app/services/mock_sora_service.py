@@ -5,10 +5,11 @@ This service simulates the behavior of OpenAI's Sora 2 API without
 requiring a real API key. It's used for testing the complete workflow.
 """
 import asyncio
+import time
 import uuid
 import shutil
 import os
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional
 from pathlib import Path
 
 from app.core.config import settings
@@ -17,13 +18,115 @@ from app.core.config import settings
 class MockSoraVideoGenerator:
     """Mock OpenAI Sora 2 Image-to-Video Generator for Testing"""
 
+    # Sample video locations searched (in order) when simulating downloads
+    SAMPLE_VIDEO_LOCATIONS = [
+        "public/sample-video.mp4",
+        "../public/sample-video.mp4",
+        "uploads/sample-video.mp4",
+    ]
+
     def __init__(self):
         """Initialize Mock Sora service"""
         self.model = "sora-2-image-to-video"
         self.duration = 8  # 8 seconds
         self.resolution = "1280x720"  # Landscape format
+        self.processing_seconds = 8  # Simulated render time for staged pipeline
         print("⚠️  MOCK SORA SERVICE INITIALIZED - FOR TESTING ONLY")
 
+    def submit_generation(
+        self,
+        prompt: str,
+        image_url: str,
+        duration: int = 8,
+        model: Optional[str] = None,
+    ) -> Dict:
+        """
+        Mock job submission for the staged Celery pipeline
+
+        The submission timestamp is encoded into the job ID so any worker
+        process can answer status checks without shared state.
+
+        Returns:
+            Dictionary containing job_id, status and resolution
+        """
+        job_id = f"mock_job_{uuid.uuid4().hex[:8]}_{int(time.time())}"
+        print(f"🚀 [MOCK] Video generation job submitted: {job_id}")
+        print(f"   Prompt: {prompt[:100]}...")
+        print(f"   Image URL: {image_url}")
+        print(f"   Duration: {duration}s")
+
+        return {
+            "job_id": job_id,
+            "status": "queued",
+            "resolution": self.resolution,
+        }
+
+    def check_generation_status(self, job_id: str) -> Dict:
+        """
+        Mock status check - completes `processing_seconds` after submission
+
+        Returns:
+            Dictionary containing status, job_id and progress
+        """
+        try:
+            submitted_at = int(job_id.rsplit("_", 1)[-1])
+        except ValueError:
+            return {
+                "status": "failed",
+                "job_id": job_id,
+                "error_message": f"Unknown mock job: {job_id}",
+            }
+
+        elapsed = time.time() - submitted_at
+        if elapsed >= self.processing_seconds:
+            return {"status": "completed", "job_id": job_id, "progress": 100}
+
+        return {
+            "status": "in_progress",
+            "job_id": job_id,
+            "progress": int(elapsed / self.processing_seconds * 100),
+        }
+
+    def download_generated_video(self, job_id: str, output_filename: str) -> str:
+        """
+        Mock download - copies a sample video (or writes a placeholder)
+
+        Returns:
+            Local file path
+        """
+        output_dir = Path(settings.VIDEO_OUTPUT_DIR)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / output_filename
+
+        for sample_location in self.SAMPLE_VIDEO_LOCATIONS:
+            sample_video_path = Path(sample_location)
+            if sample_video_path.exists():
+                print(f"   [MOCK] Found sample video: {sample_location}")
+                shutil.copy(sample_video_path, output_path)
+                break
+        else:
+            print("   ⚠️  [MOCK] No sample video found, creating placeholder...")
+            with open(output_path, "wb") as f:
+                f.write(b"MOCK VIDEO FILE FOR TESTING")
+
+        print(f"✅ [MOCK] Video file downloaded: {output_path}")
+        return str(output_path)
+
+    def stream_generated_video(self, job_id: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Mock streaming download - yields a sample video (or a placeholder) in chunks
+        """
+        for sample_location in self.SAMPLE_VIDEO_LOCATIONS:
+            sample_video_path = Path(sample_location)
+            if sample_video_path.exists():
+                print(f"   [MOCK] Streaming sample video: {sample_location}")
+                with open(sample_video_path, "rb") as f:
+                    yield from iter(lambda: f.read(chunk_size), b"")
+                return
+
+        print("   ⚠️  [MOCK] No sample video found, streaming placeholder...")
+        yield b"MOCK VIDEO FILE FOR TESTING"
+
     async def generate_and_wait(
         self,
         prompt: str,
@@ -152,14 +255,8 @@ class MockSoraVideoGenerator:
             print(f"   Output file: {output_path}")
 
             # Try to find a sample video from multiple locations
-            sample_video_locations = [
-                "public/sample-video.mp4",
-                "../public/sample-video.mp4",
-                "uploads/sample-video.mp4",
-            ]
-
             sample_video_found = False
-            for sample_location in sample_video_locations:
+            for sample_location in self.SAMPLE_VIDEO_LOCATIONS:
                 sample_video_path = Path(sample_location)
                 if sample_video_path.exists():
                     print(f"   Found sample video: {sample_location}")
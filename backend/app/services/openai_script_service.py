@@ -8,7 +8,10 @@ from io import BytesIO
 from PIL import Image as PILImage
 from openai import OpenAI
 
+from app.core.clients import openai_client
 from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+from app.services.resilience import resilient_call
 
 logger = logging.getLogger(__name__)
 
@@ -41,10 +44,14 @@ class OpenAIScriptService:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not configured in settings")
 
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = "gpt-4o"
         logger.info(f"✅ OpenAI Script Service initialized with model: {self.model}")
 
+    @property
+    def client(self) -> OpenAI:
+        """Process-wide OpenAI client, shared with the Sora service (app.core.clients)"""
+        return openai_client.get()
+
     def analyze_image_for_script(
         self,
         image_data: bytes,
@@ -149,7 +156,9 @@ class OpenAIScriptService:
             logger.info(f"  🌡️  Temperature: 0.7")
             logger.info(f"  📊 Max tokens: unlimited")
 
-            response = self.client.chat.completions.create(
+            response = resilient_call(
+                "chat.completions",
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {
@@ -221,6 +230,10 @@ class OpenAIScriptService:
             logger.error("-" * 50)
             raise Exception(f"Invalid image format. Please upload a valid JPG or PNG image.")
 
+        except CircuitOpenException:
+            logger.warning(f"🔌 [OpenAI Service] chat.completions circuit is open, not calling OpenAI")
+            raise
+
         except Exception as e:
             logger.error("-" * 50)
             logger.error(f"❌ [OpenAI Service] ERROR at step: {current_step}")
@@ -330,7 +343,9 @@ Translate the following advertising video script from English to {target_lang_na
 **Translate to {target_lang_name} ({target_lang_native}):**"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = resilient_call(
+                "chat.completions",
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {
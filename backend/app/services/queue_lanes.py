@@ -0,0 +1,136 @@
+"""
+Plan-aware priority lanes for video generation
+
+The submit stage of every video is routed to one of three Celery queues
+(see VIDEO_LANES in app.core.celery_app):
+
+    premium - active premium subscribers
+    basic   - active basic subscribers
+    trial   - everyone else (free sora-2 4s trials, lapsed subscriptions)
+
+The lane is stored on the Video (queue_lane) so resubmits and reaper
+resumes stay in it. VIDEO_LANE_MAX_ACTIVE caps how many videos of a lane may
+be PROCESSING at once; a submit task over the cap is re-queued after
+VIDEO_LANE_DEFER_SECONDS instead of taking a Sora slot, so a burst of trials
+can't crowd paying users out of the provider's concurrency.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.celery_app import VIDEO_LANES
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.video import Video, VideoStatus
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANE = "basic"
+
+# Queue wait histogram buckets (seconds)
+WAIT_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def lane_for_user(user: User) -> str:
+    """
+    Lane for a user's next video, from their subscription plan
+
+    Args:
+        user: Requesting user
+
+    Returns:
+        "premium", "basic" or "trial"
+    """
+    if user.subscription_status == "active" and user.subscription_plan in ("premium", "basic"):
+        return user.subscription_plan
+    return "trial"
+
+
+def normalize_lane(lane: Optional[str]) -> str:
+    """Known lane name (videos created before lanes existed use DEFAULT_LANE)"""
+    return lane if lane in VIDEO_LANES else DEFAULT_LANE
+
+
+def lane_limit(lane: str) -> int:
+    """Max PROCESSING videos in a lane (0 = no cap)"""
+    return settings.VIDEO_LANE_MAX_ACTIVE.get(lane, 0)
+
+
+def lane_is_full(db: Session, lane: str) -> bool:
+    """
+    Whether a lane is at its concurrency cap
+
+    The count and the caller's claim are not atomic, so concurrent workers
+    can overshoot the cap by a few videos; it is a soft limit.
+    """
+    limit = lane_limit(lane)
+    if limit <= 0:
+        return False
+
+    active = db.query(func.count(Video.id)).filter(
+        Video.queue_lane == lane,
+        Video.status == VideoStatus.PROCESSING,
+    ).scalar()
+    return active >= limit
+
+
+def record_queue_wait(video: Video) -> Optional[float]:
+    """
+    Observe how long a video waited in its lane before the submit stage claimed it
+
+    Returns:
+        Seconds waited (None if the video has no queued_at)
+    """
+    if not video.queued_at:
+        return None
+    waited = max((datetime.utcnow() - video.queued_at).total_seconds(), 0)
+    metrics.observe("video_queue_wait_seconds", waited, WAIT_BUCKETS, lane=normalize_lane(video.queue_lane))
+    return waited
+
+
+def lane_stats(db: Session) -> Dict[str, Dict[str, float]]:
+    """
+    Current depth of every lane
+
+    Returns:
+        {lane: {"pending": n, "processing": n, "oldest_wait_seconds": s}}
+    """
+    stats = {lane: {"pending": 0, "processing": 0, "oldest_wait_seconds": 0.0} for lane in VIDEO_LANES}
+    now = datetime.utcnow()
+
+    rows = (
+        db.query(Video.queue_lane, Video.status, func.count(Video.id), func.min(Video.queued_at))
+        .filter(Video.status.in_([VideoStatus.PENDING, VideoStatus.PROCESSING]))
+        .group_by(Video.queue_lane, Video.status)
+        .all()
+    )
+    for lane, status, count, oldest in rows:
+        lane_stat = stats[normalize_lane(lane)]
+        if status == VideoStatus.PENDING:
+            lane_stat["pending"] += count
+            if oldest:
+                wait = (now - oldest).total_seconds()
+                lane_stat["oldest_wait_seconds"] = max(lane_stat["oldest_wait_seconds"], wait)
+        else:
+            lane_stat["processing"] += count
+
+    return stats
+
+
+def record_lane_gauges():
+    """Refresh the per-lane depth gauges (called when /metrics is scraped)"""
+    db = SessionLocal()
+    try:
+        for lane, lane_stat in lane_stats(db).items():
+            metrics.set_gauge("video_queue_depth", lane_stat["pending"], lane=lane)
+            metrics.set_gauge("video_lane_active", lane_stat["processing"], lane=lane)
+            metrics.set_gauge("video_queue_oldest_wait_seconds", lane_stat["oldest_wait_seconds"], lane=lane)
+    except Exception as e:
+        logger.warning(f"⚠️  Failed to record lane gauges: {e}")
+    finally:
+        db.close()
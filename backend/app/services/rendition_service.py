@@ -0,0 +1,217 @@
+"""
+Adaptive-bitrate HLS rendition and preview clip service
+
+Transcodes a finished MP4 into an HLS ladder (360p/540p/720p by default)
+with one ffmpeg process, then uploads the playlists and segments next to the
+source video in GCS:
+
+    {video blob without .mp4}/hls-{run id}/master.m3u8
+    {video blob without .mp4}/hls-{run id}/360p/index.m3u8, seg_000.ts, ...
+
+Players pick the rung that fits the connection, so mobile clients no longer
+download the full-resolution MP4. Gallery grids use a 2-3 second,
+low-resolution preview clip ({video blob}_preview_{run id}.mp4/.webp) instead.
+"""
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.gcs_service import gcs_service
+from app.utils.ffmpeg_utils import extract_preview, run_ffmpeg
+from app.utils.mp4_utils import read_mp4_metadata
+from app.utils.range_downloader import range_downloader
+
+
+HLS_SEGMENT_SECONDS = 4
+HLS_CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+# Renditions never change once written (each run gets a fresh name)
+HLS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@dataclass
+class Rendition:
+    """One rung of the bitrate ladder"""
+    short_side: int  # 360 → 640x360 landscape / 360x640 portrait
+    video_bitrate_k: int
+    audio_bitrate_k: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.short_side}p"
+
+
+LADDER = {
+    360: Rendition(360, 800, 96),
+    540: Rendition(540, 1400, 128),
+    720: Rendition(720, 2800, 128),
+}
+
+
+class RenditionService:
+    """Build and publish HLS renditions and preview clips"""
+
+    def ladder_for(self, width: Optional[int], height: Optional[int]) -> List[Rendition]:
+        """
+        Rungs to produce for a source, never upscaling
+
+        Args:
+            width: Source display width (None if unknown)
+            height: Source display height (None if unknown)
+
+        Returns:
+            Renditions sorted from lowest to highest
+        """
+        rungs = [LADDER[h] for h in sorted(settings.VIDEO_RENDITION_HEIGHTS) if h in LADDER]
+        if width and height:
+            source_short_side = min(width, height)
+            rungs = [r for r in rungs if r.short_side <= source_short_side] or rungs[:1]
+        return rungs
+
+    def render_hls(self, source_path: str, output_dir: str) -> str:
+        """
+        Transcode a local MP4 into an HLS ladder with a master playlist
+
+        Args:
+            source_path: Local MP4
+            output_dir: Empty directory for the playlists and segments
+
+        Returns:
+            Path of master.m3u8
+        """
+        metadata = read_mp4_metadata(source_path)
+        portrait = bool(metadata.width and metadata.height and metadata.height > metadata.width)
+        rungs = self.ladder_for(metadata.width, metadata.height)
+
+        # One decode, split into one scaled output per rung
+        splits = "".join(f"[v{i}]" for i in range(len(rungs)))
+        filters = [f"[0:v]split={len(rungs)}{splits}"]
+        for i, rung in enumerate(rungs):
+            scale = f"{rung.short_side}:-2" if portrait else f"-2:{rung.short_side}"
+            filters.append(f"[v{i}]scale={scale}[v{i}out]")
+
+        args = ["-i", source_path, "-filter_complex", ";".join(filters)]
+        stream_map = []
+        for i, rung in enumerate(rungs):
+            args += [
+                "-map", f"[v{i}out]",
+                f"-c:v:{i}", "libx264",
+                f"-b:v:{i}", f"{rung.video_bitrate_k}k",
+                f"-maxrate:v:{i}", f"{int(rung.video_bitrate_k * 1.07)}k",
+                f"-bufsize:v:{i}", f"{rung.video_bitrate_k * 2}k",
+            ]
+            entry = f"v:{i}"
+            if metadata.has_audio:
+                args += ["-map", "0:a:0", f"-c:a:{i}", "aac", f"-b:a:{i}", f"{rung.audio_bitrate_k}k"]
+                entry += f",a:{i}"
+            stream_map.append(f"{entry},name:{rung.name}")
+
+        args += [
+            "-preset", "veryfast",
+            "-profile:v", "main",
+            # Aligned keyframes across rungs so players can switch at any segment
+            "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+            "-sc_threshold", "0",
+            "-f", "hls",
+            "-hls_time", str(HLS_SEGMENT_SECONDS),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(output_dir, "%v", "seg_%03d.ts"),
+            "-master_pl_name", "master.m3u8",
+            "-var_stream_map", " ".join(stream_map),
+            os.path.join(output_dir, "%v", "index.m3u8"),
+        ]
+
+        run_ffmpeg(args, timeout=settings.VIDEO_RENDITION_TIMEOUT_SECONDS)
+        return os.path.join(output_dir, "master.m3u8")
+
+    def _asset_base(self, video_url: str, fallback_prefix: str) -> str:
+        """Source blob name without extension when it lives in our bucket, else fallback_prefix"""
+        blob_name = gcs_service.extract_blob_name_from_url(video_url) if video_url else None
+        return os.path.splitext(blob_name)[0] if blob_name else fallback_prefix
+
+    def hls_prefix_for(self, video_url: str, fallback_prefix: str) -> str:
+        """
+        GCS prefix for a video's renditions, next to the source blob. Each run
+        gets a fresh directory so objects stay immutable and retries never collide.
+        """
+        return f"{self._asset_base(video_url, fallback_prefix)}/hls-{uuid.uuid4().hex[:8]}"
+
+    def preview_blob_name_for(self, video_url: str, fallback_prefix: str) -> str:
+        """GCS blob name for a video's preview clip (unique per run, like hls_prefix_for)"""
+        extension = ".webp" if settings.VIDEO_PREVIEW_FORMAT == "webp" else ".mp4"
+        return f"{self._asset_base(video_url, fallback_prefix)}_preview_{uuid.uuid4().hex[:8]}{extension}"
+
+    def create_renditions(self, video_url: str, blob_prefix: str) -> str:
+        """
+        Download a published MP4, render the HLS ladder and upload it
+
+        Args:
+            video_url: Public URL of the source MP4
+            blob_prefix: GCS prefix for the playlists and segments
+
+        Returns:
+            Public URL of master.m3u8
+        """
+        work_dir = tempfile.mkdtemp(prefix="hls_")
+        try:
+            source_path = os.path.join(work_dir, "source.mp4")
+            output_dir = os.path.join(work_dir, "hls")
+            os.makedirs(output_dir)
+
+            range_downloader.download(video_url, source_path)
+            self.render_hls(source_path, output_dir)
+            os.remove(source_path)
+
+            urls = gcs_service.upload_directory(
+                output_dir,
+                blob_prefix,
+                HLS_CONTENT_TYPES,
+                cache_control=HLS_CACHE_CONTROL,
+            )
+            return urls["master.m3u8"]
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def create_preview(self, video_url: str, blob_name: str) -> str:
+        """
+        Cut a short low-resolution preview from a published video and upload it
+
+        ffmpeg reads the source URL directly, so only the first seconds of a
+        faststart MP4 are fetched.
+
+        Args:
+            video_url: Public URL of the source video
+            blob_name: GCS blob name of the preview
+
+        Returns:
+            Public URL of the preview
+        """
+        extension = os.path.splitext(blob_name)[1]
+        fd, preview_path = tempfile.mkstemp(prefix="preview_", suffix=extension)
+        os.close(fd)
+        try:
+            extract_preview(
+                video_url,
+                preview_path,
+                seconds=settings.VIDEO_PREVIEW_SECONDS,
+                short_side=settings.VIDEO_PREVIEW_SHORT_SIDE,
+            )
+            return gcs_service.upload_local_file_as(
+                preview_path,
+                blob_name,
+                "image/webp" if extension == ".webp" else "video/mp4",
+                cache_control=HLS_CACHE_CONTROL,
+            )
+        finally:
+            if os.path.exists(preview_path):
+                os.remove(preview_path)
+
+
+# Global rendition service instance
+rendition_service = RenditionService()
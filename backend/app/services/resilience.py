@@ -0,0 +1,416 @@
+"""
+Error classification, backoff and circuit breakers for OpenAI/Sora calls
+
+Every call to OpenAI goes through resilient_call() with an endpoint name
+(see ENDPOINTS). Failures are classified as:
+
+    retryable    - connection errors, timeouts, 408/409/5xx: retried with
+                   exponential backoff and jitter
+    rate_limited - 429: retried after the server's Retry-After (or backoff)
+    terminal     - 4xx request errors, invalid input, exhausted quota:
+                   raised immediately, never retried
+
+Retryable and rate-limited failures also feed a per-endpoint circuit
+breaker shared by all processes through Redis:
+
+    closed    - calls pass; CIRCUIT_FAILURE_THRESHOLD failures within
+                CIRCUIT_FAILURE_WINDOW_SECONDS open the circuit
+    open      - calls fail fast with CircuitOpenException for
+                CIRCUIT_OPEN_SECONDS, so pipeline stages park their work
+                instead of burning worker time and retries
+    half_open - one probe call is let through; success closes the circuit,
+                failure opens it again
+
+Breaker state is exported as the openai_circuit_state gauge (0 closed,
+1 open, 2 half open). If Redis is unreachable the breaker fails open
+(calls pass) - the breaker must not stop generation by itself.
+"""
+import logging
+import random
+import sys
+import time
+from typing import Callable, Optional, Tuple
+
+import httpx
+import redis
+
+from app.core.clients import redis_control_client
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException, NotFoundException
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE = "retryable"
+RATE_LIMITED = "rate_limited"
+TERMINAL = "terminal"
+
+# Endpoints with their own circuit
+ENDPOINTS = (
+    "sora.create", "sora.retrieve", "sora.content",
+    "runway.create", "runway.retrieve", "runway.content",
+    "chat.completions",
+)
+
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+STATE_NAMES = {CLOSED: "closed", OPEN: "open", HALF_OPEN: "half_open"}
+
+RETRYABLE_STATUS_CODES = (408, 409, 425, 500, 502, 503, 504)
+
+# KEYS[1] circuit hash
+# ARGV: op ("allow", "success", "failure"), failure threshold, window seconds, open seconds
+# allow returns {allowed, state, retry after ms}; success/failure return {state, changed}
+CIRCUIT_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local op = ARGV[1]
+local threshold = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local open_seconds = tonumber(ARGV[4])
+
+local fields = redis.call('HMGET', KEYS[1], 'state', 'open_until', 'probe_until', 'failures', 'window_start')
+local state = tonumber(fields[1]) or 0
+local open_until = tonumber(fields[2]) or 0
+local probe_until = tonumber(fields[3]) or 0
+
+local function open_circuit()
+    redis.call('HSET', KEYS[1], 'state', 1, 'open_until', now + open_seconds, 'failures', 0)
+    redis.call('EXPIRE', KEYS[1], math.ceil(window + open_seconds * 4))
+end
+
+if op == 'allow' then
+    if state == 0 then
+        return {1, 0, 0}
+    end
+    if state == 1 and now < open_until then
+        return {0, 1, math.ceil((open_until - now) * 1000)}
+    end
+    if state == 2 and now < probe_until then
+        -- Another caller is probing
+        return {0, 2, math.ceil((probe_until - now) * 1000)}
+    end
+    -- Cool-down over (or the last probe never reported back): let one probe through
+    redis.call('HSET', KEYS[1], 'state', 2, 'probe_until', now + open_seconds)
+    redis.call('EXPIRE', KEYS[1], math.ceil(window + open_seconds * 4))
+    return {1, 2, 0}
+end
+
+if op == 'success' then
+    if state == 0 then
+        return {0, 0}
+    end
+    redis.call('DEL', KEYS[1])
+    return {0, 1}
+end
+
+-- failure
+if state == 2 then
+    open_circuit()
+    return {1, 1}
+end
+if state == 1 then
+    return {1, 0}
+end
+
+local failures = 1
+if now - (tonumber(fields[5]) or 0) > window then
+    redis.call('HSET', KEYS[1], 'failures', 1, 'window_start', now)
+else
+    failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+end
+redis.call('EXPIRE', KEYS[1], math.ceil(window + open_seconds * 4))
+
+if failures >= threshold then
+    open_circuit()
+    return {1, 1}
+end
+return {0, 0}
+"""
+
+
+def _openai():
+    """
+    The openai module, if something imported it
+
+    Not importing the SDK here keeps worker start-up cheap: an exception can
+    only be an OpenAI error once the SDK is loaded.
+    """
+    return sys.modules.get("openai")
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """OpenAI connection failure that never reached the API (timeouts excluded)"""
+    openai = _openai()
+    return (
+        openai is not None
+        and isinstance(exc, openai.APIConnectionError)
+        and not isinstance(exc, openai.APITimeoutError)
+    )
+
+
+def classify_error(exc: BaseException) -> str:
+    """
+    Classify an exception from an OpenAI/Sora call
+
+    Returns:
+        RETRYABLE, RATE_LIMITED or TERMINAL
+    """
+    if isinstance(exc, CircuitOpenException):
+        return RATE_LIMITED
+    if isinstance(exc, NotFoundException):
+        # e.g. the video was deleted mid-pipeline: retrying won't bring it back
+        return TERMINAL
+    openai = _openai()
+    if openai is not None:
+        if isinstance(exc, openai.RateLimitError):
+            # Exhausted quota/billing is not going to fix itself in a minute
+            return TERMINAL if getattr(exc, "code", None) == "insufficient_quota" else RATE_LIMITED
+        if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+            return RETRYABLE
+        if isinstance(exc, openai.APIStatusError):
+            return RETRYABLE if exc.status_code in RETRYABLE_STATUS_CODES or exc.status_code >= 500 else TERMINAL
+    if isinstance(exc, httpx.HTTPStatusError):
+        status_code = exc.response.status_code
+        if status_code == 429:
+            return RATE_LIMITED
+        return RETRYABLE if status_code in RETRYABLE_STATUS_CODES or status_code >= 500 else TERMINAL
+    if isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return RETRYABLE
+    if isinstance(exc, (ValueError, TypeError, KeyError, FileNotFoundError, PermissionError)):
+        return TERMINAL
+    # Unknown failure: assume transient, bounded by the retry budget
+    return RETRYABLE
+
+
+def retry_after_hint(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any"""
+    if isinstance(exc, CircuitOpenException):
+        return float(exc.retry_after)
+
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with jitter
+
+    Args:
+        attempt: Number of failed attempts so far (0 for the first retry)
+        base: Delay scale of the first retry in seconds
+        cap: Upper bound in seconds
+
+    Returns:
+        Random delay in [base / 2, min(cap, base * 2^attempt)]
+    """
+    ceiling = min(cap, base * (2 ** attempt))
+    return random.uniform(min(base / 2, ceiling), ceiling)
+
+
+def retry_delay(exc: BaseException, attempt: int, base: float, cap: float) -> float:
+    """Delay before retrying after exc: the server's hint for 429s, else backoff"""
+    delay = backoff_delay(attempt, base, cap)
+    if classify_error(exc) == RATE_LIMITED:
+        hint = retry_after_hint(exc)
+        if hint:
+            delay = max(hint, delay) * (1 + random.random() * 0.1)
+    return delay
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breakers kept in Redis"""
+
+    def __init__(self, key_prefix: str = "circuit:"):
+        self.key_prefix = key_prefix
+        self._script = None
+
+    def _client(self) -> redis.Redis:
+        client = redis_control_client.get()
+        if self._script is None:
+            self._script = client.register_script(CIRCUIT_SCRIPT)
+        return client
+
+    def _run(self, op: str, endpoint: str):
+        client = self._client()
+        # Run on the slot's current client, which is rebuilt after a fork or failed health check
+        return self._script(
+            client=client,
+            keys=[f"{self.key_prefix}{endpoint}"],
+            args=[
+                op,
+                settings.CIRCUIT_FAILURE_THRESHOLD,
+                settings.CIRCUIT_FAILURE_WINDOW_SECONDS,
+                settings.CIRCUIT_OPEN_SECONDS,
+            ],
+        )
+
+    @staticmethod
+    def _transition(endpoint: str, state: int):
+        name = STATE_NAMES[state]
+        metrics.set_gauge("openai_circuit_state", state, endpoint=endpoint)
+        metrics.incr("openai_circuit_transitions_total", endpoint=endpoint, state=name)
+        log = logger.warning if state == OPEN else logger.info
+        log(f"🔌 [Circuit] {endpoint} is now {name}")
+
+    def allow(self, endpoint: str) -> Tuple[bool, bool, float]:
+        """
+        Ask whether a call to an endpoint may go out
+
+        Returns:
+            (allowed, is_probe, retry_after seconds when denied)
+        """
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return True, False, 0.0
+        try:
+            allowed, state, retry_ms = self._run("allow", endpoint)
+        except Exception as e:
+            logger.warning(f"⚠️  Circuit breaker unavailable, allowing {endpoint}: {e}")
+            return True, False, 0.0
+
+        if allowed and state == HALF_OPEN:
+            self._transition(endpoint, HALF_OPEN)
+            return True, True, 0.0
+        return bool(allowed), False, int(retry_ms) / 1000.0
+
+    def open_for(self, endpoint: str) -> float:
+        """
+        Seconds until an open circuit lets a probe through (0 if calls may go out)
+
+        Read-only: used by pipeline stages to park work before claiming
+        anything, without taking the half-open probe.
+        """
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return 0.0
+        try:
+            state, open_until, probe_until = self._client().hmget(
+                f"{self.key_prefix}{endpoint}", "state", "open_until", "probe_until"
+            )
+        except Exception:
+            return 0.0
+
+        until = {str(OPEN): open_until, str(HALF_OPEN): probe_until}.get(state or "")
+        if not until:
+            return 0.0
+        return max(float(until) - time.time(), 0.0)
+
+    def record_success(self, endpoint: str):
+        """Close the circuit after a successful probe"""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return
+        try:
+            state, changed = self._run("success", endpoint)
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to record {endpoint} success: {e}")
+            return
+        if changed:
+            self._transition(endpoint, CLOSED)
+
+    def record_failure(self, endpoint: str):
+        """Count a retryable failure; may open the circuit"""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return
+        try:
+            state, changed = self._run("failure", endpoint)
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to record {endpoint} failure: {e}")
+            return
+        if changed:
+            self._transition(endpoint, int(state))
+
+    def state(self, endpoint: str) -> int:
+        """Stored state of an endpoint's circuit (CLOSED when unknown)"""
+        try:
+            return int(self._client().hget(f"{self.key_prefix}{endpoint}", "state") or CLOSED)
+        except Exception:
+            return CLOSED
+
+
+def resilient_call(
+    endpoint: str,
+    fn: Callable,
+    *args,
+    idempotent: bool = True,
+    max_attempts: Optional[int] = None,
+    **kwargs,
+):
+    """
+    Call an OpenAI endpoint behind its circuit breaker, retrying transient errors
+
+    Args:
+        endpoint: Circuit name (one of ENDPOINTS)
+        fn: SDK method to call
+        *args: Positional arguments for fn
+        idempotent: False for calls that create something (videos.create):
+            only errors where the request surely had no effect (429,
+            connection refused) are retried, never timeouts or 5xx
+        max_attempts: Attempts before giving up (default OPENAI_RETRY_ATTEMPTS)
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        fn's return value
+
+    Raises:
+        CircuitOpenException: If the circuit is open
+        Exception: The last error once it is terminal or attempts are used up
+            (retry waits longer than OPENAI_RETRY_MAX_SECONDS are left to
+            the caller)
+    """
+    attempts = max_attempts or settings.OPENAI_RETRY_ATTEMPTS
+
+    for attempt in range(attempts):
+        allowed, is_probe, retry_after = circuit_breaker.allow(endpoint)
+        if not allowed:
+            metrics.incr("openai_circuit_rejected_total", endpoint=endpoint)
+            raise CircuitOpenException(endpoint, retry_after=max(1, int(retry_after + 0.999)))
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            kind = classify_error(e)
+            metrics.incr("openai_call_errors_total", endpoint=endpoint, kind=kind)
+
+            if kind == TERMINAL:
+                if is_probe:
+                    # The endpoint answered: it is up, the request was just bad
+                    circuit_breaker.record_success(endpoint)
+                raise
+            circuit_breaker.record_failure(endpoint)
+
+            safe_to_repeat = idempotent or kind == RATE_LIMITED or _is_connection_error(e)
+            delay = retry_delay(e, attempt, settings.OPENAI_RETRY_BASE_SECONDS, settings.OPENAI_RETRY_MAX_SECONDS)
+            if attempt + 1 >= attempts or not safe_to_repeat or delay > settings.OPENAI_RETRY_MAX_SECONDS:
+                raise
+
+            logger.warning(
+                f"🔁 [{endpoint}] {kind} error ({type(e).__name__}: {e}), "
+                f"retry {attempt + 1}/{attempts - 1} in {delay:.1f}s"
+            )
+            metrics.incr("openai_call_retries_total", endpoint=endpoint, kind=kind)
+            time.sleep(delay)
+            continue
+
+        if is_probe:
+            circuit_breaker.record_success(endpoint)
+        return result
+
+
+def record_circuit_gauges():
+    """Refresh the breaker state gauges (called when /metrics is scraped)"""
+    for endpoint in ENDPOINTS:
+        metrics.set_gauge("openai_circuit_state", circuit_breaker.state(endpoint), endpoint=endpoint)
+
+
+# Global circuit breaker instance
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,206 @@
+"""
+Runway Image-to-Video Generation Service
+
+Blocking client for Runway's task API, with the same submit / status /
+download surface as SoraVideoGenerator so it can back the staged pipeline
+(see app.services.video_providers):
+
+    POST /v1/image_to_video  -> {"id": task_id}
+    GET  /v1/tasks/{id}      -> {"status": PENDING | THROTTLED | RUNNING |
+                                 SUCCEEDED | FAILED | CANCELLED,
+                                 "progress": 0-1, "output": [url], "failure": ...}
+
+Runway renders 5s or 10s clips; other durations are mapped to the nearest.
+"""
+import base64
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import httpx
+from PIL import Image
+
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+from app.services.resilience import classify_error, resilient_call
+from app.utils.image_utils import read_image_from_url
+from app.utils.range_downloader import range_downloader
+
+RUNWAY_DURATIONS = (5, 10)
+
+# Runway task status -> pipeline job status
+STATUS_MAP = {
+    "PENDING": "queued",
+    "THROTTLED": "queued",
+    "RUNNING": "in_progress",
+    "SUCCEEDED": "completed",
+    "FAILED": "failed",
+    "CANCELLED": "failed",
+}
+
+
+class RunwayVideoGenerator:
+    """Runway Gen-4 Image-to-Video Generator"""
+
+    def __init__(self):
+        """Initialize Runway service with the API key"""
+        if not settings.RUNWAY_API_KEY:
+            raise ValueError("RUNWAY_API_KEY is not configured in settings")
+
+        self.model = settings.RUNWAY_MODEL
+        self.client = httpx.Client(
+            base_url=settings.RUNWAY_API_URL,
+            headers={
+                "Authorization": f"Bearer {settings.RUNWAY_API_KEY}",
+                "X-Runway-Version": settings.RUNWAY_API_VERSION,
+            },
+            timeout=30.0,
+        )
+
+    @staticmethod
+    def runway_duration(duration: int) -> int:
+        """Nearest duration Runway can render"""
+        return min(RUNWAY_DURATIONS, key=lambda d: (abs(d - duration), d))
+
+    @staticmethod
+    def _ratio(image_bytes: bytes) -> str:
+        """Output ratio matching the reference image orientation"""
+        width, height = Image.open(BytesIO(image_bytes)).size
+        return "720:1280" if height > width else "1280:720"
+
+    def _request(self, method: str, path: str, **kwargs) -> Dict:
+        response = self.client.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def submit_generation(
+        self,
+        prompt: str,
+        image_url: str,
+        duration: int = 8,
+        model: Optional[str] = None,
+    ) -> Dict:
+        """
+        Submit an image-to-video task without waiting for it (submit stage)
+
+        Args:
+            prompt: Text description for video generation
+            image_url: URL or local path to source image
+            duration: Requested duration in seconds (mapped to 5 or 10)
+            model: Optional Runway model override
+
+        Returns:
+            {"job_id", "status", "resolution", "duration"}
+        """
+        image_bytes = read_image_from_url(image_url)
+        ratio = self._ratio(image_bytes)
+        seconds = self.runway_duration(duration)
+
+        # Public URLs are fetched by Runway; local files are inlined as a data URI
+        prompt_image = image_url if image_url.startswith("https://") else (
+            "data:image/jpeg;base64," + base64.b64encode(image_bytes).decode("ascii")
+        )
+
+        print(f"🎬 Submitting Runway video generation...")
+        print(f"   Model: {model or self.model}")
+        print(f"   Duration: {seconds}s (requested {duration}s)")
+        print(f"   Ratio: {ratio}")
+        print(f"   Prompt: {prompt[:100]}...")
+
+        task = resilient_call(
+            "runway.create",
+            self._request,
+            "POST",
+            "/image_to_video",
+            idempotent=False,
+            json={
+                "model": model or self.model,
+                "promptImage": prompt_image,
+                "promptText": prompt[:1000],
+                "ratio": ratio,
+                "duration": seconds,
+            },
+        )
+
+        print(f"✅ Runway task submitted. Task ID: {task['id']}")
+        return {
+            "job_id": task["id"],
+            "status": "queued",
+            "resolution": ratio.replace(":", "x"),
+            "duration": seconds,
+        }
+
+    def check_generation_status(self, job_id: str) -> Dict:
+        """
+        Check task status (same result shape as SoraVideoGenerator)
+
+        Never raises: a missing task is reported as "expired" and anything
+        else that kept us from reading the status as "error".
+        """
+        try:
+            task = resilient_call("runway.retrieve", self._request, "GET", f"/tasks/{job_id}")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                print(f"❌ Runway task not found (expired?): {job_id}")
+                return {
+                    "status": "expired",
+                    "job_id": job_id,
+                    "error_message": f"Runway task {job_id} no longer exists",
+                }
+            return {"status": "error", "job_id": job_id, "error_message": str(e)}
+        except CircuitOpenException as e:
+            return {
+                "status": "error",
+                "job_id": job_id,
+                "error_message": e.message,
+                "retry_after": e.retry_after,
+            }
+        except Exception as e:
+            print(f"❌ Error checking Runway status ({classify_error(e)}): {e}")
+            return {"status": "error", "job_id": job_id, "error_message": str(e)}
+
+        result = {
+            "status": STATUS_MAP.get(task.get("status"), "in_progress"),
+            "job_id": job_id,
+        }
+        if task.get("progress") is not None:
+            result["progress"] = int(float(task["progress"]) * 100)
+        if result["status"] == "completed":
+            result["progress"] = 100
+        if result["status"] == "failed":
+            result["error_message"] = task.get("failure") or f"Runway task {task.get('status', '').lower()}"
+        return result
+
+    def _output_url(self, job_id: str) -> str:
+        task = resilient_call("runway.retrieve", self._request, "GET", f"/tasks/{job_id}")
+        outputs = task.get("output") or []
+        if task.get("status") != "SUCCEEDED" or not outputs:
+            raise ValueError(f"Runway task {job_id} has no output ({task.get('status')})")
+        return outputs[0]
+
+    def download_generated_video(self, job_id: str, output_filename: str) -> str:
+        """
+        Download a succeeded task's video (download stage)
+
+        Returns:
+            Local file path
+        """
+        output_dir = Path(settings.VIDEO_OUTPUT_DIR)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / output_filename
+
+        print(f"📥 Downloading Runway output for task: {job_id}")
+        resilient_call(
+            "runway.content",
+            range_downloader.download,
+            max_attempts=1,
+            url=self._output_url(job_id),
+            output_path=str(output_path),
+        )
+        return str(output_path)
+
+    def stream_generated_video(self, job_id: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Stream a succeeded task's video chunk by chunk"""
+        with httpx.stream("GET", self._output_url(job_id), timeout=60.0, follow_redirects=True) as response:
+            response.raise_for_status()
+            yield from response.iter_bytes(chunk_size)
@@ -0,0 +1,502 @@
+"""
+Multiplexed Sora Job Poller
+
+A single asyncio process that tracks every in-flight Sora job, instead of
+one blocking loop (or one Celery poll task) per video:
+
+- Outstanding jobs live in a min-heap ordered by next check time
+- Due jobs are polled concurrently via AsyncOpenAI, bounded by a semaphore
+- Status handlers are dispatched on progress, completion and failure
+- An optional poll_delay callback spaces the checks of each job (e.g. from
+  its render ETA) instead of the fixed poll interval
+
+Jobs rendered by another video provider (e.g. Runway) are checked through
+that provider's blocking client in a thread.
+
+Polling cost therefore grows with the number of status checks, not with the
+number of workers. Enable with SORA_POLLER_ENABLED=true and run one process:
+
+    python -m app.services.sora_poller
+"""
+import asyncio
+import heapq
+import inspect
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+@dataclass
+class TrackedJob:
+    """An in-flight Sora job and its polling state"""
+    job_id: str
+    video_id: Optional[int] = None
+    model: Optional[str] = None  # Provider model, for the per-model rate limit
+    provider: Optional[str] = None  # Video provider of the job (None = sora)
+    duration: Optional[int] = None  # Video duration, for the render ETA
+    submitted_at: Optional[datetime] = None  # UTC, used for the max-wait deadline
+    next_check_at: float = 0.0  # time.monotonic() of the next status check
+    checks: int = 0
+    last_status: Optional[str] = None
+
+
+# Handlers receive the job and the status dict; they may be sync or async
+StatusHandler = Callable[[TrackedJob, Dict], Any]
+
+# Seconds until the next check of a job that is still rendering
+PollDelay = Callable[[TrackedJob, Dict], float]
+
+
+class SoraJobPoller:
+    """Poll many Sora jobs concurrently from one event loop"""
+
+    TERMINAL_STATUSES = ("completed", "failed", "expired", "timeout")
+
+    def __init__(
+        self,
+        client=None,
+        poll_interval: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_wait_seconds: int = 1200,
+        finished_ttl: float = 120.0,
+        rate_limiter=None,
+        poll_delay: Optional[PollDelay] = None,
+    ):
+        """
+        Initialize the poller
+
+        Args:
+            client: AsyncOpenAI client (None falls back to the configured
+                sora_service in a thread, e.g. for the mock service)
+            poll_interval: Seconds between checks of the same job
+            max_concurrency: Max concurrent status requests
+            max_wait_seconds: Jobs older than this are reported as "timeout"
+            finished_ttl: Seconds a finished job ID is ignored by track()
+            rate_limiter: Optional SoraRateLimiter consulted before every
+                status check (denied checks are re-scheduled)
+            poll_delay: Optional callable(job, status_result) returning the
+                delay before the next check of a rendering job; it runs in
+                a thread (default: poll_interval)
+        """
+        self.client = client
+        self.poll_interval = poll_interval or settings.SORA_POLL_INTERVAL_SECONDS
+        self.max_wait_seconds = max_wait_seconds
+        self.finished_ttl = finished_ttl
+        self.rate_limiter = rate_limiter
+        self.poll_delay = poll_delay
+        self.checks_performed = 0
+
+        self._semaphore = asyncio.Semaphore(max_concurrency or settings.SORA_POLLER_CONCURRENCY)
+        self._heap: List[Tuple[float, str]] = []
+        self._jobs: Dict[str, TrackedJob] = {}
+        self._finished: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._handlers: Dict[str, List[StatusHandler]] = {}
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+
+    # ------------------------------------------------------------------
+    # Job registry
+    # ------------------------------------------------------------------
+
+    def on(self, status: str, handler: StatusHandler):
+        """
+        Register a handler for a job status
+
+        Args:
+            status: "completed", "failed", "expired", "timeout" or
+                "progress" (non-terminal checks)
+            handler: Callable(job, status_result), sync or async
+        """
+        self._handlers.setdefault(status, []).append(handler)
+
+    def track(
+        self,
+        job_id: str,
+        video_id: Optional[int] = None,
+        submitted_at: Optional[datetime] = None,
+        delay: float = 0.0,
+        model: Optional[str] = None,
+        duration: Optional[int] = None,
+        provider: Optional[str] = None,
+    ) -> bool:
+        """
+        Start tracking a job (no-op if already tracked or recently finished)
+
+        Returns:
+            True if the job was added
+        """
+        if job_id in self._jobs:
+            return False
+
+        finished_at = self._finished.get(job_id)
+        if finished_at and time.monotonic() - finished_at < self.finished_ttl:
+            return False
+
+        job = TrackedJob(
+            job_id=job_id, video_id=video_id, model=model, duration=duration,
+            submitted_at=submitted_at, provider=provider,
+        )
+        self._jobs[job_id] = job
+        self._schedule(job, delay)
+        return True
+
+    def untrack(self, job_id: str):
+        """Stop tracking a job (its heap entry is discarded lazily)"""
+        self._jobs.pop(job_id, None)
+
+    def tracked_job_ids(self) -> Set[str]:
+        """IDs of all jobs currently being polled"""
+        return set(self._jobs)
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of poller load"""
+        return {
+            "tracked_jobs": len(self._jobs),
+            "in_flight_checks": len(self._in_flight),
+            "checks_performed": self.checks_performed,
+        }
+
+    def _schedule(self, job: TrackedJob, delay: float):
+        job.next_check_at = time.monotonic() + delay
+        heapq.heappush(self._heap, (job.next_check_at, job.job_id))
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    async def fetch_status(self, job_id: str, provider: Optional[str] = None) -> Dict:
+        """
+        Retrieve one job status
+
+        Args:
+            job_id: Provider job ID
+            provider: Video provider of the job (None = sora); jobs of other
+                providers are checked with their blocking client in a thread
+
+        Returns:
+            Status dict (same shape as SoraVideoGenerator.check_generation_status)
+        """
+        from app.services.sora_service import SoraVideoGenerator
+        from app.services.video_providers import get_provider
+
+        if self.client is None or (provider or "sora") != "sora":
+            return await asyncio.to_thread(get_provider(provider).check_status, job_id)
+
+        from openai import NotFoundError
+        from app.services.resilience import TERMINAL, circuit_breaker, classify_error, retry_delay
+
+        # Same circuit as the blocking status check: park checks while it is open
+        allowed, is_probe, retry_after = await asyncio.to_thread(circuit_breaker.allow, "sora.retrieve")
+        if not allowed:
+            return {
+                "status": "error",
+                "job_id": job_id,
+                "error_message": "sora.retrieve circuit is open",
+                "retry_after": retry_after,
+            }
+
+        try:
+            job_status = await self.client.videos.retrieve(job_id)
+        except NotFoundError as e:
+            return {
+                "status": "expired",
+                "job_id": job_id,
+                "error_message": f"Sora job {job_id} no longer exists: {e}",
+            }
+        except Exception as e:
+            kind = classify_error(e)
+            if kind != TERMINAL:
+                await asyncio.to_thread(circuit_breaker.record_failure, "sora.retrieve")
+            return {
+                "status": "error",
+                "job_id": job_id,
+                "error_message": f"{kind}: {e}",
+                "retry_after": retry_delay(e, 0, self.poll_interval, settings.OPENAI_RETRY_MAX_SECONDS),
+            }
+
+        if is_probe:
+            await asyncio.to_thread(circuit_breaker.record_success, "sora.retrieve")
+        return SoraVideoGenerator.status_from_job(job_status, job_id)
+
+    async def _check(self, job: TrackedJob):
+        """Check one job and dispatch handlers / re-schedule"""
+        if job.submitted_at and (datetime.utcnow() - job.submitted_at).total_seconds() > self.max_wait_seconds:
+            result = {"status": "timeout", "job_id": job.job_id}
+        else:
+            if self.rate_limiter and job.model:
+                decision = await asyncio.to_thread(self.rate_limiter.acquire_poll, job.model, job.video_id)
+                if not decision.allowed:
+                    if job.job_id in self._jobs:
+                        self._schedule(job, decision.retry_after)
+                    return
+
+            try:
+                async with self._semaphore:
+                    result = await self.fetch_status(job.job_id, job.provider)
+            except Exception as e:
+                # Transient error - keep the job and try again later
+                print(f"⚠️  [SoraPoller] Status check failed for {job.job_id}: {e}")
+                if job.job_id in self._jobs:
+                    self._schedule(job, self.poll_interval)
+                return
+            finally:
+                job.checks += 1
+                self.checks_performed += 1
+
+        if job.job_id not in self._jobs:
+            return  # Untracked while the request was in flight
+
+        job.last_status = result["status"]
+
+        if result["status"] == "error":
+            # Status unknown (e.g. network error, open circuit) - the job itself may be fine
+            print(f"⚠️  [SoraPoller] Status check failed for {job.job_id}: {result.get('error_message')}")
+            self._schedule(job, result.get("retry_after") or self.poll_interval)
+        elif result["status"] in self.TERMINAL_STATUSES:
+            self.untrack(job.job_id)
+            self._finished[job.job_id] = time.monotonic()
+            await self._dispatch(result["status"], job, result)
+        else:
+            await self._dispatch("progress", job, result)
+            delay = self.poll_interval
+            if self.poll_delay:
+                try:
+                    delay = await asyncio.to_thread(self.poll_delay, job, result)
+                except Exception as e:
+                    print(f"⚠️  [SoraPoller] Poll delay failed for {job.job_id}: {e}")
+            if job.job_id in self._jobs:
+                self._schedule(job, delay)
+
+    async def _dispatch(self, status: str, job: TrackedJob, result: Dict):
+        for handler in self._handlers.get(status, []):
+            try:
+                outcome = handler(job, result)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            except Exception as e:
+                print(f"❌ [SoraPoller] Handler for '{status}' failed on {job.job_id}: {e}")
+
+    def _start_due_checks(self):
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            due_at, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+
+            # Skip stale heap entries (untracked or re-scheduled jobs)
+            if job is None or job.next_check_at != due_at or job_id in self._in_flight:
+                continue
+
+            self._in_flight.add(job_id)
+            task = asyncio.create_task(self._check(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _, j=job_id: self._in_flight.discard(j))
+
+    def _prune_finished(self):
+        cutoff = time.monotonic() - self.finished_ttl
+        for job_id in [j for j, t in self._finished.items() if t < cutoff]:
+            del self._finished[job_id]
+
+    async def run(self):
+        """Run the polling loop until stop() is called"""
+        self._stopped = False
+        print(f"🛰️  [SoraPoller] Started (interval {self.poll_interval}s)")
+
+        while not self._stopped:
+            self._wakeup.clear()
+            self._start_due_checks()
+            self._prune_finished()
+
+            timeout = max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        print("🛰️  [SoraPoller] Stopped")
+
+    def stop(self):
+        """Ask run() to return after in-flight checks finish"""
+        self._stopped = True
+        self._wakeup.set()
+
+
+# ----------------------------------------------------------------------
+# Standalone process: wires the poller to the database and Celery pipeline
+# ----------------------------------------------------------------------
+
+def _load_polling_jobs() -> List[Tuple[int, str, Optional[datetime], str, Optional[int], Optional[str]]]:
+    """Videos whose provider job is awaiting a status check"""
+    from app.database import SessionLocal
+    from app.models.video import Video, VideoStatus, GenerationStage
+
+    db = SessionLocal()
+    try:
+        return (
+            db.query(
+                Video.id, Video.sora_job_id, Video.sora_submitted_at, Video.model, Video.duration, Video.provider
+            )
+            .filter(
+                Video.status == VideoStatus.PROCESSING,
+                Video.generation_stage == GenerationStage.POLL.value,
+                Video.sora_job_id.isnot(None),
+            )
+            .all()
+        )
+    finally:
+        db.close()
+
+
+# Progress seen by the poller, written to the video rows on the next sync
+_progress_updates: Dict[int, Dict[str, Any]] = {}
+_progress_lock = threading.Lock()
+
+
+def _save_progress(video_ids: Set[int]):
+    """Store the last job status and ETA of polled videos (one bulk UPDATE per sync)"""
+    from sqlalchemy import update
+    from app.database import SessionLocal
+    from app.models.video import Video
+
+    with _progress_lock:
+        updates = [values for video_id, values in _progress_updates.items() if video_id in video_ids]
+        _progress_updates.clear()
+    if not updates:
+        return
+
+    db = SessionLocal()
+    try:
+        db.execute(update(Video), updates)  # Bulk UPDATE by primary key
+        db.commit()
+    finally:
+        db.close()
+
+
+def _renew_leases(video_ids: List[int]):
+    """Heartbeat the videos this poller owns so the reaper leaves them alone"""
+    from sqlalchemy import update
+    from app.database import SessionLocal
+    from app.models.video import Video, VideoStatus
+
+    if not video_ids:
+        return
+
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Video)
+            .where(Video.id.in_(video_ids), Video.status == VideoStatus.PROCESSING)
+            .values(
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=settings.VIDEO_LEASE_SECONDS),
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def sync_jobs_from_db(poller: SoraJobPoller):
+    """Track newly submitted jobs, drop jobs that left the POLL stage, renew leases and save progress"""
+    from app.services.video_providers import get_provider
+
+    rows = await asyncio.to_thread(_load_polling_jobs)
+    active = set()
+
+    for video_id, job_id, submitted_at, model, duration, provider in rows:
+        active.add(job_id)
+        model = model.value if hasattr(model, "value") else model
+        model = get_provider(provider).provider_model(model) or model
+        if poller.track(
+            job_id, video_id=video_id, submitted_at=submitted_at, model=model, duration=duration, provider=provider
+        ):
+            print(f"➕ [SoraPoller] Tracking job {job_id} (video {video_id})")
+
+    for job_id in poller.tracked_job_ids() - active:
+        poller.untrack(job_id)
+
+    polled = [video_id for video_id, job_id, *_ in rows if job_id in active]
+    await asyncio.to_thread(_renew_leases, polled)
+    await asyncio.to_thread(_save_progress, set(polled))
+
+
+def _dispatch_to_pipeline(job: TrackedJob, result: Dict):
+    """Hand terminal statuses back to the Celery pipeline"""
+    from app.tasks.video_generation import apply_sora_status_task
+    apply_sora_status_task.delay(job.video_id, result)
+
+
+def _render_estimate(job: TrackedJob, result: Dict):
+    """Render ETA of a job from Sora's progress and the shared stage timings"""
+    from app.services.stage_timings import stage_timings
+
+    elapsed = (datetime.utcnow() - job.submitted_at).total_seconds() if job.submitted_at else 0
+    return elapsed, stage_timings.estimate_render(
+        job.model, job.duration, elapsed, result.get("progress"), job.provider
+    )
+
+
+def _publish_progress(job: TrackedJob, result: Dict):
+    """Push Sora's progress and the ETA to the video's SSE channel (the row is updated on the next sync)"""
+    from app.utils.sse_logger import send_sse_log
+
+    elapsed, render_estimate = _render_estimate(job, result)
+    values = {"id": job.video_id, "sora_last_status": result.get("status")}
+    finish_at = render_estimate.finish_at()
+    if finish_at:
+        values["estimated_finish_at"] = finish_at
+    with _progress_lock:
+        _progress_updates[job.video_id] = values
+
+    send_sse_log(
+        job.video_id,
+        5,
+        f"⏳ Processing video... ({int(elapsed)}s elapsed)",
+        progress=render_estimate.display_progress,
+        **render_estimate.event_fields(),
+    )
+
+
+def _next_poll_delay(job: TrackedJob, result: Dict) -> float:
+    """Space checks by the job's remaining render time"""
+    return _render_estimate(job, result)[1].next_poll_seconds
+
+
+async def run_poller():
+    """Entry point for the dedicated poller process"""
+    client = None
+    if not settings.USE_MOCK_SORA:
+        from openai import AsyncOpenAI
+        # Failed checks are re-scheduled by the poller, not retried by the SDK
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+
+    from app.services.sora_rate_limiter import sora_rate_limiter
+
+    poller = SoraJobPoller(client=client, rate_limiter=sora_rate_limiter, poll_delay=_next_poll_delay)
+    for status in SoraJobPoller.TERMINAL_STATUSES:
+        poller.on(status, lambda job, result: asyncio.to_thread(_dispatch_to_pipeline, job, result))
+    poller.on("progress", lambda job, result: asyncio.to_thread(_publish_progress, job, result))
+
+    async def refresh_loop():
+        while True:
+            try:
+                await sync_jobs_from_db(poller)
+            except Exception as e:
+                print(f"⚠️  [SoraPoller] Failed to load jobs from database: {e}")
+            await asyncio.sleep(settings.SORA_POLLER_REFRESH_SECONDS)
+
+    await asyncio.gather(poller.run(), refresh_loop())
+
+
+if __name__ == "__main__":
+    asyncio.run(run_poller())
@@ -0,0 +1,174 @@
+"""
+Cluster-wide Sora rate limiter and concurrency governor
+
+Every worker used to call videos.create / videos.retrieve on its own, so
+scaling workers out turned into OpenAI 429s, failed videos and 60s retry
+countdowns. All workers (and the dedicated poller) now go through two shared
+limits per model, kept in Redis and checked by one atomic Lua script:
+
+    token bucket  - SORA_REQUESTS_PER_MINUTE, bursts up to SORA_REQUEST_BURST
+                    (one token per submit and per status check)
+    in-flight set - at most SORA_MAX_IN_FLIGHT rendering jobs; a ZSET of
+                    video IDs scored by lease expiry, so slots of crashed
+                    workers free themselves
+
+A denied caller gets a retry delay and re-schedules itself (cooperative
+waiting) instead of failing the video. If Redis is unreachable the limiter
+fails open: rate limiting must not stop generation.
+"""
+import logging
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+
+from app.core.clients import redis_control_client
+from app.core.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] token bucket hash, KEYS[2] in-flight ZSET
+# ARGV: tokens per second, burst, max in flight, member, lease seconds, need slot (1/0)
+# Returns {allowed, retry after ms}; retry after -1 means "no in-flight slot"
+ACQUIRE_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_in_flight = tonumber(ARGV[3])
+local member = ARGV[4]
+local lease = tonumber(ARGV[5])
+local need_slot = ARGV[6] == '1'
+
+local holds_slot = false
+if member ~= '' then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    holds_slot = redis.call('ZSCORE', KEYS[2], member) ~= false
+end
+
+if need_slot and not holds_slot and max_in_flight > 0
+        and redis.call('ZCARD', KEYS[2]) >= max_in_flight then
+    return {0, -1}
+end
+
+if rate > 0 then
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+    if tokens < 1 then
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        return {0, math.ceil((1 - tokens) / rate * 1000)}
+    end
+
+    redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+end
+
+if member ~= '' and (need_slot or holds_slot) then
+    redis.call('ZADD', KEYS[2], now + lease, member)
+end
+
+return {1, 0}
+"""
+
+
+@dataclass
+class RateDecision:
+    """Outcome of a limiter check"""
+    allowed: bool
+    retry_after: float = 0.0  # Seconds to wait before trying again
+    reason: Optional[str] = None  # "rate" or "in_flight" when denied
+
+
+class SoraRateLimiter:
+    """Distributed token bucket + in-flight semaphore per Sora model"""
+
+    def __init__(self):
+        self._acquire = None
+
+    def _client(self) -> redis.Redis:
+        client = redis_control_client.get()
+        if self._acquire is None:
+            self._acquire = client.register_script(ACQUIRE_SCRIPT)
+        return client
+
+    @staticmethod
+    def _keys(model: str):
+        # Hash tag keeps both keys of a model in one Redis Cluster slot
+        return f"sora:limit:{{{model}}}:bucket", f"sora:limit:{{{model}}}:in_flight"
+
+    def _check(self, op: str, model: str, video_id: Optional[int], need_slot: bool) -> RateDecision:
+        if not settings.SORA_RATE_LIMIT_ENABLED:
+            return RateDecision(True)
+
+        rpm = settings.SORA_REQUESTS_PER_MINUTE.get(model, 0)
+        burst = settings.SORA_REQUEST_BURST.get(model, max(1, rpm // 6))
+        max_in_flight = settings.SORA_MAX_IN_FLIGHT.get(model, 0)
+
+        try:
+            client = self._client()
+            allowed, retry_ms = self._acquire(
+                client=client,
+                keys=self._keys(model),
+                args=[
+                    rpm / 60.0,
+                    burst,
+                    max_in_flight,
+                    "" if video_id is None else str(video_id),
+                    settings.SORA_IN_FLIGHT_LEASE_SECONDS,
+                    1 if need_slot else 0,
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Sora rate limiter unavailable, allowing {op}: {e}")
+            return RateDecision(True)
+
+        if allowed:
+            return RateDecision(True)
+
+        if int(retry_ms) < 0:
+            reason, wait = "in_flight", float(settings.SORA_IN_FLIGHT_RETRY_SECONDS)
+        else:
+            reason, wait = "rate", int(retry_ms) / 1000.0
+
+        metrics.incr("sora_throttled_total", model=model, op=op, reason=reason)
+        # Jitter so workers denied together don't all come back together
+        return RateDecision(False, retry_after=round(wait * (1 + random.random() * 0.2), 2) or 1.0, reason=reason)
+
+    def acquire_submit(self, model: str, video_id: int) -> RateDecision:
+        """
+        Take a request token and an in-flight slot before videos.create
+
+        A video that already holds a slot (resubmits) only needs a token.
+        """
+        return self._check("submit", model, video_id, need_slot=True)
+
+    def acquire_poll(self, model: str, video_id: Optional[int] = None) -> RateDecision:
+        """Take a request token before videos.retrieve (also renews the video's slot lease)"""
+        return self._check("poll", model, video_id, need_slot=False)
+
+    def release(self, model: str, video_id: int):
+        """Free the video's in-flight slot once its job finished rendering (or was abandoned)"""
+        if not settings.SORA_RATE_LIMIT_ENABLED:
+            return
+        try:
+            self._client().zrem(self._keys(model)[1], str(video_id))
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to release Sora slot of video {video_id}: {e}")
+
+    def in_flight(self, model: str) -> int:
+        """Jobs currently holding a slot (expired leases included until the next acquire)"""
+        try:
+            return self._client().zcard(self._keys(model)[1])
+        except Exception:
+            return 0
+
+
+# Global Sora rate limiter instance
+sora_rate_limiter = SoraRateLimiter()
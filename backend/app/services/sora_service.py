@@ -5,27 +5,37 @@ This service provides image-to-video generation using OpenAI's Sora 2 API.
 """
 import asyncio
 import base64
+import logging
 import time
-import os
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional, Tuple
 import httpx
-from openai import OpenAI
-import requests
+from openai import OpenAI, NotFoundError
 from pathlib import Path
 
+from app.core.clients import openai_client
 from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+from app.services.resilience import TERMINAL, circuit_breaker, classify_error, resilient_call
+from app.services.stage_timings import stage_timings
+from app.utils.range_downloader import range_downloader
+
+logger = logging.getLogger(__name__)
 
 
 class SoraVideoGenerator:
     """OpenAI Sora 2 Image-to-Video Generator"""
 
     def __init__(self):
-        """Initialize Sora service with OpenAI API key"""
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """Initialize Sora service settings (the OpenAI client is shared per process)"""
         self.model = "sora-2"  # Valid models: 'sora-2' or 'sora-2-pro'
         self.duration = 8  # Valid durations: 4, 8, or 12 seconds
         # Resolution will be determined from input image dimensions
 
+    @property
+    def client(self) -> OpenAI:
+        """Process-wide OpenAI client (app.core.clients)"""
+        return openai_client.get()
+
     async def download_image_as_base64(self, image_url: str) -> str:
         """
         Download image from URL and encode to base64
@@ -48,6 +58,24 @@ class SoraVideoGenerator:
         encoded_image = base64.b64encode(image_bytes).decode("utf-8")
         return encoded_image
 
+    def download_image_bytes(self, image_url: str) -> bytes:
+        """
+        Download image from URL (blocking variant for Celery stage tasks)
+
+        Args:
+            image_url: URL of the image to download
+
+        Returns:
+            Raw image bytes
+
+        Raises:
+            httpx.HTTPError: If image download fails
+        """
+        with httpx.Client() as client:
+            response = client.get(image_url, timeout=30.0)
+            response.raise_for_status()
+            return response.content
+
     def encode_local_image_to_base64(self, image_path: str) -> str:
         """
         Read local image file and encode to base64
@@ -105,6 +133,112 @@ class SoraVideoGenerator:
 
         return resolution
 
+    def prepare_reference_image(self, image_url: str) -> Tuple[bytes, str]:
+        """
+        Load reference image and verify it matches a Sora-compatible resolution
+
+        Args:
+            image_url: URL or local path to source image
+
+        Returns:
+            Tuple of (image_bytes, resolution)
+
+        Raises:
+            ValueError: If image dimensions don't match the target resolution
+        """
+        if image_url.startswith("http"):
+            print(f"📥 Downloading image from: {image_url}")
+            image_bytes = self.download_image_bytes(image_url)
+        else:
+            print(f"📂 Reading local image: {image_url}")
+            image_bytes = base64.b64decode(self.encode_local_image_to_base64(image_url))
+
+        # Detect resolution from image dimensions
+        resolution = self.detect_resolution_from_image(image_bytes)
+
+        # 🔥 CRITICAL: Verify image dimensions match target resolution
+        from PIL import Image
+        from io import BytesIO
+        img = Image.open(BytesIO(image_bytes))
+        actual_width, actual_height = img.size
+        target_width, target_height = map(int, resolution.split('x'))
+
+        print(f"🔍 DIMENSION VERIFICATION:")
+        print(f"   Actual image size: {actual_width}x{actual_height}")
+        print(f"   Target Sora size: {target_width}x{target_height}")
+
+        if actual_width != target_width or actual_height != target_height:
+            raise ValueError(
+                f"Image dimensions ({actual_width}x{actual_height}) don't match "
+                f"target resolution ({target_width}x{target_height}). "
+                f"Please ensure images are resized correctly before saving."
+            )
+
+        print(f"   ✅ Dimensions match! Safe to proceed.")
+        return image_bytes, resolution
+
+    def submit_generation(
+        self,
+        prompt: str,
+        image_url: str,
+        duration: int = 8,
+        model: Optional[str] = None,
+    ) -> Dict:
+        """
+        Submit a Sora 2 generation job without waiting for it (submit stage)
+
+        Args:
+            prompt: Text description for video generation
+            image_url: URL or local path to source image
+            duration: Duration in seconds (4, 8, or 12)
+            model: Optional model override ('sora-2' or 'sora-2-pro')
+
+        Returns:
+            Dictionary containing:
+            {
+                "job_id": "video_xxx",
+                "status": "queued" | "in_progress",
+                "resolution": "1280x720" | "720x1280"
+            }
+
+        Raises:
+            Exception: If image preparation or API call fails
+        """
+        if duration not in (4, 8, 12):
+            print(f"⚠️  Unsupported duration {duration}s requested, defaulting to 8s")
+            duration = 8
+
+        model = model or self.model
+        image_bytes, resolution = self.prepare_reference_image(image_url)
+
+        print(f"🎬 Submitting Sora 2 video generation...")
+        print(f"   Model: {model}")
+        print(f"   Duration: {duration}s")
+        print(f"   Resolution: {resolution}")
+        print(f"   Prompt: {prompt[:100]}...")
+
+        from io import BytesIO
+        image_file = ("reference_image.jpg", BytesIO(image_bytes), "image/jpeg")
+
+        response = resilient_call(
+            "sora.create",
+            self.client.videos.create,
+            idempotent=False,
+            prompt=prompt,
+            input_reference=image_file,
+            model=model,
+            seconds=str(duration),
+            size=resolution,
+        )
+
+        print(f"✅ Video generation job submitted. Job ID: {response.id}")
+
+        return {
+            "job_id": response.id,
+            "status": response.status,
+            "resolution": resolution,
+        }
+
     async def generate_video(
         self,
         prompt: str,
@@ -152,7 +286,10 @@ class SoraVideoGenerator:
             image_file = ("reference_image.jpg", BytesIO(image_bytes), "image/jpeg")
 
             duration_value = str(self.duration)
-            response = self.client.videos.create(
+            response = resilient_call(
+                "sora.create",
+                self.client.videos.create,
+                idempotent=False,
                 prompt=prompt,
                 input_reference=image_file,
                 model=self.model,
@@ -172,6 +309,39 @@ class SoraVideoGenerator:
             print(f"❌ Error generating video: {e}")
             raise
 
+    @staticmethod
+    def status_from_job(job_status, job_id: str) -> Dict:
+        """
+        Normalize a Sora video job object into a status dict
+
+        Shared by the blocking status check and the async poller.
+
+        Args:
+            job_status: Video object returned by videos.retrieve
+            job_id: Job ID the object belongs to
+
+        Returns:
+            Status dict (see check_generation_status)
+        """
+        result = {
+            "status": job_status.status,
+            "job_id": job_id,
+            "progress": getattr(job_status, "progress", None),
+        }
+
+        if job_status.status == "completed":
+            print(f"✅ Video generation completed! Job ID: {job_id}")
+
+        elif job_status.status == "failed":
+            error_obj = job_status.error
+            if error_obj:
+                result["error_message"] = error_obj.message if hasattr(error_obj, 'message') else str(error_obj)
+            else:
+                result["error_message"] = "Unknown error"
+            print(f"❌ Video generation failed: {result['error_message']}")
+
+        return result
+
     def check_generation_status(self, job_id: str) -> Dict:
         """
         Check video generation status
@@ -182,36 +352,44 @@ class SoraVideoGenerator:
         Returns:
             Dictionary containing:
             {
-                "status": "queued" | "in_progress" | "completed" | "failed",
+                "status": "queued" | "in_progress" | "completed" | "failed"
+                          | "expired" (job no longer exists)
+                          | "error" (status unknown, e.g. network error),
                 "job_id": "video_xxx" (always included),
-                "error_message": "..." (if failed)
+                "progress": 0-100 (if reported by the API),
+                "error_message": "..." (if failed/expired/error),
+                "retry_after": seconds (if error, when to check again)
             }
+
+        Note: "error" means the job itself may still be fine - callers should
+        check again later rather than submitting a new job. Transient errors
+        are retried with backoff first (see app.services.resilience).
         """
         try:
-            job_status = self.client.videos.retrieve(job_id)
+            job_status = resilient_call("sora.retrieve", self.client.videos.retrieve, job_id)
+            return self.status_from_job(job_status, job_id)
 
-            result = {
-                "status": job_status.status,
+        except NotFoundError as e:
+            print(f"❌ Sora job not found (expired?): {job_id}")
+            return {
+                "status": "expired",
                 "job_id": job_id,
+                "error_message": f"Sora job {job_id} no longer exists: {e}",
             }
 
-            if job_status.status == "completed":
-                print(f"✅ Video generation completed! Job ID: {job_id}")
-
-            elif job_status.status == "failed":
-                error_obj = job_status.error
-                if error_obj:
-                    result["error_message"] = error_obj.message if hasattr(error_obj, 'message') else str(error_obj)
-                else:
-                    result["error_message"] = "Unknown error"
-                print(f"❌ Video generation failed: {result['error_message']}")
-
-            return result
+        except CircuitOpenException as e:
+            return {
+                "status": "error",
+                "job_id": job_id,
+                "error_message": e.message,
+                "retry_after": e.retry_after,
+            }
 
         except Exception as e:
-            print(f"❌ Error checking status: {e}")
+            print(f"❌ Error checking status ({classify_error(e)}): {e}")
             return {
-                "status": "failed",
+                "status": "error",
+                "job_id": job_id,
                 "error_message": str(e),
             }
 
@@ -227,27 +405,83 @@ class SoraVideoGenerator:
             Local file path
 
         Raises:
-            requests.HTTPError: If download fails
+            httpx.HTTPStatusError: If download fails
         """
         print(f"📥 Downloading video from: {video_url}")
         print(f"💾 Saving to: {output_path}")
 
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # Parallel byte ranges (single stream if the server doesn't support them)
+        range_downloader.download(video_url, output_path)
+        return output_path
 
-        # Download video
-        response = requests.get(video_url, stream=True, timeout=300)
-        response.raise_for_status()
+    def download_generated_video(self, job_id: str, output_filename: str) -> str:
+        """
+        Download a completed Sora job's video content (download stage)
 
-        # Save to file
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        Args:
+            job_id: Completed job ID
+            output_filename: Filename under VIDEO_OUTPUT_DIR (e.g., "user_1_video_2.mp4")
 
-        file_size = os.path.getsize(output_path)
-        print(f"✅ Video downloaded successfully ({file_size / 1024 / 1024:.2f} MB)")
+        Returns:
+            Local file path
+        """
+        output_dir = Path(settings.VIDEO_OUTPUT_DIR)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / output_filename
 
-        return output_path
+        print(f"📥 Downloading video content for job: {job_id}")
+        print(f"💾 Saving to: {output_path}")
+
+        # Same endpoint as client.videos.download_content, fetched in parallel byte ranges
+        content_url = str(self.client.base_url.join(f"videos/{job_id}/content"))
+        try:
+            # The range downloader retries each range itself; one attempt here feeds the breaker
+            resilient_call(
+                "sora.content",
+                range_downloader.download,
+                max_attempts=1,
+                url=content_url,
+                output_path=str(output_path),
+                headers={"Authorization": f"Bearer {self.client.api_key}"},
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise NotFoundError(
+                    f"Sora job {job_id} content not found",
+                    response=e.response,
+                    body=None,
+                ) from e
+            raise
+
+        return str(output_path)
+
+    def stream_generated_video(self, job_id: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Stream a completed Sora job's video content chunk by chunk
+
+        Unlike download_generated_video, nothing is buffered in memory or
+        written to disk; the caller pipes the chunks to their destination.
+
+        Args:
+            job_id: Completed job ID
+            chunk_size: Bytes per yielded chunk
+
+        Yields:
+            Video content chunks
+        """
+        retry_after = circuit_breaker.open_for("sora.content")
+        if retry_after:
+            raise CircuitOpenException("sora.content", retry_after=int(retry_after) + 1)
+
+        print(f"📥 Streaming video content for job: {job_id}")
+
+        try:
+            with self.client.videos.with_streaming_response.download_content(job_id) as response:
+                yield from response.iter_bytes(chunk_size)
+        except Exception as e:
+            if classify_error(e) != TERMINAL:
+                circuit_breaker.record_failure("sora.content")
+            raise
 
     async def generate_and_wait(
         self,
@@ -307,46 +541,12 @@ class SoraVideoGenerator:
             if logger:
                 logger.publish(2, "📸 Downloading and processing reference image...")
 
-            if image_url.startswith("http"):
-                print(f"📥 Downloading image from: {image_url}")
-                encoded_image = await self.download_image_as_base64(image_url)
-            else:
-                print(f"📂 Reading local image: {image_url}")
-                encoded_image = self.encode_local_image_to_base64(image_url)
-
-            # Detect resolution from image dimensions
-            image_bytes = base64.b64decode(encoded_image)
-            resolution = self.detect_resolution_from_image(image_bytes)
-
-            # 🔥 CRITICAL: Verify image dimensions match target resolution
-            from PIL import Image
-            from io import BytesIO
-            img = Image.open(BytesIO(image_bytes))
-            actual_width, actual_height = img.size
-            target_resolution = resolution  # e.g., "1280x720" or "720x1280"
-            target_width, target_height = map(int, target_resolution.split('x'))
-
-            print(f"🔍 DIMENSION VERIFICATION:")
-            print(f"   Actual image size: {actual_width}x{actual_height}")
-            print(f"   Target Sora size: {target_width}x{target_height}")
-
-            if actual_width != target_width or actual_height != target_height:
-                error_msg = (
-                    f"❌ IMAGE DIMENSION MISMATCH!\n"
-                    f"   Actual: {actual_width}x{actual_height}\n"
-                    f"   Expected: {target_width}x{target_height}\n"
-                    f"   This will cause Sora API 400 error!"
-                )
-                print(error_msg)
+            try:
+                image_bytes, resolution = await asyncio.to_thread(self.prepare_reference_image, image_url)
+            except ValueError as e:
                 if logger:
-                    logger.publish_error(error_msg)
-                raise ValueError(
-                    f"Image dimensions ({actual_width}x{actual_height}) don't match "
-                    f"target resolution ({target_width}x{target_height}). "
-                    f"Please ensure images are resized correctly before saving."
-                )
-
-            print(f"   ✅ Dimensions match! Safe to proceed.")
+                    logger.publish_error(str(e))
+                raise
 
             if logger:
                 logger.publish(2, f"✅ Image processed ({resolution})")
@@ -364,10 +564,15 @@ class SoraVideoGenerator:
             # Call OpenAI Sora 2 API
             # Create a tuple with (filename, file_content, mime_type)
             # OpenAI expects this format for file uploads
+            from io import BytesIO
             image_file = ("reference_image.jpg", BytesIO(image_bytes), "image/jpeg")
 
             duration_value = str(duration)
-            response = self.client.videos.create(
+            response = await asyncio.to_thread(
+                resilient_call,
+                "sora.create",
+                self.client.videos.create,
+                idempotent=False,
                 prompt=prompt,
                 input_reference=image_file,
                 model=self.model,
@@ -386,8 +591,6 @@ class SoraVideoGenerator:
                 logger.publish(4, "⏳ Waiting for AI processing (this may take 2-5 minutes)...")
 
             start_time = time.time()
-            poll_interval = 10  # Check every 10 seconds
-            poll_count = 0
 
             print(f"⏳ Waiting for video generation (max {max_wait_seconds}s)...")
 
@@ -405,41 +608,19 @@ class SoraVideoGenerator:
                         "error_message": error_msg,
                     }
 
-                # Check status
-                status_result = self.check_generation_status(job_id)
-                poll_count += 1
+                # Check status (blocking SDK call runs off the event loop)
+                status_result = await asyncio.to_thread(self.check_generation_status, job_id)
 
                 if status_result["status"] == "completed":
+                    stage_timings.record("render", self.model, duration, time.time() - start_time)
+
                     # Success! Download video using OpenAI SDK
                     if logger:
                         logger.publish(6, f"💾 Downloading generated video (Job ID: {job_id[:16]}...)...")
 
-                    output_dir = Path(settings.VIDEO_OUTPUT_DIR)
-                    output_dir.mkdir(parents=True, exist_ok=True)
-                    output_path = output_dir / output_filename
-
-                    # Use OpenAI SDK's download_content method
-                    print(f"📥 Downloading video content for job: {job_id}")
-                    print(f"💾 Saving to: {output_path}")
-
-                    video_content = self.client.videos.download_content(job_id)
-
-                    # Save streaming content to file
-                    # download_content returns HttpxBinaryResponseContent (streaming object)
-                    with open(output_path, "wb") as f:
-                        if hasattr(video_content, 'read'):
-                            # Stream has read() method
-                            f.write(video_content.read())
-                        elif hasattr(video_content, 'iter_bytes'):
-                            # Stream has iter_bytes() method
-                            for chunk in video_content.iter_bytes():
-                                f.write(chunk)
-                        else:
-                            # Fallback: try direct write (if it's bytes)
-                            f.write(video_content)
-
-                    file_size = os.path.getsize(output_path)
-                    print(f"✅ Video downloaded successfully ({file_size / 1024 / 1024:.2f} MB)")
+                    output_path = await asyncio.to_thread(
+                        self.download_generated_video, job_id, output_filename
+                    )
 
                     if logger:
                         logger.publish(7, "📦 Saving video to storage...")
@@ -455,7 +636,7 @@ class SoraVideoGenerator:
                         "video_url": video_url_relative,
                     }
 
-                elif status_result["status"] == "failed":
+                elif status_result["status"] in ("failed", "expired"):
                     # Failed
                     error_msg = status_result.get("error_message", "Unknown error")
                     print(f"❌ Video generation failed: {error_msg}")
@@ -468,16 +649,20 @@ class SoraVideoGenerator:
                         "error_message": error_msg,
                     }
 
-                # Still processing
-                progress = min(90, 30 + poll_count * 2)  # Simulate progress 30% -> 90%
+                # Still processing: Sora's progress plus the ETA from stage timings
+                render_estimate = await asyncio.to_thread(
+                    stage_timings.estimate_render, self.model, duration, elapsed, status_result.get("progress")
+                )
                 status_msg = f"⏳ Processing video... ({int(elapsed)}s elapsed)"
 
-                print(f"{status_msg} - Status: {status_result['status']}")
+                print(f"{status_msg} - Status: {status_result['status']}, progress: {render_estimate.progress}")
 
                 if logger:
-                    logger.publish_progress(5, status_msg, progress)
+                    logger.publish_progress(
+                        5, status_msg, render_estimate.display_progress, **render_estimate.event_fields()
+                    )
 
-                time.sleep(poll_interval)
+                await asyncio.sleep(render_estimate.next_poll_seconds)
 
         except Exception as e:
             import traceback
@@ -503,12 +688,7 @@ class SoraVideoGenerator:
 if settings.USE_MOCK_SORA:
     from app.services.mock_sora_service import mock_sora_service
     sora_service = mock_sora_service
-    print("\n" + "="*60)
-    print("⚠️  USING MOCK SORA SERVICE FOR TESTING")
-    print("   Set USE_MOCK_SORA=false in config to use real OpenAI API")
-    print("="*60 + "\n")
+    logger.warning("⚠️  Using MOCK Sora service (set USE_MOCK_SORA=false to use the real OpenAI API)")
 else:
     sora_service = SoraVideoGenerator()
-    print("\n" + "="*60)
-    print("✅ USING REAL OPENAI SORA 2 SERVICE")
-    print("="*60 + "\n")
+    logger.info("✅ Using real OpenAI Sora 2 service")
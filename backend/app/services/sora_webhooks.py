@@ -0,0 +1,81 @@
+"""
+Sora job events delivered by OpenAI webhooks
+
+With SORA_WEBHOOKS_ENABLED, OpenAI posts video.completed / video.failed
+events to POST /api/v1/webhooks/sora as soon as a render finishes. The
+event's job ID is mapped to its Video through the indexed sora_job_id column
+and the terminal status is handed to apply_sora_status_task, which moves the
+video to the download stage (or re-submits it) exactly like a status check
+would have. Status checks then only run every
+SORA_WEBHOOK_SAFETY_POLL_SECONDS as a safety net for lost deliveries.
+
+Deliveries are at-least-once; duplicates and events for videos that polling
+already advanced are dropped by the stage check.
+"""
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.video import GenerationStage, Video, VideoStatus
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Webhook event type -> job status understood by the pipeline
+EVENT_STATUSES = {
+    "video.completed": "completed",
+    "video.failed": "failed",
+}
+
+
+def status_from_event(event: Dict) -> Optional[Dict]:
+    """
+    Pipeline status dict for a webhook event
+
+    Returns:
+        {"status", "job_id", ...} or None for event types we don't handle
+    """
+    job_status = EVENT_STATUSES.get(event.get("type"))
+    job_id = (event.get("data") or {}).get("id")
+    if not job_status or not job_id:
+        return None
+
+    status_result = {"status": job_status, "job_id": job_id, "source": "webhook"}
+    if job_status == "failed":
+        error = (event.get("data") or {}).get("error") or {}
+        status_result["error_message"] = error.get("message") or "Sora reported the job as failed"
+    return status_result
+
+
+def handle_event(db: Session, event: Dict) -> str:
+    """
+    Hand a verified Sora event to the generation pipeline
+
+    Args:
+        db: Database session
+        event: Parsed webhook body
+
+    Returns:
+        "queued", "ignored" (event type), "unknown_job" or "stale"
+        (video no longer waiting for its render)
+    """
+    event_type = event.get("type", "unknown")
+    status_result = status_from_event(event)
+
+    if status_result is None:
+        result = "ignored"
+    else:
+        video = db.query(Video).filter(Video.sora_job_id == status_result["job_id"]).first()
+        if video is None:
+            result = "unknown_job"
+        elif video.status != VideoStatus.PROCESSING or video.generation_stage != GenerationStage.POLL.value:
+            result = "stale"
+        else:
+            from app.tasks.video_generation import apply_sora_status_task
+            apply_sora_status_task.delay(video.id, status_result)
+            result = "queued"
+            logger.info(f"🔔 [Sora Webhook] {event_type} for video {video.id} ({status_result['job_id']})")
+
+    metrics.incr("sora_webhook_events_total", type=event_type, result=result)
+    return result
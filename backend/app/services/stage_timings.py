@@ -0,0 +1,247 @@
+"""
+Per-stage pipeline timings and render ETA
+
+Every stage of a video records how long it took, keyed by (stage, model,
+duration):
+
+    queue    - queued_at until the submit stage claimed the video
+    submit   - videos.create call
+    render   - Sora job submitted until a status check saw it completed
+    download - fetching the rendered file (or streaming it into GCS)
+    process  - metadata, faststart and poster
+    upload   - pushing the file to GCS
+
+Each key keeps P² estimators of the median, p90 and p95 (app.utils.estimators)
+in the Redis hash STAGE_TIMINGS_KEY, so all workers and the poller share one
+model of how long things take. From those and the progress Sora reports,
+estimate_render() derives the remaining time of a rendering job, which is
+sent with every SSE progress event and sets the next status check: sparse
+while completion is far off, dense around the expected finish.
+
+Redis errors are logged and ignored; without history the pipeline falls back
+to SORA_POLL_INTERVAL_SECONDS.
+"""
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import redis
+
+from app.core.clients import redis_control_client
+from app.core.config import settings
+from app.utils import metrics
+from app.utils.estimators import P2Quantile
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("queue", "submit", "render", "download", "process", "upload")
+POST_RENDER_STAGES = ("download", "process", "upload")
+QUANTILES = (0.5, 0.9, 0.95)
+MIN_SAMPLES = 5  # Observations before a key is used for estimates
+CACHE_TTL_SECONDS = 30  # Quantiles are re-read from Redis at most this often
+UPDATE_ATTEMPTS = 3  # Optimistic-lock retries when workers update one key at once
+
+STAGE_TIMINGS_KEY = "stage_timings"
+
+# Stage duration histogram buckets (seconds)
+STAGE_BUCKETS = (1, 5, 15, 30, 60, 120, 180, 240, 300, 450, 600, 900, 1200)
+
+
+@dataclass
+class RenderEstimate:
+    """Where a rendering job stands and when it should finish"""
+    progress: Optional[int]  # Sora's own progress (0-100), if reported
+    display_progress: int  # Progress for the SSE bar (30% -> 90% while rendering)
+    render_remaining: Optional[float]  # Seconds until the render completes
+    eta_seconds: Optional[float]  # Seconds until the video is uploaded
+    next_poll_seconds: float  # When to check the job again
+
+    def finish_at(self) -> Optional[datetime]:
+        """Estimated completion time of the whole video (UTC)"""
+        if self.eta_seconds is None:
+            return None
+        return datetime.utcnow() + timedelta(seconds=self.eta_seconds)
+
+    def event_fields(self) -> Dict:
+        """Extra fields for the SSE progress event"""
+        finish_at = self.finish_at()
+        return {
+            "sora_progress": self.progress,
+            "eta_seconds": None if self.eta_seconds is None else int(self.eta_seconds),
+            "estimated_finish_at": finish_at.isoformat() if finish_at else None,
+        }
+
+
+def _field(stage: str, model: str, duration: Optional[int]) -> str:
+    return f"{stage}:{model}:{duration or 0}"
+
+
+class StageTimings:
+    """Shared P² estimators of stage durations"""
+
+    def __init__(self, key: str = STAGE_TIMINGS_KEY):
+        self.key = key
+        self._cache: Dict[str, Tuple[float, Dict[float, float]]] = {}
+
+    def _client(self) -> redis.Redis:
+        return redis_control_client.get()
+
+    def record(self, stage: str, model: str, duration: Optional[int], seconds: float):
+        """
+        Add one observed stage duration
+
+        Args:
+            stage: One of STAGES
+            model: Provider model ID (e.g., "sora-2", "gen4_turbo")
+            duration: Video duration in seconds
+            seconds: How long the stage took
+        """
+        seconds = max(float(seconds), 0.0)
+        metrics.observe("video_stage_seconds", seconds, STAGE_BUCKETS, stage=stage, model=model)
+
+        field = _field(stage, model, duration)
+        try:
+            client = self._client()
+            for _ in range(UPDATE_ATTEMPTS):
+                with client.pipeline() as pipe:
+                    try:
+                        pipe.watch(self.key)
+                        raw = pipe.hget(self.key, field)
+                        state = json.loads(raw) if raw else {}
+                        estimators = [
+                            P2Quantile.from_dict(state[str(q)]) if str(q) in state else P2Quantile(q)
+                            for q in QUANTILES
+                        ]
+                        for estimator in estimators:
+                            estimator.add(seconds)
+                        pipe.multi()
+                        pipe.hset(self.key, field, json.dumps({str(e.p): e.to_dict() for e in estimators}))
+                        pipe.execute()
+                        return
+                    except redis.WatchError:
+                        continue
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to record {stage} timing ({seconds:.1f}s): {e}")
+
+    def _estimates(self, stage: str, model: str, duration: Optional[int]) -> Dict[float, float]:
+        """Quantile -> value for estimators with MIN_SAMPLES, cached for CACHE_TTL_SECONDS"""
+        field = _field(stage, model, duration)
+        cached = self._cache.get(field)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        values = {}
+        try:
+            raw = self._client().hget(self.key, field)
+            state = json.loads(raw) if raw else {}
+            for q in QUANTILES:
+                if str(q) in state:
+                    estimator = P2Quantile.from_dict(state[str(q)])
+                    if estimator.count >= MIN_SAMPLES:
+                        values[q] = estimator.value()
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to read {stage} timings: {e}")
+
+        self._cache[field] = (time.monotonic() + CACHE_TTL_SECONDS, values)
+        return values
+
+    def quantiles(self, stage: str, model: str, duration: Optional[int]) -> Optional[Tuple[float, float]]:
+        """Median and p90 of a stage (None until MIN_SAMPLES were recorded)"""
+        values = self._estimates(stage, model, duration)
+        if 0.5 not in values or 0.9 not in values:
+            return None
+        return values[0.5], values[0.9]
+
+    def p95(self, stage: str, model: str, duration: Optional[int]) -> Optional[float]:
+        """95th percentile of a stage (None until MIN_SAMPLES were recorded)"""
+        return self._estimates(stage, model, duration).get(0.95)
+
+    def estimate_render(
+        self,
+        model: str,
+        duration: Optional[int],
+        elapsed: float,
+        progress: Optional[int] = None,
+        provider: Optional[str] = None,
+    ) -> RenderEstimate:
+        """
+        Remaining time of a rendering job and when to check it next
+
+        Args:
+            model: Provider model ID (e.g., "sora-2", "gen4_turbo")
+            duration: Video duration in seconds
+            elapsed: Seconds since the job was submitted
+            progress: Progress reported by Sora (0-100), if any
+            provider: Video provider of the job (None = sora)
+
+        Returns:
+            RenderEstimate
+        """
+        elapsed = max(elapsed, 0.0)
+        if progress is not None:
+            progress = max(0, min(100, int(progress)))
+
+        # Extrapolate Sora's own progress, and compare against history
+        by_progress = elapsed * (100 - progress) / progress if progress and progress < 100 else None
+        by_history = None
+        render = self.quantiles("render", model, duration)
+        if render:
+            median, p90 = render
+            if elapsed < median:
+                by_history = median - elapsed
+            elif elapsed < p90:
+                by_history = p90 - elapsed
+
+        estimates = [e for e in (by_progress, by_history) if e is not None]
+        remaining = sum(estimates) / len(estimates) if estimates else None
+
+        eta = None
+        if remaining is not None:
+            eta = remaining
+            for stage in POST_RENDER_STAGES:
+                post = self.quantiles(stage, model, duration)
+                if post:
+                    eta += post[0]
+
+        if progress is not None:
+            display_progress = 30 + progress * 60 // 100
+        elif remaining is not None and elapsed + remaining > 0:
+            display_progress = 30 + int(60 * elapsed / (elapsed + remaining))
+        else:
+            display_progress = 30
+
+        return RenderEstimate(
+            progress=progress,
+            display_progress=min(display_progress, 90),
+            render_remaining=remaining,
+            eta_seconds=eta,
+            next_poll_seconds=self.next_poll_delay(remaining, provider),
+        )
+
+    @staticmethod
+    def next_poll_delay(render_remaining: Optional[float], provider: Optional[str] = None) -> float:
+        """
+        Seconds until the next status check of a rendering job
+
+        A fixed share (SORA_POLL_ETA_FRACTION) of the remaining render time,
+        bounded by SORA_POLL_MIN_SECONDS / SORA_POLL_MAX_SECONDS, so checks
+        close in on the expected finish. Unknown or overdue jobs are checked
+        every SORA_POLL_INTERVAL_SECONDS. With Sora webhooks enabled, checks
+        of Sora jobs are only a safety net every SORA_WEBHOOK_SAFETY_POLL_SECONDS;
+        other providers (and the mock service) send no webhooks and keep
+        being polled.
+        """
+        receives_webhooks = (provider or "sora") == "sora" and not settings.USE_MOCK_SORA
+        if settings.SORA_WEBHOOKS_ENABLED and receives_webhooks:
+            return float(settings.SORA_WEBHOOK_SAFETY_POLL_SECONDS)
+        if not settings.SORA_POLL_ETA_ENABLED or render_remaining is None:
+            return float(settings.SORA_POLL_INTERVAL_SECONDS)
+        delay = render_remaining * settings.SORA_POLL_ETA_FRACTION
+        return float(min(max(delay, settings.SORA_POLL_MIN_SECONDS), settings.SORA_POLL_MAX_SECONDS))
+
+
+# Global stage timings instance
+stage_timings = StageTimings()
@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 
 from app.core.stripe_config import stripe_config
 from app.models.user import User
+from app.services import credit_ledger
 from app.core.config import settings
 
 # Initialize Stripe with secret key
@@ -166,7 +167,7 @@ class StripeService:
                 # One-time credits purchase
                 credits_to_add = 1000
                 old_credits = float(user.credits)
-                user.credits = old_credits + credits_to_add
+                credit_ledger.grant(db, user, credits_to_add, reason="purchase")
 
                 print(f"   💰 Adding {credits_to_add} credits")
                 print(f"   Credits before: {old_credits}")
@@ -0,0 +1,221 @@
+"""
+Batch variant generation: several cuts of one product image in one request
+
+POST /api/v1/videos/generate-batch takes one image, one script and a list
+of variant specs (duration, orientation, model). The image is read and
+validated once and resized once per distinct orientation; subscription,
+total credits and admission control are checked for the whole batch before
+any video is created, and the variants and their credit reservations are
+committed in one transaction, so a batch is accepted or rejected as a unit. Each
+variant then becomes an ordinary video (its own Sora job through the staged
+pipeline) tagged with the batch ID.
+
+Progress is aggregated per batch: GET /videos/batches/{batch_id} returns a
+summary and /videos/batches/{batch_id}/stream multiplexes the SSE channels
+of all variants into one stream, adding the batch's overall progress to
+every event.
+"""
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import InsufficientCreditsException, NotFoundException
+from app.models.user import User
+from app.models.video import GenerationStage, Video, VideoStatus
+from app.schemas.video import VideoGenerateRequest, VideoVariantSpec
+from app.services import admission, queue_lanes, video_service
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Progress shown for a PROCESSING video until its first event arrives
+STAGE_PROGRESS = {
+    GenerationStage.SUBMIT.value: 10,
+    GenerationStage.POLL.value: 30,
+    GenerationStage.DOWNLOAD.value: 90,
+    GenerationStage.PROCESS.value: 93,
+    GenerationStage.UPLOAD.value: 95,
+}
+
+
+def create_video_batch(
+    db: Session,
+    user: User,
+    prompt: str,
+    image_urls: Dict[Optional[str], str],
+    variants: List[VideoVariantSpec],
+) -> Tuple[str, List[Video], float]:
+    """
+    Create one video per variant, all tagged with a new batch ID
+
+    Args:
+        db: Database session
+        user: User requesting the videos
+        prompt: Script shared by all variants
+        image_urls: Stored image URL per variant orientation (None = as uploaded)
+        variants: Variant specs
+
+    Returns:
+        (batch_id, videos, total credits)
+
+    Raises:
+        SubscriptionRequiredException / SubscriptionExpiredException: If any
+            variant needs a subscription the user doesn't have
+        InsufficientCreditsException: If the batch costs more than the balance
+        QueueFullException: If admission control sheds the batch
+    """
+    for variant in variants:
+        video_service.check_subscription(user, variant.model, variant.duration)
+
+    total_credits = sum(video_service.get_credits_cost(v.model, v.duration) for v in variants)
+    if user.credits < total_credits:
+        raise InsufficientCreditsException(
+            f"Insufficient credits. Required: {total_credits} for {len(variants)} variants, "
+            f"Available: {user.credits}"
+        )
+
+    if settings.ADMISSION_CONTROL_ENABLED:
+        admission.admit(db, queue_lanes.lane_for_user(user), variants[0].model, variants[0].duration)
+
+    batch_id = uuid.uuid4().hex
+    try:
+        videos = [
+            video_service.create_video_generation_task(
+                db,
+                user,
+                VideoGenerateRequest(
+                    prompt=prompt,
+                    model=variant.model,
+                    reference_image_url=image_urls[variant.orientation],
+                    duration=variant.duration,
+                ),
+                batch_id=batch_id,
+                admitted=True,
+                commit=False,
+            )
+            for variant in variants
+        ]
+        db.commit()
+    except Exception:
+        # e.g. a concurrent spend made a later reservation fail: no variant is kept
+        db.rollback()
+        raise
+
+    metrics.incr("video_batches_created_total")
+    metrics.incr("video_batch_variants_total", len(videos))
+    logger.info(f"📦 [Batch] {batch_id}: {len(videos)} variants for user {user.id}, {total_credits} credits")
+    return batch_id, videos, total_credits
+
+
+def get_batch_videos(db: Session, batch_id: str, user_id: int) -> List[Video]:
+    """
+    Videos of a batch, in creation order
+
+    Raises:
+        NotFoundException: If the batch doesn't exist or belongs to another user
+    """
+    videos = (
+        db.query(Video)
+        .filter(Video.batch_id == batch_id, Video.user_id == user_id)
+        .order_by(Video.id)
+        .all()
+    )
+    if not videos:
+        raise NotFoundException(f"Batch {batch_id} not found")
+    return videos
+
+
+def video_progress(video: Video) -> int:
+    """Progress (0-100) of a video from its database state"""
+    if video.status in (VideoStatus.COMPLETED, VideoStatus.FAILED):
+        return 100
+    if video.status == VideoStatus.PROCESSING:
+        return STAGE_PROGRESS.get(video.generation_stage, 10)
+    return 0
+
+
+def event_progress(event: Dict, previous: int) -> int:
+    """Progress (0-100) of a video after one of its SSE events"""
+    if event.get("status") in ("completed", "failed") or event.get("step") in (9, -1):
+        return 100
+    if event.get("progress") is not None:
+        return max(previous, int(event["progress"]))
+    return previous
+
+
+def event_finished(event: Dict) -> Optional[str]:
+    """Outcome ("completed" or "failed") if the event ends its video's generation"""
+    if event.get("status") == "completed" or event.get("step") == 9:
+        return "completed"
+    if event.get("status") == "failed" or event.get("step") == -1:
+        return "failed"
+    return None
+
+
+class BatchProgress:
+    """Aggregate progress of a batch, fed with its videos' SSE events"""
+
+    def __init__(self, videos: List[Video]):
+        self.progress = {video.id: video_progress(video) for video in videos}
+        self.outcome = {
+            video.id: video.status.value
+            for video in videos
+            if video.status in (VideoStatus.COMPLETED, VideoStatus.FAILED)
+        }
+
+    def update(self, video_id: int, event: Dict):
+        """Apply one event of a video in the batch"""
+        self.progress[video_id] = event_progress(event, self.progress.get(video_id, 0))
+        outcome = event_finished(event)
+        if outcome:
+            self.outcome[video_id] = outcome
+
+    @property
+    def finished(self) -> bool:
+        return len(self.outcome) == len(self.progress)
+
+    def pending_video_ids(self) -> List[int]:
+        return [video_id for video_id in self.progress if video_id not in self.outcome]
+
+    def snapshot(self) -> Dict:
+        """Batch fields added to every streamed event"""
+        failed = sum(1 for outcome in self.outcome.values() if outcome == "failed")
+        return {
+            "batch_progress": round(sum(self.progress.values()) / len(self.progress)),
+            "batch_completed": len(self.outcome) - failed,
+            "batch_failed": failed,
+            "batch_total": len(self.progress),
+        }
+
+
+def batch_status(videos: List[Video]) -> str:
+    """processing, completed, partial (finished with failures) or failed"""
+    finished = [v for v in videos if v.status in (VideoStatus.COMPLETED, VideoStatus.FAILED)]
+    if len(finished) < len(videos):
+        return "processing"
+    failed = sum(1 for v in videos if v.status == VideoStatus.FAILED)
+    if not failed:
+        return "completed"
+    return "failed" if failed == len(videos) else "partial"
+
+
+def batch_summary(batch_id: str, videos: List[Video]) -> Dict:
+    """Aggregate state of a batch (VideoBatchStatusResponse fields)"""
+    counts = {status: 0 for status in VideoStatus}
+    for video in videos:
+        counts[video.status] += 1
+
+    return {
+        "batch_id": batch_id,
+        "status": batch_status(videos),
+        "progress": round(sum(video_progress(v) for v in videos) / len(videos)),
+        "total": len(videos),
+        "pending": counts[VideoStatus.PENDING],
+        "processing": counts[VideoStatus.PROCESSING],
+        "completed": counts[VideoStatus.COMPLETED],
+        "failed": counts[VideoStatus.FAILED],
+        "videos": videos,
+    }
@@ -0,0 +1,299 @@
+"""
+Video Generation Providers and Routing
+
+Every video backend exposes the same blocking surface the staged pipeline
+uses (submit, status check, download, stream) through a VideoProvider:
+
+    sora    - OpenAI Sora (app.services.sora_service; the mock service
+              when USE_MOCK_SORA is set)
+    runway  - Runway Gen-4 (app.services.runway_service)
+    mock    - the mock Sora service, regardless of USE_MOCK_SORA
+
+The submit stage asks ProviderRouter for a provider per video. Candidates
+are the VIDEO_PROVIDERS that can render the requested model (natively or
+through VIDEO_PROVIDER_SUBSTITUTES) and whose create circuit is not open;
+they are ranked by
+
+    p95 render time x (1 + in-flight jobs / in-flight cap)
+        + cost x VIDEO_ROUTER_SECONDS_PER_DOLLAR
+
+so a slow or saturated provider loses traffic to a healthy one, and cost
+only decides between providers that are otherwise comparable. The chosen
+provider is stored on the video; all later stages talk to that provider.
+"""
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+from app.services.resilience import circuit_breaker
+from app.services.sora_rate_limiter import sora_rate_limiter
+from app.services.stage_timings import stage_timings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER = "sora"
+
+
+class JobNotFoundError(Exception):
+    """The provider no longer knows the job (expired or deleted content)"""
+
+
+class NoProviderError(ValueError):
+    """None of the configured providers can render the requested model"""
+
+
+class VideoProvider:
+    """Common interface of a video generation backend"""
+
+    name = ""
+    models: tuple = ()  # Models rendered natively
+
+    def __init__(self):
+        self._service = None
+
+    def _load_service(self):
+        raise NotImplementedError
+
+    @property
+    def service(self):
+        """Underlying generator, created on first use"""
+        if self._service is None:
+            self._service = self._load_service()
+        return self._service
+
+    def endpoint(self, op: str) -> str:
+        """Circuit breaker name of an operation ("create", "retrieve", "content")"""
+        return f"{self.name}.{op}"
+
+    def provider_model(self, model: str) -> Optional[str]:
+        """Model this provider renders for a requested model (None if unsupported)"""
+        if model in self.models:
+            return model
+        return settings.VIDEO_PROVIDER_SUBSTITUTES.get(self.name, {}).get(model)
+
+    def supports(self, model: str) -> bool:
+        return self.provider_model(model) is not None
+
+    def _is_not_found(self, exc: Exception) -> bool:
+        return False
+
+    # ------------------------------------------------------------------
+    # Pipeline operations
+    # ------------------------------------------------------------------
+
+    def submit(self, prompt: str, image_url: str, duration: int, model: str) -> Dict:
+        """
+        Submit a render without waiting for it
+
+        Returns:
+            {"job_id", "status", "resolution", "duration"} ("duration" is the
+            length actually rendered, which may differ from the request)
+        """
+        result = self.service.submit_generation(
+            prompt=prompt,
+            image_url=image_url,
+            duration=duration,
+            model=self.provider_model(model),
+        )
+        result.setdefault("duration", duration)
+        return result
+
+    def check_status(self, job_id: str) -> Dict:
+        """Job status (shape of SoraVideoGenerator.check_generation_status; never raises)"""
+        return self.service.check_generation_status(job_id)
+
+    def download(self, job_id: str, output_filename: str) -> str:
+        """
+        Download a completed job's video under VIDEO_OUTPUT_DIR
+
+        Raises:
+            JobNotFoundError: If the job's content no longer exists
+        """
+        try:
+            return self.service.download_generated_video(job_id, output_filename)
+        except Exception as e:
+            if self._is_not_found(e):
+                raise JobNotFoundError(str(e)) from e
+            raise
+
+    def stream(self, job_id: str) -> Iterator[bytes]:
+        """
+        Stream a completed job's video
+
+        Raises:
+            JobNotFoundError: If the job's content no longer exists
+        """
+        try:
+            yield from self.service.stream_generated_video(job_id)
+        except Exception as e:
+            if self._is_not_found(e):
+                raise JobNotFoundError(str(e)) from e
+            raise
+
+    # ------------------------------------------------------------------
+    # Routing signals
+    # ------------------------------------------------------------------
+
+    def open_for(self) -> float:
+        """Seconds until the create circuit lets a call through (0 = healthy)"""
+        return circuit_breaker.open_for(self.endpoint("create"))
+
+    def load(self, model: str) -> float:
+        """In-flight jobs as a share of the model's cap (0 when uncapped)"""
+        provider_model = self.provider_model(model)
+        cap = settings.SORA_MAX_IN_FLIGHT.get(provider_model, 0)
+        if not cap:
+            return 0.0
+        return sora_rate_limiter.in_flight(provider_model) / cap
+
+    def p95_render_seconds(self, model: str, duration: Optional[int]) -> float:
+        """p95 render time from stage timings (ADMISSION_DEFAULT_RENDER_SECONDS until known)"""
+        p95 = stage_timings.p95("render", self.provider_model(model), duration)
+        return p95 if p95 is not None else float(settings.ADMISSION_DEFAULT_RENDER_SECONDS)
+
+    def cost(self, model: str, duration: Optional[int]) -> float:
+        """Estimated USD cost of one render"""
+        per_second = settings.VIDEO_PROVIDER_COST_PER_SECOND.get(self.provider_model(model), 0.0)
+        return per_second * (duration or 0)
+
+
+class SoraProvider(VideoProvider):
+    """OpenAI Sora (or the mock service when USE_MOCK_SORA is set)"""
+
+    name = "sora"
+    models = ("sora-2", "sora-2-pro")
+
+    def _load_service(self):
+        from app.services.sora_service import sora_service
+        return sora_service
+
+    def _is_not_found(self, exc: Exception) -> bool:
+        from openai import NotFoundError
+        return isinstance(exc, NotFoundError)
+
+
+class RunwayProvider(VideoProvider):
+    """Runway Gen-4 image-to-video"""
+
+    name = "runway"
+    models = ("gen4_turbo",)
+
+    def _load_service(self):
+        from app.services.runway_service import RunwayVideoGenerator
+        return RunwayVideoGenerator()
+
+    def _is_not_found(self, exc: Exception) -> bool:
+        import httpx
+        return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 404
+
+
+class MockProvider(VideoProvider):
+    """Mock Sora service (no API calls), usable next to the real providers"""
+
+    name = "mock"
+    models = ("sora-2", "sora-2-pro")
+
+    def _load_service(self):
+        from app.services.mock_sora_service import mock_sora_service
+        return mock_sora_service
+
+
+PROVIDER_CLASSES = {cls.name: cls for cls in (SoraProvider, RunwayProvider, MockProvider)}
+
+_providers: Dict[str, VideoProvider] = {}
+
+
+def get_provider(name: Optional[str] = None) -> VideoProvider:
+    """
+    Provider instance by name (None = the provider of videos created before routing)
+
+    Raises:
+        NoProviderError: Unknown provider name
+    """
+    name = name or DEFAULT_PROVIDER
+    if name not in _providers:
+        if name not in PROVIDER_CLASSES:
+            raise NoProviderError(f"Unknown video provider: {name}")
+        _providers[name] = PROVIDER_CLASSES[name]()
+    return _providers[name]
+
+
+class ProviderRouter:
+    """Pick the provider for a render from live health, load, latency and cost"""
+
+    def __init__(self, providers: Optional[List[VideoProvider]] = None):
+        """
+        Args:
+            providers: Fixed candidate list (default: VIDEO_PROVIDERS, read on every call)
+        """
+        self._providers = providers
+
+    def providers(self) -> List[VideoProvider]:
+        if self._providers is not None:
+            return self._providers
+        return [get_provider(name) for name in settings.VIDEO_PROVIDERS]
+
+    def candidates(self, model: str, exclude: Iterable[str] = ()) -> List[VideoProvider]:
+        """Providers that can render the model, in configured order"""
+        exclude = set(exclude)
+        return [p for p in self.providers() if p.name not in exclude and p.supports(model)]
+
+    def score(self, provider: VideoProvider, model: str, duration: Optional[int]) -> float:
+        """Lower is better: expected seconds to a finished render plus weighted cost"""
+        return (
+            provider.p95_render_seconds(model, duration) * (1 + provider.load(model))
+            + provider.cost(model, duration) * settings.VIDEO_ROUTER_SECONDS_PER_DOLLAR
+        )
+
+    def choose(self, model: str, duration: Optional[int], exclude: Iterable[str] = ()) -> VideoProvider:
+        """
+        Best healthy provider for a render
+
+        Args:
+            model: Requested model (e.g., "sora-2")
+            duration: Requested duration in seconds
+            exclude: Provider names already tried for this render
+
+        Raises:
+            NoProviderError: No remaining provider can render the model
+            CircuitOpenException: Every remaining provider's circuit is open
+                (retry_after is the soonest reopening)
+        """
+        candidates = self.candidates(model, exclude)
+        if not candidates:
+            raise NoProviderError(f"No video provider available for model {model}")
+
+        healthy = []
+        soonest = None
+        for provider in candidates:
+            wait = provider.open_for()
+            if wait:
+                soonest = wait if soonest is None else min(soonest, wait)
+            else:
+                healthy.append(provider)
+
+        if not healthy:
+            raise CircuitOpenException(f"{model}.create", retry_after=max(1, int(soonest + 0.5)))
+
+        best = healthy[0]
+        if len(healthy) > 1:
+            scores = {p.name: self.score(p, model, duration) for p in healthy}
+            best = min(healthy, key=lambda p: scores[p.name])
+            logger.debug(f"Provider scores for {model}: {scores} -> {best.name}")
+
+        if best is not candidates[0]:
+            metrics.incr("video_provider_rerouted_total", model=model, provider=best.name)
+        return best
+
+    def open_for(self, model: str) -> float:
+        """Seconds until any provider of the model accepts renders (0 = one does now)"""
+        waits = [p.open_for() for p in self.candidates(model)]
+        if not waits or not all(waits):
+            return 0.0
+        return min(waits)
+
+
+# Global provider router instance
+provider_router = ProviderRouter()
@@ -14,7 +14,9 @@ from app.models.video import Video, VideoStatus, AIModel
 from app.models.user import User
 from app.core.config import settings
 from app.services.gcs_service import gcs_service
+from app.services import admission, credit_ledger, generation_cache, queue_lanes
 from app.core.exceptions import (
+    CircuitOpenException,
     InsufficientCreditsException,
     NotFoundException,
     SubscriptionRequiredException,
@@ -23,10 +25,74 @@ from app.core.exceptions import (
 from app.schemas.video import VideoGenerateRequest
 
 
+def get_credits_cost(model_id: str, duration: Optional[int]) -> float:
+    """
+    Credits charged for one video (by model AND duration)
+
+    Args:
+        model_id: Model ID (e.g., "sora-2")
+        duration: Duration in seconds (None = 8s)
+    """
+    duration = duration or 8  # Default to 8s if not specified
+
+    # 根据模型和时长计算积分消耗
+    if model_id == "sora-2-pro":
+        # Sora 2 Pro: 根据时长
+        if duration == 4:
+            return settings.SORA_2_PRO_4S_COST  # 120积分
+        elif duration == 12:
+            return settings.SORA_2_PRO_12S_COST  # 360积分
+        return settings.SORA_2_PRO_8S_COST  # 240积分 (default 8s)
+
+    # Sora 2: 根据时长
+    if duration == 4:
+        return settings.SORA_2_4S_COST  # 40积分
+    elif duration == 12:
+        return settings.SORA_2_12S_COST  # 120积分
+    return settings.SORA_2_8S_COST  # 80积分 (default 8s)
+
+
+def check_subscription(user: User, model_id: str, duration: Optional[int]):
+    """
+    Check that the user's subscription allows generating this video
+
+    Raises:
+        SubscriptionRequiredException: If user doesn't have a subscription
+        SubscriptionExpiredException: If user's subscription has expired
+    """
+    # 🆕 Special case: sora-2 with 4s duration - only check credits (no subscription required)
+    if model_id == "sora-2" and duration == 4:
+        logger.info("🎁 Special case detected: sora-2 with 4s duration")
+        logger.info(f"   Subscription check: SKIPPED (only credits required)")
+        logger.info(f"   User: {user.email}, Plan: {user.subscription_plan}")
+        return
+
+    # Check if user has a subscription (skip for sora-2 4s)
+    if user.subscription_plan == "free":
+        raise SubscriptionRequiredException(
+            "Subscription required. Please upgrade to generate videos."
+        )
+
+    # Check if subscription is active
+    if user.subscription_status != "active":
+        raise SubscriptionExpiredException(
+            "Your subscription is not active. Please renew your subscription."
+        )
+
+    # Check subscription expiry date
+    if user.subscription_end_date and user.subscription_end_date < datetime.utcnow():
+        raise SubscriptionExpiredException(
+            "Your subscription has expired. Please renew to continue."
+        )
+
+
 def create_video_generation_task(
     db: Session,
     user: User,
     video_request: VideoGenerateRequest,
+    batch_id: Optional[str] = None,
+    admitted: bool = False,
+    commit: bool = True,
 ) -> Video:
     """
     Create a new video generation task
@@ -35,6 +101,11 @@ def create_video_generation_task(
         db: Database session
         user: User requesting the video
         video_request: Video generation request data
+        batch_id: Batch the video belongs to (create_video_batch)
+        admitted: Admission control already accepted the request (batch
+            variants are admitted together), only estimate the queue position
+        commit: Commit the video and its reservation; False only flushes them
+            so the caller can commit several videos at once (or roll back)
 
     Returns:
         Created video instance
@@ -43,6 +114,7 @@ def create_video_generation_task(
         SubscriptionRequiredException: If user doesn't have a subscription
         SubscriptionExpiredException: If user's subscription has expired
         InsufficientCreditsException: If user doesn't have enough credits
+        QueueFullException: If admission control sheds the request (backlog too deep)
     """
     # === 详细的输入日志 ===
     logger.info("=" * 80)
@@ -55,54 +127,34 @@ def create_video_generation_task(
     logger.info(f"  💰 Current credits: {user.credits}")
     logger.info("=" * 80)
 
-    # 🆕 Special case: sora-2 with 4s duration - only check credits (no subscription required)
-    is_sora2_4s = video_request.model == "sora-2" and video_request.duration == 4
-
-    if is_sora2_4s:
-        logger.info("🎁 Special case detected: sora-2 with 4s duration")
-        logger.info(f"   Subscription check: SKIPPED (only credits required)")
-        logger.info(f"   User: {user.email}, Plan: {user.subscription_plan}")
-
-    if not is_sora2_4s:
-        # Check if user has a subscription (skip for sora-2 4s)
-        if user.subscription_plan == "free":
-            raise SubscriptionRequiredException(
-                "Subscription required. Please upgrade to generate videos."
-            )
-
-        # Check if subscription is active
-        if user.subscription_status != "active":
-            raise SubscriptionExpiredException(
-                "Your subscription is not active. Please renew your subscription."
-            )
-
-        # Check subscription expiry date
-        if user.subscription_end_date and user.subscription_end_date < datetime.utcnow():
-            raise SubscriptionExpiredException(
-                "Your subscription has expired. Please renew to continue."
-            )
+    check_subscription(user, video_request.model, video_request.duration)
 
     # 🆕 Calculate credits cost based on model AND duration (差异化扣除)
     model_id = video_request.model
     duration = video_request.duration or 8  # Default to 8s if not specified
+    credits_cost = get_credits_cost(model_id, duration)
+
+    # === 结果缓存 (identical image + prompt + duration + model) ===
+    cache_key = None
+    cached_video = None
+    if settings.GENERATION_CACHE_ENABLED:
+        image_hash = generation_cache.image_content_hash(db, video_request.reference_image_url)
+        if image_hash:
+            cache_key = generation_cache.compute_cache_key(
+                image_hash, video_request.prompt, duration, model_id
+            )
 
-    # 根据模型和时长计算积分消耗
-    if model_id == "sora-2-pro":
-        # Sora 2 Pro: 根据时长
-        if duration == 4:
-            credits_cost = settings.SORA_2_PRO_4S_COST  # 120积分
-        elif duration == 12:
-            credits_cost = settings.SORA_2_PRO_12S_COST  # 360积分
-        else:  # Default 8s
-            credits_cost = settings.SORA_2_PRO_8S_COST  # 240积分
-    else:  # sora-2
-        # Sora 2: 根据时长
-        if duration == 4:
-            credits_cost = settings.SORA_2_4S_COST  # 40积分
-        elif duration == 12:
-            credits_cost = settings.SORA_2_12S_COST  # 120积分
-        else:  # Default 8s
-            credits_cost = settings.SORA_2_8S_COST  # 80积分
+    if cache_key:
+        inflight_video = generation_cache.find_inflight_video(db, cache_key, user.id)
+        if inflight_video:
+            generation_cache.record_lookup("inflight")
+            logger.info(f"♻️  [Video Generation] Identical request already in progress (Video ID: {inflight_video.id})")
+            return inflight_video
+
+        cached_video = generation_cache.find_cached_video(db, cache_key, user.id)
+        generation_cache.record_lookup("hit" if cached_video else "miss")
+        if cached_video and not settings.GENERATION_CACHE_CHARGE_CREDITS:
+            credits_cost = 0
 
     # Check if user has enough credits
     if user.credits < credits_cost:
@@ -110,6 +162,19 @@ def create_video_generation_task(
             f"Insufficient credits. Required: {credits_cost}, Available: {user.credits}"
         )
 
+    # === 准入控制 - shed load before creating work the queue can't absorb ===
+    queue_lane = queue_lanes.lane_for_user(user)
+    queue_estimate = None
+    if settings.ADMISSION_CONTROL_ENABLED and not cached_video:
+        if admitted:
+            queue_estimate = admission.estimate(db, queue_lane, model_id, duration=duration)
+        else:
+            queue_estimate = admission.admit(db, queue_lane, model_id, duration)
+        logger.info(
+            f"🚦 [Admission] Lane {queue_lane}, position {queue_estimate.position}, "
+            f"estimated start in {int(queue_estimate.wait_seconds)}s"
+        )
+
     # Create video record
     video = Video(
         user_id=user.id,
@@ -118,34 +183,60 @@ def create_video_generation_task(
         reference_image_url=video_request.reference_image_url,
         duration=video_request.duration,  # Add duration field
         status=VideoStatus.PENDING,
+        credits_cost=credits_cost,
+        cache_key=cache_key,
+        queue_lane=queue_lane,
+        queued_at=datetime.utcnow(),
+        estimated_start_at=queue_estimate.start_at if queue_estimate else None,
+        estimated_finish_at=queue_estimate.finish_at if queue_estimate else None,
+        batch_id=batch_id,
     )
 
+    if cached_video:
+        # Cache hit: link to the existing GCS objects, no Sora render
+        generation_cache.link_cached_result(video, cached_video)
+        user.is_new_user = False
+        logger.info(f"⚡ [Video Generation] Cache hit - reusing result of Video ID {video.cache_source_video_id}")
+
     db.add(video)
 
-    # === 积分扣除 ===
-    logger.info("💰 [Video Generation] Deducting credits...")
+    # === 积分预留 (captured when the video completes, refunded if it fails) ===
+    logger.info("💰 [Video Generation] Reserving credits...")
     previous_credits = user.credits
     logger.info(f"  Credits cost: {credits_cost} for {model_id} ({duration}s)")
     logger.info(f"  Previous balance: {previous_credits}")
 
-    user.credits -= credits_cost
+    if credits_cost:
+        db.flush()  # Video ID for the reservation
+        try:
+            credit_ledger.reserve(db, user, credits_cost, video_id=video.id)
+        except InsufficientCreditsException:
+            if commit:
+                db.rollback()  # A concurrent request spent the credits since the check above
+            raise
+        if cached_video:
+            credit_ledger.capture(db, video.id)
 
     logger.info(f"  New balance: {user.credits}")
 
-    db.commit()
-    db.refresh(video)
+    if commit:
+        db.commit()
+        db.refresh(video)
+    else:
+        db.flush()
+    if queue_estimate:
+        video.queue_position = queue_estimate.position
 
     # === 成功日志 ===
     logger.info("=" * 80)
     logger.info("✅ [Video Generation] Task created successfully")
     logger.info(f"  📹 Video ID: {video.id}")
-    logger.info(f"  💰 Credits deducted: {credits_cost}")
+    logger.info(f"  💰 Credits reserved: {credits_cost}")
     logger.info(f"  💳 Remaining credits: {user.credits}")
     logger.info("=" * 80)
 
-    # TODO: Trigger async video generation task here
-    # For now, we'll simulate by setting to processing status
-    # In production, this would trigger a background job (Celery, etc.)
+    # Pending videos are queued by the caller (enqueue_video_generation);
+    # cache hits are already completed
 
     return video
 
@@ -207,6 +298,23 @@ def get_video_by_id(db: Session, video_id: int, user_id: Optional[int] = None) -
     return video
 
 
+def _release_slots(db: Session, video: Video):
+    """
+    Free the provider in-flight slot and per-user slot of an unfinished video
+
+    Same as when a video fails: otherwise the slots stay taken until their
+    leases expire, blocking the user's held videos meanwhile. Called once the
+    row is deleted, so the release pass can't queue the video itself.
+    """
+    from app.services.sora_rate_limiter import sora_rate_limiter
+    from app.services.video_providers import get_provider
+    from app.tasks.video_generation import release_held_videos
+
+    model = video.model.value if hasattr(video.model, "value") else video.model
+    sora_rate_limiter.release(get_provider(video.provider).provider_model(model) or model, video.id)
+    release_held_videos(db, video)
+
+
 def delete_video(db: Session, video_id: int, user_id: int) -> bool:
     """
     Delete a video
@@ -227,9 +335,21 @@ def delete_video(db: Session, video_id: int, user_id: int) -> bool:
     if not video:
         return False
 
+    unfinished = video.status in (VideoStatus.PENDING, VideoStatus.PROCESSING)
+
+    submitted = bool(video.sora_job_id) or video.status in (VideoStatus.PROCESSING, VideoStatus.COMPLETED)
+    if submitted:
+        # A video deleted mid-generation keeps its charge: the render may already be paid for
+        credit_ledger.capture(db, video.id)
+    else:
+        # Never sent to a provider (held or still queued): refund it
+        credit_ledger.release(db, video.id)
     db.delete(video)
     db.commit()
 
+    if unfinished:
+        _release_slots(db, video)
+
     return True
 
 
@@ -330,19 +450,24 @@ async def save_uploaded_image(
     Raises:
         HTTPException: If image validation or resizing fails
     """
-    import uuid
-    import logging
-    from io import BytesIO
-    from PIL import Image as PILImage
-    from app.models.uploaded_image import UploadedImage
-    from app.utils.image_utils import get_file_extension, validate_image_content, resize_image_for_sora
-
-    logger = logging.getLogger(__name__)
-
     # Read file content
     content = await image_file.read()
+    metadata = validate_uploaded_image(content)
+    return store_image_content(content, image_file.filename, metadata, user, db)
+
+
+def validate_uploaded_image(content: bytes) -> dict:
+    """
+    Validate uploaded image bytes (format and size)
+
+    Returns:
+        Image metadata from validate_image_content()
+
+    Raises:
+        HTTPException: 400 if the content is not a supported image, 413 if too large
+    """
+    from app.utils.image_utils import validate_image_content
 
-    # Validate image
     try:
         metadata = validate_image_content(content)
         logger.info(f"📸 Original image: {metadata['width']}x{metadata['height']}, {metadata['size_mb']}MB")
@@ -361,13 +486,45 @@ async def save_uploaded_image(
             detail=f"File too large ({metadata['size_mb']:.2f}MB). Maximum size is 20MB."
         )
 
+    return metadata
+
+
+def store_image_content(
+    content: bytes,
+    original_filename: str,
+    metadata: dict,
+    user: User,
+    db: Session,
+    orientation: Optional[str] = None,
+) -> str:
+    """
+    Resize validated image bytes for Sora and store them (GCS + uploaded_images)
+
+    Args:
+        content: Image bytes, already validated
+        original_filename: Client filename (for the extension of unresized images)
+        metadata: Result of validate_uploaded_image(content)
+        user: Current user
+        db: Database session
+        orientation: Optional "landscape" or "portrait" target (default: detected)
+
+    Returns:
+        Image URL (GCS public URL)
+
+    Raises:
+        HTTPException: If resizing or saving fails
+    """
+    import uuid
+    from app.models.uploaded_image import UploadedImage
+    from app.utils.image_utils import get_file_extension, validate_image_content, resize_image_for_sora
+
     # 🔥 Check if image already has correct Sora dimensions
     width = metadata['width']
     height = metadata['height']
 
     # Sora-compatible dimensions
-    is_landscape_correct = (width == 1280 and height == 720)
-    is_portrait_correct = (width == 720 and height == 1280)
+    is_landscape_correct = (width == 1280 and height == 720) and orientation in (None, "landscape")
+    is_portrait_correct = (width == 720 and height == 1280) and orientation in (None, "portrait")
 
     if is_landscape_correct or is_portrait_correct:
         # Image already has correct dimensions, no need to resize
@@ -378,7 +535,7 @@ async def save_uploaded_image(
         # Image needs resizing
         try:
             logger.info(f"🔧 Resizing image from {width}x{height} to Sora-compatible dimensions...")
-            resized_content = resize_image_for_sora(content)
+            resized_content = resize_image_for_sora(content, orientation)
 
             # Validate resized image dimensions
             resized_metadata = validate_image_content(resized_content)
@@ -399,13 +556,27 @@ async def save_uploaded_image(
     # Determine file extension and type based on whether image was resized
     if is_landscape_correct or is_portrait_correct:
         # Keep original format
-        file_extension = get_file_extension(image_file.filename) or 'jpg'
+        file_extension = get_file_extension(original_filename) or 'jpg'
         file_type = final_metadata['mime_type']
     else:
         # Resized images are always JPEG
         file_extension = 'jpg'
         file_type = 'image/jpeg'
 
+    # Reuse the stored file of a near-identical earlier upload with the same (Sora-ready) size
+    from app.services.image_dedup import image_dedup_index, image_phash, record_lookup
+
+    phash = image_phash(content_to_save)
+    if phash and settings.IMAGE_DEDUP_ENABLED:
+        reusable = [
+            image for image in image_dedup_index.find_near_duplicates(db, user.id, phash)
+            if (image.width, image.height) == (final_metadata['width'], final_metadata['height'])
+        ]
+        record_lookup("upload", "hit" if reusable else "miss")
+        if reusable:
+            logger.info(f"♻️  Near-duplicate of image {reusable[0].id}, reusing {reusable[0].file_url}")
+            return reusable[0].file_url
+
     # Generate unique filename
     filename = f"original_{uuid.uuid4()}.{file_extension}"
 
@@ -439,7 +610,9 @@ async def save_uploaded_image(
             file_size=len(content_to_save),
             file_type=file_type,
             width=final_metadata['width'],
-            height=final_metadata['height']
+            height=final_metadata['height'],
+            content_hash=generation_cache.content_hash(content_to_save),  # Generation cache key input
+            phash=phash,  # Near-duplicate lookup
         )
         db.add(db_image)
         db.commit()
@@ -525,6 +698,9 @@ async def generate_sora_prompt(
 
         return prompt
 
+    except CircuitOpenException:
+        raise
+
     except Exception as e:
         logger.error(f"❌ Failed to generate prompt: {str(e)}")
         logger.error("-" * 60)
@@ -1,6 +1,42 @@
 """
 Background tasks for AI video generation
 """
-from app.tasks.video_generation import generate_video_task
+from app.tasks.video_generation import (
+    generate_video_task,
+    poll_video_task,
+    download_video_task,
+    upload_video_task,
+    enqueue_video_generation,
+    schedule_video_generation,
+)
+from app.tasks.video_postprocess import (
+    generate_renditions_task,
+    generate_showcase_renditions_task,
+    generate_preview_task,
+    generate_showcase_preview_task,
+)
+from app.tasks.reaper import (
+    reap_stuck_videos_task,
+    release_held_videos_task,
+    reconcile_credit_reservations_task,
+)
+from app.tasks.bulk_jobs import advance_bulk_job_task, advance_bulk_jobs_task, process_bulk_item_task
 
-__all__ = ["generate_video_task"]
+__all__ = [
+    "generate_video_task",
+    "poll_video_task",
+    "download_video_task",
+    "upload_video_task",
+    "enqueue_video_generation",
+    "schedule_video_generation",
+    "generate_renditions_task",
+    "generate_showcase_renditions_task",
+    "generate_preview_task",
+    "generate_showcase_preview_task",
+    "reap_stuck_videos_task",
+    "release_held_videos_task",
+    "reconcile_credit_reservations_task",
+    "advance_bulk_job_task",
+    "advance_bulk_jobs_task",
+    "process_bulk_item_task",
+]
@@ -0,0 +1,491 @@
+"""
+Celery pipeline for catalog bulk jobs (see app.services.bulk_jobs)
+
+Each manifest item is a small DAG: ingest -> script -> video, after which
+the item waits for its video to finish rendering in the normal generation
+pipeline. Two tasks drive it:
+
+    advance_bulk_job_task  - scheduler of one job: settles items whose video
+        finished, re-dispatches items whose worker died, and starts queued
+        items while fewer than max_concurrency are in flight
+    process_bulk_item_task - runs an item's remaining steps, persisting the
+        stage (and the step's result) after each one
+
+Every step is idempotent with respect to its recorded result: a re-run
+ingest stores the image again (deduplicated by the image index), and a
+re-run video step reuses the item's video if it was already created. Items
+are claimed with conditional UPDATEs, so concurrent schedulers never start
+the same item twice.
+
+advance_bulk_jobs_task (Celery beat) advances every running job, which also
+resumes jobs after a crash:
+
+    celery -A app.core.celery_app beat --loglevel=info
+"""
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from sqlalchemy import func, update
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.exceptions import (
+    AIVideoException,
+    CircuitOpenException,
+    InsufficientCreditsException,
+    QueueFullException,
+)
+from app.database import SessionLocal
+from app.models.bulk_job import BulkItemStage, BulkJob, BulkJobItem, BulkJobStatus
+from app.models.generated_script import GeneratedScript
+from app.models.uploaded_image import UploadedImage
+from app.models.user import User
+from app.models.video import Video, VideoStatus
+from app.services.bulk_jobs import TERMINAL_STAGES, item_settings
+from app.services.resilience import TERMINAL, classify_error, retry_delay
+from app.utils import metrics
+
+# Steps run by process_bulk_item_task (protected by the item lease)
+STEP_STAGES = (BulkItemStage.INGEST, BulkItemStage.SCRIPT, BulkItemStage.VIDEO)
+# Stages counted against the job's max_concurrency
+IN_FLIGHT_STAGES = STEP_STAGES + (BulkItemStage.RENDERING,)
+
+
+def _lease_until(extra_seconds: float = 0) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.BULK_ITEM_LEASE_SECONDS + extra_seconds)
+
+
+def _set_stage(db, item: BulkJobItem, stage: BulkItemStage):
+    """Persist the stage the item is about to enter (renews the lease)"""
+    item.stage = stage
+    item.lease_expires_at = _lease_until()
+    db.commit()
+
+
+def _finish_item(db, item: BulkJobItem, stage: BulkItemStage, error_message: Optional[str] = None):
+    """Mark an item done or failed"""
+    item.stage = stage
+    item.error_message = error_message
+    item.lease_expires_at = None
+    item.finished_at = datetime.utcnow()
+    db.commit()
+    metrics.incr("bulk_job_items_finished_total", outcome=stage.value)
+
+
+class BulkItemDeferred(Exception):
+    """The step can't run yet (queue full, provider circuit open); retry after a while"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# ----------------------------------------------------------------------
+# Item steps
+# ----------------------------------------------------------------------
+
+def _as_step_error(exc: Exception) -> Exception:
+    """
+    Map errors of the API-facing helpers to what classify_error understands
+
+    HTTP 4xx answers (bad image, missing file) become terminal ValueErrors;
+    5xx and 429 stay retryable.
+    """
+    from fastapi import HTTPException
+
+    status_code = None
+    if isinstance(exc, HTTPException):
+        status_code, message = exc.status_code, exc.detail
+    elif isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status_code, message = exc.response.status_code, str(exc)
+    if status_code is not None and status_code < 500 and status_code != 429:
+        return ValueError(message)
+    return exc
+
+
+def _ingest(db, item: BulkJobItem, user: User):
+    """Read, validate, resize and store the product image"""
+    from app.services import video_service
+    from app.utils.image_utils import read_image_from_url
+
+    try:
+        content = read_image_from_url(item.image_url)
+        metadata = video_service.validate_uploaded_image(content)
+        filename = os.path.basename(urlparse(item.image_url).path) or "product.jpg"
+        stored_url = video_service.store_image_content(content, filename, metadata, user, db)
+    except Exception as e:
+        raise _as_step_error(e)
+
+    image = (
+        db.query(UploadedImage)
+        .filter(UploadedImage.user_id == user.id, UploadedImage.file_url == stored_url)
+        .order_by(UploadedImage.id.desc())
+        .first()
+    )
+    item.stored_image_url = stored_url
+    item.uploaded_image_id = image.id if image else None
+
+
+def _generate_script(db, item: BulkJobItem, job: BulkJob, user: User):
+    """GPT-4o script from the stored image, charged like /ai/generate-script"""
+    from app.services import credit_ledger
+    from app.services.openai_script_service import openai_script_service
+    from app.utils.image_utils import read_image_from_url
+
+    duration, model, language = item_settings(item, job)
+    credits_cost = settings.SCRIPT_GENERATION_COST
+    if user.credits < credits_cost:
+        raise ValueError(f"Insufficient credits. Requires {credits_cost}, available {user.credits}.")
+
+    try:
+        content = read_image_from_url(item.stored_image_url)
+    except Exception as e:
+        raise _as_step_error(e)
+
+    result = openai_script_service.analyze_image_for_script(
+        image_data=content,
+        duration=duration,
+        mime_type="image/png" if item.stored_image_url.lower().endswith(".png") else "image/jpeg",
+        language=language,
+        user_description=item.description,
+    )
+
+    script = GeneratedScript(
+        user_id=user.id,
+        uploaded_image_id=item.uploaded_image_id,
+        script=result["script"],
+        structured_script=result.get("structured_script"),
+        natural_script=result.get("natural_script"),
+        language=language,
+        user_description=item.description,
+        tokens_used=result.get("tokens_used", 0),
+        target_duration=duration,
+        target_model=model,
+        style=(result.get("style") or "")[:255] or None,
+        camera=(result.get("camera") or "")[:255] or None,
+        lighting=(result.get("lighting") or "")[:255] or None,
+        credits_cost=credits_cost,
+    )
+    db.add(script)
+    try:
+        credit_ledger.charge(db, user, credits_cost, reason="script")
+    except InsufficientCreditsException as e:
+        raise ValueError(e.message)
+    db.flush()
+    item.generated_script_id = script.id
+
+
+def _create_video(db, item: BulkJobItem, job: BulkJob, user: User):
+    """Create the item's video from its script and queue it for generation"""
+    from app.schemas.video import VideoGenerateRequest
+    from app.services import video_service
+    from app.tasks.video_generation import schedule_video_generation
+
+    if item.video_id:
+        return  # Created by an earlier run that died before recording the stage
+
+    duration, model, _ = item_settings(item, job)
+    script = db.query(GeneratedScript).filter(GeneratedScript.id == item.generated_script_id).first()
+    if not script:
+        raise ValueError("Generated script no longer exists")
+
+    try:
+        video = video_service.create_video_generation_task(
+            db,
+            user,
+            VideoGenerateRequest(
+                prompt=script.script[:5000],
+                model=model,
+                reference_image_url=item.stored_image_url,
+                duration=duration,
+            ),
+        )
+    except (QueueFullException, CircuitOpenException) as e:
+        raise BulkItemDeferred(e.message, e.retry_after)
+    except AIVideoException as e:
+        raise ValueError(e.message)  # Subscription or credits: retrying won't help
+
+    video.generated_script_id = script.id
+    video.uploaded_image_id = item.uploaded_image_id
+    item.video_id = video.id
+    db.commit()
+
+    if video.status == VideoStatus.PENDING:
+        schedule_video_generation(video)
+
+
+def _retry_item(db, item: BulkJobItem, countdown: float, error_message: str):
+    """Re-run the item's current step after countdown seconds"""
+    item.error_message = error_message
+    item.lease_expires_at = _lease_until(countdown)
+    db.commit()
+    process_bulk_item_task.apply_async((item.id,), countdown=countdown)
+
+
+@celery_app.task(name="process_bulk_item_task", bind=True)
+def process_bulk_item_task(self, item_id: int):
+    """
+    Run the remaining steps of a bulk job item (ingest -> script -> video)
+
+    Retryable errors re-run the failed step with backoff, up to
+    BULK_ITEM_MAX_ATTEMPTS; terminal errors fail the item. Either way the
+    job's scheduler runs afterwards to fill the freed slot.
+
+    Args:
+        item_id: BulkJobItem ID
+
+    Returns:
+        Dict with the item's stage
+    """
+    db = SessionLocal()
+    job_id = None
+
+    try:
+        item = db.query(BulkJobItem).filter(BulkJobItem.id == item_id).first()
+        if not item or item.stage not in STEP_STAGES:
+            return {"item_id": item_id, "status": "skipped"}
+
+        job_id = item.bulk_job_id
+        job = db.query(BulkJob).filter(BulkJob.id == job_id).first()
+        user = db.query(User).filter(User.id == job.user_id).first()
+
+        print(f"📦 [Bulk {job_id}] Item {item.position} ({item.sku or item.image_url}): {item.stage.value}")
+        item.lease_expires_at = _lease_until()
+        db.commit()
+
+        try:
+            if item.stage == BulkItemStage.INGEST:
+                _ingest(db, item, user)
+                _set_stage(db, item, BulkItemStage.SCRIPT)
+
+            if item.stage == BulkItemStage.SCRIPT:
+                _generate_script(db, item, job, user)
+                _set_stage(db, item, BulkItemStage.VIDEO)
+
+            if item.stage == BulkItemStage.VIDEO:
+                _create_video(db, item, job, user)
+                # Rendering is watched by the scheduler, not leased by a worker
+                item.stage = BulkItemStage.RENDERING
+                item.error_message = None
+                item.lease_expires_at = None
+                db.commit()
+
+        except BulkItemDeferred as e:
+            db.rollback()
+            countdown = round(e.retry_after * (1 + random.random() * 0.2) + 1, 2)
+            print(f"⏳ [Bulk {job_id}] Item {item.position} deferred {countdown}s: {e}")
+            metrics.incr("bulk_job_items_deferred_total")
+            _retry_item(db, item, countdown, str(e))
+            return {"item_id": item_id, "status": "deferred", "stage": item.stage.value}
+
+        except Exception as e:
+            db.rollback()
+            kind = classify_error(e)
+            item.attempts += 1
+            print(f"💥 [Bulk {job_id}] Item {item.position} failed at {item.stage.value} ({kind}): {e}")
+
+            if kind != TERMINAL and item.attempts < settings.BULK_ITEM_MAX_ATTEMPTS:
+                countdown = retry_delay(
+                    e, item.attempts - 1, settings.STAGE_RETRY_BASE_SECONDS, settings.STAGE_RETRY_MAX_SECONDS
+                )
+                print(f"🔄 [Bulk {job_id}] Retry {item.attempts}/{settings.BULK_ITEM_MAX_ATTEMPTS - 1} in {countdown:.0f}s")
+                _retry_item(db, item, countdown, str(e))
+                return {"item_id": item_id, "status": "retrying", "stage": item.stage.value}
+
+            _finish_item(db, item, BulkItemStage.FAILED, f"{item.stage.value}: {e}")
+
+        return {"item_id": item_id, "status": item.stage.value}
+
+    finally:
+        db.close()
+        if job_id is not None:
+            advance_bulk_job_task.delay(job_id)
+
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+def _settle_rendering_items(db, job: BulkJob) -> int:
+    """Mark RENDERING items whose video completed or failed; returns how many"""
+    rows = (
+        db.query(BulkJobItem, Video.status, Video.error_message)
+        .outerjoin(Video, Video.id == BulkJobItem.video_id)
+        .filter(BulkJobItem.bulk_job_id == job.id, BulkJobItem.stage == BulkItemStage.RENDERING)
+        .all()
+    )
+
+    settled = 0
+    for item, video_status, video_error in rows:
+        if video_status == VideoStatus.COMPLETED:
+            _finish_item(db, item, BulkItemStage.DONE)
+        elif video_status == VideoStatus.FAILED:
+            _finish_item(db, item, BulkItemStage.FAILED, f"video: {video_error or 'generation failed'}")
+        elif video_status is None:
+            _finish_item(db, item, BulkItemStage.FAILED, "video: deleted before it finished")
+        else:
+            continue
+        settled += 1
+    return settled
+
+
+def _resume_expired_items(db, job: BulkJob, now: datetime) -> list:
+    """Re-dispatch step items whose worker died (expired lease); returns their IDs"""
+    expired = (
+        db.query(BulkJobItem.id, BulkJobItem.lease_expires_at)
+        .filter(
+            BulkJobItem.bulk_job_id == job.id,
+            BulkJobItem.stage.in_(STEP_STAGES),
+            BulkJobItem.lease_expires_at < now,
+        )
+        .all()
+    )
+
+    resumed = []
+    for item_id, old_lease in expired:
+        claimed = db.execute(
+            update(BulkJobItem)
+            .where(BulkJobItem.id == item_id, BulkJobItem.lease_expires_at == old_lease)
+            .values(lease_expires_at=_lease_until())
+        ).rowcount
+        db.commit()
+        if claimed:
+            resumed.append(item_id)
+    return resumed
+
+
+def _start_queued_items(db, job: BulkJob) -> list:
+    """Move queued items to INGEST while the job has free slots; returns their IDs"""
+    in_flight = (
+        db.query(func.count(BulkJobItem.id))
+        .filter(BulkJobItem.bulk_job_id == job.id, BulkJobItem.stage.in_(IN_FLIGHT_STAGES))
+        .scalar()
+    )
+    free = job.max_concurrency - in_flight
+    if free <= 0:
+        return []
+
+    candidates = (
+        db.query(BulkJobItem.id)
+        .filter(BulkJobItem.bulk_job_id == job.id, BulkJobItem.stage == BulkItemStage.QUEUED)
+        .order_by(BulkJobItem.position)
+        .limit(free)
+        .all()
+    )
+
+    started = []
+    for (item_id,) in candidates:
+        claimed = db.execute(
+            update(BulkJobItem)
+            .where(BulkJobItem.id == item_id, BulkJobItem.stage == BulkItemStage.QUEUED)
+            .values(stage=BulkItemStage.INGEST, lease_expires_at=_lease_until())
+        ).rowcount
+        db.commit()
+        if claimed:
+            started.append(item_id)
+    return started
+
+
+def _finish_job_if_done(db, job: BulkJob) -> bool:
+    """Close the job once every item is done or failed"""
+    counts = dict(
+        db.query(BulkJobItem.stage, func.count(BulkJobItem.id))
+        .filter(BulkJobItem.bulk_job_id == job.id)
+        .group_by(BulkJobItem.stage)
+        .all()
+    )
+    if sum(counts.values()) > sum(counts.get(stage, 0) for stage in TERMINAL_STAGES):
+        return False
+
+    failed = counts.get(BulkItemStage.FAILED, 0)
+    status = BulkJobStatus.FAILED if failed and failed == job.total_items else BulkJobStatus.COMPLETED
+    closed = db.execute(
+        update(BulkJob)
+        .where(BulkJob.id == job.id, BulkJob.status == BulkJobStatus.RUNNING)
+        .values(status=status, finished_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+
+    if closed:
+        metrics.incr("bulk_jobs_finished_total", status=status.value)
+        print(f"🏁 [Bulk {job.id}] Finished ({status.value}): {job.total_items - failed} done, {failed} failed")
+    return True
+
+
+def advance_bulk_job(db, job_id: int) -> dict:
+    """
+    One scheduling pass over a running job
+
+    Returns:
+        Dict with the items settled, resumed and started
+    """
+    job = db.query(BulkJob).filter(BulkJob.id == job_id).first()
+    if not job or job.status != BulkJobStatus.RUNNING:
+        return {"bulk_job_id": job_id, "status": "skipped"}
+
+    settled = _settle_rendering_items(db, job)
+    resumed = _resume_expired_items(db, job, datetime.utcnow())
+    started = _start_queued_items(db, job)
+
+    for item_id in resumed + started:
+        process_bulk_item_task.delay(item_id)
+
+    if resumed:
+        print(f"🧟 [Bulk {job_id}] Resumed {len(resumed)} item(s) with expired leases: {resumed}")
+        metrics.incr("bulk_job_items_resumed_total", len(resumed))
+
+    finished = _finish_job_if_done(db, job)
+    return {
+        "bulk_job_id": job_id,
+        "settled": settled,
+        "resumed": resumed,
+        "started": started,
+        "finished": finished,
+    }
+
+
+@celery_app.task(name="advance_bulk_job_task")
+def advance_bulk_job_task(bulk_job_id: int):
+    """
+    Advance one bulk job (after an item step, and on job creation)
+
+    Returns:
+        Dict with the items settled, resumed and started
+    """
+    db = SessionLocal()
+
+    try:
+        return advance_bulk_job(db, bulk_job_id)
+
+    finally:
+        db.close()
+
+
+@celery_app.task(name="advance_bulk_jobs_task")
+def advance_bulk_jobs_task():
+    """
+    Advance every running bulk job (Celery beat)
+
+    Picks up items whose video finished rendering and resumes jobs whose
+    items were abandoned by crashed workers.
+
+    Returns:
+        Dict with the IDs of the jobs advanced
+    """
+    db = SessionLocal()
+
+    try:
+        job_ids = [
+            job_id for (job_id,) in
+            db.query(BulkJob.id).filter(BulkJob.status == BulkJobStatus.RUNNING).order_by(BulkJob.id).all()
+        ]
+        for job_id in job_ids:
+            advance_bulk_job(db, job_id)
+        return {"advanced": job_ids}
+
+    finally:
+        db.close()
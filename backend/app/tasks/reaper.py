@@ -0,0 +1,138 @@
+"""
+Stuck generation reaper
+
+Every pipeline stage renews a lease on its Video row (heartbeat_at /
+lease_expires_at). When a worker dies mid-stage - child recycling, deploys,
+OOM kills - nobody renews the lease any more. This periodic task finds
+PROCESSING videos whose lease expired and resumes them from their recorded
+stage (reattaching to the existing Sora job), so they neither stay in
+PROCESSING forever nor leak slots and credits.
+
+release_held_videos_task likewise queues videos held by the per-user
+in-flight cap whose slots were freed without a release (see
+app.services.fair_share), and reconcile_credit_reservations_task settles
+credit reservations of finished videos that missed their capture or refund
+(see app.services.credit_ledger).
+
+All are scheduled by Celery beat (see beat_schedule in app.core.celery_app):
+
+    celery -A app.core.celery_app beat --loglevel=info
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, update
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.database import SessionLocal
+from app.services import credit_ledger
+from app.models.video import Video, VideoStatus
+from app.tasks.video_generation import enqueue_video_generation, release_held_videos
+
+
+@celery_app.task(name="reap_stuck_videos_task")
+def reap_stuck_videos_task():
+    """
+    Resume PROCESSING videos whose worker lease has expired
+
+    Each stuck video is claimed with a conditional UPDATE on its old lease
+    value, so concurrent reaper runs never resume the same video twice.
+
+    Returns:
+        Dict with the IDs of resumed videos
+    """
+    db = SessionLocal()
+
+    try:
+        now = datetime.utcnow()
+        lease = timedelta(seconds=settings.VIDEO_LEASE_SECONDS)
+
+        # Uses ix_videos_status_lease_expires_at; rows without a lease predate
+        # heartbeats and are judged by their last update instead
+        stuck = (
+            db.query(Video.id, Video.lease_expires_at, Video.generation_stage, Video.queue_lane)
+            .filter(
+                Video.status == VideoStatus.PROCESSING,
+                or_(
+                    Video.lease_expires_at < now,
+                    and_(Video.lease_expires_at.is_(None), Video.updated_at < now - lease),
+                ),
+            )
+            .order_by(Video.lease_expires_at)
+            .limit(settings.VIDEO_REAPER_BATCH_SIZE)
+            .all()
+        )
+
+        resumed = []
+        for video_id, old_lease, stage, lane in stuck:
+            lease_matches = (
+                Video.lease_expires_at == old_lease
+                if old_lease is not None
+                else Video.lease_expires_at.is_(None)
+            )
+            claimed = db.execute(
+                update(Video)
+                .where(Video.id == video_id, Video.status == VideoStatus.PROCESSING, lease_matches)
+                .values(heartbeat_at=now, lease_expires_at=now + lease)
+            ).rowcount
+            db.commit()
+
+            if not claimed:
+                continue  # Another reaper run (or the worker itself) got there first
+
+            print(f"🧟 [Reaper] Video {video_id} lease expired (stage: {stage}), resuming...")
+            enqueue_video_generation(video_id, lane, kwargs={"resume": True})
+            resumed.append(video_id)
+
+        if resumed:
+            print(f"🧹 [Reaper] Resumed {len(resumed)} stuck video(s): {resumed}")
+
+        return {"resumed": resumed}
+
+    finally:
+        db.close()
+
+
+@celery_app.task(name="release_held_videos_task")
+def release_held_videos_task():
+    """
+    Queue held videos whose users have free slots
+
+    Releases normally happen when a video finishes; this catches slots freed
+    by expiry (videos that never reported back) and releases lost to errors.
+
+    Returns:
+        Dict with the IDs of queued videos
+    """
+    db = SessionLocal()
+
+    try:
+        return {"queued": release_held_videos(db)}
+
+    finally:
+        db.close()
+
+
+@celery_app.task(name="reconcile_credit_reservations_task")
+def reconcile_credit_reservations_task():
+    """
+    Capture or refund reservations of videos that finished without settling them
+
+    A worker that dies between marking a video completed/failed and settling
+    its reservation leaves the credits reserved; this sweep finishes the job.
+
+    Returns:
+        Dict with the video IDs captured and released
+    """
+    db = SessionLocal()
+
+    try:
+        result = credit_ledger.reconcile(
+            db,
+            older_than_seconds=settings.CREDIT_RECONCILE_MIN_AGE_SECONDS,
+            limit=settings.CREDIT_RECONCILE_BATCH_SIZE,
+        )
+        if result["captured"] or result["released"]:
+            print(f"🧾 [Credits] Reconciled reservations: captured {result['captured']}, released {result['released']}")
+        return result
+
+    finally:
+        db.close()
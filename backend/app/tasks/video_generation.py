@@ -1,301 +1,1013 @@
 """
-Celery task for AI video generation with SSE real-time logging
+Celery tasks for AI video generation with SSE real-time logging
 
 This module handles asynchronous video generation using OpenAI Sora 2 API
 and streams real-time progress updates to frontend via Redis Pub/Sub + SSE.
+
+The pipeline is split into short, chained stages so no worker sits idle
+while Sora renders (2-20 minutes):
+
+    generate_video_task (submit) → poll_video_task (re-scheduled until done)
+        → download_video_task → process_video_task (metadata, faststart, poster)
+        → upload_video_task
+
+With post-processing disabled and VIDEO_STREAM_UPLOAD on, the download
+stage streams straight into GCS and completes the video itself.
+
+Every stage persists its state on the Video row (generation_stage,
+provider, sora_job_id, sora_submitted_at, sora_attempt, sora_last_status,
+local_video_path) so any worker can pick up the next stage, and each task
+finishes in seconds. Retries and redeliveries reattach to the recorded
+job; a new job is only submitted once the old one failed or expired.
+
+The submit stage picks the video provider (Sora, Runway, mock) through
+app.services.video_providers.provider_router and fails over to the next
+provider when one is throttled, unhealthy or has its circuit open; the
+later stages talk to the provider recorded on the video.
 """
-import asyncio
 import os
-from pathlib import Path
-from io import BytesIO
-from fastapi import UploadFile
-from app.core.celery_app import celery_app
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from celery.utils.nodenames import worker_direct
+from app.core.celery_app import celery_app, lane_queue
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException, NotFoundException
 from app.database import SessionLocal
-from app.services.sora_service import sora_service
+from app.services import credit_ledger, queue_lanes
+from app.services.fair_share import fair_share
+from app.services.resilience import TERMINAL, circuit_breaker, classify_error, retry_delay
+from app.services.sora_rate_limiter import sora_rate_limiter
+from app.services.stage_timings import stage_timings
+from app.services.video_providers import (
+    JobNotFoundError,
+    NoProviderError,
+    VideoProvider,
+    get_provider,
+    provider_router,
+)
 from app.services.video_service import get_video_by_id, update_video_status
 from app.services.gcs_service import gcs_service
-from app.models.video import VideoStatus
+from app.models.video import Video, VideoStatus, GenerationStage
+from app.tasks.video_postprocess import generate_preview_task, generate_renditions_task
+from app.utils.ffmpeg_utils import extract_poster, ffmpeg_available
+from app.utils import metrics
+from app.utils.mp4_utils import Mp4Error, faststart, read_mp4_metadata
+from app.utils.range_downloader import record_download_metrics
 from app.utils.sse_logger import SSELogger
 
 
+SUPPORTED_DURATIONS = (4, 8, 12)
+MAX_WAIT_SECONDS = 1200  # 20 minutes from submission before giving up
+MAX_GENERATION_ATTEMPTS = 3  # Sora jobs re-submitted after a failed render
+STAGE_RETRY_COUNTDOWN = 60  # Seconds before re-submitting a failed render
+
+
+def enqueue_video_generation(video_id: int, lane: Optional[str] = None, **options):
+    """
+    Start the generation pipeline for a freshly created video
+
+    Args:
+        video_id: Database ID of the video record
+        lane: Priority lane (Video.queue_lane); the submit stage is routed
+            to that lane's queue
+        **options: Extra apply_async options (e.g., countdown)
+
+    Returns:
+        Celery AsyncResult of the submit stage
+    """
+    return generate_video_task.apply_async(
+        (video_id,), queue=lane_queue(queue_lanes.normalize_lane(lane)), **options
+    )
+
+
+def schedule_video_generation(video):
+    """
+    Queue a new (or manually retried) video, subject to the user's in-flight cap
+
+    Videos over the cap stay PENDING in the user's held list and are queued
+    by release_held_videos() when one of the user's videos finishes.
+
+    Args:
+        video: PENDING Video record
+
+    Returns:
+        Celery AsyncResult of the submit stage, or None if the video was held
+    """
+    cap = fair_share.cap_for_lane(video.queue_lane)
+    if not fair_share.admit(video.user_id, video.id, cap):
+        print(f"⏳ Video {video.id} held: user {video.user_id} already has {cap} video(s) in flight")
+        return None
+    return enqueue_video_generation(video.id, video.queue_lane)
+
+
+def release_held_videos(db, video=None, max_passes: int = 100) -> list:
+    """
+    Free a finished video's user slot and queue held videos round-robin
+
+    Args:
+        db: Database session
+        video: Finished video (None just runs release passes)
+        max_passes: Upper bound on round-robin passes
+
+    Returns:
+        IDs of the videos queued
+    """
+    queued = []
+    released = fair_share.release(video.user_id, video.id) if video else fair_share.release()
+
+    for _ in range(max_passes):
+        if not released:
+            break
+        next_released = []
+        for user_id, video_id in released:
+            held = db.query(Video).filter(Video.id == video_id).first()
+            if held is None or held.status != VideoStatus.PENDING:
+                # Deleted or already started elsewhere - give the slot back
+                next_released.extend(fair_share.release(user_id, video_id))
+                continue
+            enqueue_video_generation(held.id, held.queue_lane)
+            queued.append(held.id)
+        # Another pass for users that still have free slots
+        released = next_released or fair_share.release()
+
+    if queued:
+        print(f"▶️  Released held video(s): {queued}")
+    return queued
+
+
+def _output_filename(video) -> str:
+    """Local filename used while a generated video is in transit"""
+    return f"user_{video.user_id}_video_{video.id}.mp4"
+
+
+def _renew_lease(video):
+    """
+    Heartbeat: extend the worker lease on the video (caller commits)
+
+    The stuck-generation reaper resumes PROCESSING videos whose lease expired.
+    """
+    now = datetime.utcnow()
+    video.heartbeat_at = now
+    video.lease_expires_at = now + timedelta(seconds=settings.VIDEO_LEASE_SECONDS)
+
+
+def _set_stage(db, video, stage: GenerationStage):
+    """Persist the pipeline stage the video is about to enter (renews the lease)"""
+    video.generation_stage = stage.value
+    _renew_lease(video)
+    db.commit()
+
+
+def _parked_for(endpoint: str, wait: Optional[float] = None) -> float:
+    """
+    Seconds to park a stage whose endpoint circuit is open (0 = go ahead)
+
+    Parked stages re-schedule themselves instead of calling the endpoint and
+    burning a retry; jitter spreads them around the half-open probe.
+
+    Args:
+        endpoint: Circuit name (e.g., "sora.retrieve")
+        wait: Seconds the circuit stays open, if already known
+    """
+    if wait is None:
+        wait = circuit_breaker.open_for(endpoint)
+    if not wait:
+        return 0.0
+    metrics.incr("video_stage_parked_total", endpoint=endpoint)
+    return round(wait * (1 + random.random() * 0.2) + 1, 2)
+
+
+def _model_id(video) -> str:
+    """Model ID string of a video (e.g., "sora-2")"""
+    return video.model.value if hasattr(video.model, "value") else video.model
+
+
+def _provider(video) -> VideoProvider:
+    """Provider rendering the video's job"""
+    return get_provider(video.provider)
+
+
+def _provider_model(video) -> str:
+    """
+    Model the video's provider renders (e.g., "gen4_turbo" for sora-2 on Runway)
+
+    Rate limits and render/download timings are kept per provider model.
+    """
+    return _provider(video).provider_model(_model_id(video)) or _model_id(video)
+
+
+def _fail_video(db, video_id: int, logger: SSELogger, error_message: str) -> dict:
+    """
+    Mark video as failed, refund its credit reservation, release its lease
+    and Sora slot and notify SSE subscribers
+    """
+    video = update_video_status(
+        db,
+        video_id,
+        VideoStatus.FAILED,
+        error_message=error_message,
+    )
+    video.lease_expires_at = None
+    refunded = credit_ledger.release(db, video_id)
+    db.commit()
+    if refunded:
+        print(f"💸 Refunded {refunded} credits for failed video {video_id}")
+    sora_rate_limiter.release(_provider_model(video), video_id)
+    release_held_videos(db, video)
+    logger.publish_error(error_message)
+    return {
+        "status": "failed",
+        "video_id": video_id,
+        "error": error_message,
+    }
+
+
+def _complete_video(db, video, logger: SSELogger, video_gcs_url: str):
+    """Mark the video completed with its GCS URL, capture its credits and notify SSE subscribers"""
+    video.local_video_path = None
+    video.generation_stage = None
+    video.lease_expires_at = None
+    credit_ledger.capture(db, video.id)  # Committed with the status
+    update_video_status(
+        db,
+        video.id,
+        VideoStatus.COMPLETED,
+        video_url=video_gcs_url,  # GCS public URL
+    )
+
+    # 🎉 Update is_new_user flag on first successful video generation
+    from app.models.user import User
+    user = db.query(User).filter(User.id == video.user_id).first()
+    if user and user.is_new_user:
+        user.is_new_user = False
+        db.commit()
+        print(f"✅ User {user.id} ({user.email}) is no longer a new user")
+
+    logger.publish_completion(video_gcs_url)
+    print(f"🎉 Video {video.id} completed successfully!")
+    release_held_videos(db, video)
+
+    # Optional derived assets, built in the background
+    if settings.VIDEO_PREVIEWS_ENABLED:
+        generate_preview_task.delay(video.id)
+    if settings.VIDEO_RENDITIONS_ENABLED:
+        generate_renditions_task.delay(video.id)
+
+
+def _resubmit_or_fail(db, video, logger: SSELogger, error_message: str) -> dict:
+    """
+    Handle a failed Sora render: submit a new job or give up
+
+    The job ID is cleared so the submit stage starts a fresh render.
+    """
+    attempt = video.sora_attempt or 0
+    if attempt < MAX_GENERATION_ATTEMPTS:
+        print(f"🔄 Re-submitting video {video.id} (attempt {attempt + 1}/{MAX_GENERATION_ATTEMPTS})...")
+        logger.publish(0, f"🔄 Retrying... (attempt {attempt + 1}/{MAX_GENERATION_ATTEMPTS})")
+        video.sora_job_id = None
+        video.sora_submitted_at = None
+        video.status = VideoStatus.PENDING
+        video.queued_at = datetime.utcnow() + timedelta(seconds=STAGE_RETRY_COUNTDOWN)
+        _set_stage(db, video, GenerationStage.SUBMIT)
+        enqueue_video_generation(video.id, video.queue_lane, countdown=STAGE_RETRY_COUNTDOWN)
+        return {"status": "resubmitted", "video_id": video.id, "error": error_message}
+
+    return _fail_video(db, video.id, logger, error_message)
+
+
+def _schedule_poll(video_id: int, countdown: Optional[float] = None):
+    """
+    Schedule the next status check for a submitted job
+
+    When the dedicated asyncio poller (app.services.sora_poller) is enabled
+    it owns all status checks, so no Celery poll task is scheduled.
+    """
+    if settings.SORA_POLLER_ENABLED:
+        return
+    poll_video_task.apply_async((video_id,), countdown=countdown or settings.SORA_POLL_INTERVAL_SECONDS)
+
+
+def _apply_job_status(db, video, logger: SSELogger, status_result: dict) -> dict:
+    """
+    Advance the pipeline from one observed Sora job status
+
+    Shared by the Celery poll stage and the dedicated poller so both paths
+    handle completion, failure and timeouts identically.
+
+    Args:
+        db: Database session
+        video: Video in the POLL stage
+        logger: SSE logger for the video
+        status_result: Result dict from check_generation_status()
+            ("timeout" is used by callers that detect the deadline)
+
+    Returns:
+        Task result dict; "status" is the job status for jobs still rendering
+    """
+    job_status = status_result["status"]
+
+    if job_status != "error":
+        video.sora_last_status = job_status
+
+    if job_status == "completed":
+        sora_rate_limiter.release(_provider_model(video), video.id)
+        stage_timings.record(
+            "render", _provider_model(video), video.duration,
+            (datetime.utcnow() - video.sora_submitted_at).total_seconds(),
+        )
+        _set_stage(db, video, GenerationStage.DOWNLOAD)
+        download_video_task.delay(video.id)
+        return {"status": "completed", "video_id": video.id}
+
+    if job_status in ("failed", "expired"):
+        error_message = status_result.get("error_message", "Unknown error")
+        print(f"❌ Video {video.id} generation {job_status.upper()}: {error_message}")
+        return _resubmit_or_fail(db, video, logger, error_message)
+
+    # 超时不重试（已经等了 20 分钟）
+    if job_status == "timeout":
+        print(f"⏰ Video {video.id} generation TIMEOUT")
+        result = _fail_video(
+            db, video.id, logger, f"Video generation timeout after {MAX_WAIT_SECONDS}s"
+        )
+        result["status"] = "timeout"
+        return result
+
+    _renew_lease(video)
+
+    if job_status == "error":
+        # Status unknown (network error, open circuit) - keep the job and check again later
+        db.commit()
+        print(f"⚠️  Could not check {video.provider or 'sora'} job for video {video.id}: {status_result.get('error_message')}")
+        return {"status": "in_progress", "video_id": video.id, "next_poll_seconds": status_result.get("retry_after")}
+
+    # Still processing: forward the provider's progress with the ETA from stage timings
+    elapsed = (datetime.utcnow() - video.sora_submitted_at).total_seconds()
+    render_estimate = stage_timings.estimate_render(
+        _provider_model(video), video.duration, elapsed, status_result.get("progress"), video.provider
+    )
+    video.estimated_finish_at = render_estimate.finish_at() or video.estimated_finish_at
+    db.commit()
+
+    status_msg = f"⏳ Processing video... ({int(elapsed)}s elapsed)"
+    if render_estimate.eta_seconds is not None:
+        status_msg = f"⏳ Processing video... ({int(elapsed)}s elapsed, ~{int(render_estimate.eta_seconds)}s left)"
+    print(f"{status_msg} - Video {video.id} status: {job_status}, progress: {render_estimate.progress}")
+    logger.publish_progress(5, status_msg, render_estimate.display_progress, **render_estimate.event_fields())
+
+    return {
+        "status": job_status,
+        "video_id": video.id,
+        "next_poll_seconds": render_estimate.next_poll_seconds,
+    }
+
+
+def _resume_existing_job(db, video, logger: SSELogger) -> Optional[dict]:
+    """
+    Reattach to the video's previously submitted Sora job, if it is still usable
+
+    Retries, redeliveries and manual retries land here instead of paying for a
+    second render. Only a job that is actually failed or expired is dropped.
+
+    Returns:
+        Task result dict if the pipeline was resumed, None if a new job
+        must be submitted
+    """
+    if not video.sora_job_id:
+        return None
+
+    # Render already finished - resume at the download/process/upload stage
+    post_render_tasks = {
+        GenerationStage.DOWNLOAD.value: download_video_task,
+        GenerationStage.PROCESS.value: process_video_task,
+        GenerationStage.UPLOAD.value: upload_video_task,
+    }
+    if video.generation_stage in post_render_tasks:
+        print(f"♻️  Resuming video {video.id} at stage '{video.generation_stage}' (job {video.sora_job_id})")
+        video.status = VideoStatus.PROCESSING
+        video.error_message = None
+        _set_stage(db, video, GenerationStage(video.generation_stage))
+        post_render_tasks[video.generation_stage].delay(video.id)
+        return {"status": "resumed", "video_id": video.id, "stage": video.generation_stage}
+
+    status_result = _provider(video).check_status(video.sora_job_id)
+    job_status = status_result["status"]
+
+    if job_status == "error":
+        # Can't tell whether the job is alive - retry later rather than re-submit
+        raise Exception(f"Unable to check existing {video.provider or 'sora'} job {video.sora_job_id}: {status_result.get('error_message')}")
+
+    video.sora_last_status = job_status
+
+    if job_status in ("failed", "expired"):
+        print(f"🗑️  Existing {video.provider or 'sora'} job {video.sora_job_id} is {job_status}, submitting a new one")
+        video.sora_job_id = None
+        video.sora_submitted_at = None
+        db.commit()
+        return None
+
+    print(f"♻️  Reattaching video {video.id} to {video.provider or 'sora'} job {video.sora_job_id} ({job_status})")
+    logger.publish(3, f"♻️  Resuming existing video job (Job ID: {video.sora_job_id[:16]}...)")
+    video.status = VideoStatus.PROCESSING
+    video.error_message = None
+    _set_stage(db, video, GenerationStage.POLL)
+
+    result = _apply_job_status(db, video, logger, status_result)
+    if result["status"] in ("queued", "in_progress"):
+        _schedule_poll(video.id, result.get("next_poll_seconds"))
+    result["resumed"] = True
+    return result
+
+
+def _submit_with_failover(task_id: str, video, logger: SSELogger, duration: int):
+    """
+    Submit the video's render to the best provider, failing over to the next one
+
+    A provider that is throttled by the rate limiter, has its circuit open or
+    fails the submit with a retryable error is excluded and the router picks
+    again. Terminal errors are raised as-is: they would fail everywhere.
+
+    Returns:
+        (provider, submit result), or (None, seconds to wait) when no
+        provider can take the render right now
+
+    Raises:
+        NoProviderError: If no configured provider renders the model
+        Exception: The last submit error if every provider failed
+    """
+    model = _model_id(video)
+    held_model = _provider_model(video) if video.sora_attempt else None  # Slot kept from the last attempt
+    tried = []
+    wait = None
+    last_error = None
+
+    while True:
+        try:
+            provider = provider_router.choose(model, duration, exclude=tried)
+        except CircuitOpenException as e:
+            wait = e.retry_after if wait is None else min(wait, e.retry_after)
+            break
+        except NoProviderError:
+            if not tried:
+                raise
+            break
+
+        tried.append(provider.name)
+        provider_model = provider.provider_model(model)
+        if held_model and held_model != provider_model:
+            sora_rate_limiter.release(held_model, video.id)
+            held_model = None
+
+        # Cluster-wide provider capacity: wait cooperatively instead of hitting a 429
+        decision = sora_rate_limiter.acquire_submit(provider_model, video.id)
+        if not decision.allowed:
+            print(f"⏸️  [Task {task_id}] {provider.name} {provider_model} {decision.reason} limit reached for video {video.id}")
+            wait = decision.retry_after if wait is None else min(wait, decision.retry_after)
+            continue
+
+        if len(tried) == 1:
+            logger.publish(0, "🚀 Video generation task started")
+            logger.publish(2, "📸 Downloading and processing reference image...")
+
+        started = time.monotonic()
+        try:
+            result = provider.submit(
+                prompt=video.prompt,
+                image_url=video.reference_image_url,
+                duration=duration,
+                model=model,
+            )
+        except Exception as e:
+            sora_rate_limiter.release(provider_model, video.id)
+            kind = classify_error(e)
+            if kind == TERMINAL:
+                raise
+            print(f"🔀 [Task {task_id}] {provider.name} submit failed ({kind}): {e}")
+            metrics.incr("video_provider_failover_total", provider=provider.name, reason=kind)
+            if isinstance(e, CircuitOpenException):
+                wait = e.retry_after if wait is None else min(wait, e.retry_after)
+            else:
+                last_error = e
+            continue
+
+        stage_timings.record("submit", provider_model, result["duration"], time.monotonic() - started)
+        return provider, result
+
+    if wait is None:
+        raise last_error
+    return None, wait
+
+
+def _handle_stage_exception(task, db, video_id: int, logger: SSELogger, exc: Exception):
+    """
+    Shared exception handling for pipeline stages
+
+    Retryable and rate-limited errors retry the same stage with exponential
+    backoff and jitter (rate limits honour the server's Retry-After);
+    terminal errors and exhausted retries mark the video as failed, and the
+    exception is re-raised for Celery. A video deleted mid-pipeline is
+    skipped (delete_video already settled its credits and slots).
+    """
+    import traceback
+    if isinstance(exc, NotFoundException) and db.query(Video.id).filter(Video.id == video_id).first() is None:
+        print(f"🗑️  [Task {task.request.id}] Video {video_id} was deleted, skipping {task.name}")
+        return {"status": "skipped", "video_id": video_id}
+
+    error_message = f"Task error: {str(exc)}"
+    kind = classify_error(exc)
+    print(f"\n💥 [Task {task.request.id}] {task.name} failed for video {video_id} ({kind}): {error_message}")
+    print(traceback.format_exc())
+
+    if kind != TERMINAL and task.request.retries < task.max_retries:
+        countdown = retry_delay(
+            exc, task.request.retries, settings.STAGE_RETRY_BASE_SECONDS, settings.STAGE_RETRY_MAX_SECONDS
+        )
+        print(f"🔄 [Task {task.request.id}] Scheduling retry {task.request.retries + 1}/{task.max_retries} in {countdown:.0f}s...")
+        raise task.retry(countdown=countdown, exc=exc)
+
+    try:
+        _fail_video(db, video_id, logger, error_message)
+    except Exception as db_error:
+        print(f"   Failed to update database: {db_error}")
+
+    raise exc
+
+
 @celery_app.task(name="generate_video_task", bind=True, max_retries=3)
-def generate_video_task(self, video_id: int):
+def generate_video_task(self, video_id: int, resume: bool = False):
     """
-    Background task to generate video using Sora 2 API with SSE logging
+    Submit stage: validate the video record and submit the Sora job
 
     Args:
         video_id: Database ID of the video record
+        resume: Set by the reaper to resume an in-flight video whose
+            worker lease expired (bypasses the duplicate guard)
 
     This task:
     1. Retrieves video details from database
     2. Checks for duplicate processing (防止重复调用 API)
-    3. Calls OpenAI Sora 2 API with image and prompt
-    4. Streams real-time progress via SSE (Redis Pub/Sub)
-    5. Polls for completion (up to 20 minutes)
-    6. Downloads generated video to local storage
-    7. Updates database with video URL and status
-    8. Auto-retries on failure (max 3 attempts)
+    3. Reattaches to an existing Sora job if one is still usable
+    4. Otherwise submits the image + prompt to OpenAI Sora 2 (no waiting)
+    5. Stores the job ID on the video row and schedules the poll stage
     """
     task_id = self.request.id
-    print(f"\n{'='*60}")
-    print(f"🎬 [Task {task_id}] Starting video generation for video_id: {video_id}")
-    print(f"   Retry: {self.request.retries}/{self.max_retries}")
-    print(f"{'='*60}\n")
+    print(f"\n🎬 [Task {task_id}] Submit stage for video_id: {video_id} (retry {self.request.retries}/{self.max_retries})")
 
     db = SessionLocal()
     logger = SSELogger(video_id)
 
     try:
-        # Step 0: Get video record and validate
         video = get_video_by_id(db, video_id)
 
-        if not video:
-            raise Exception(f"Video with id {video_id} not found")
-
-        # ⚠️ 防止重复调用 API - Check if already processing/completed
-        if video.status in [VideoStatus.PROCESSING, VideoStatus.COMPLETED]:
+        # ⚠️ 防止重复调用 API - skip finished videos and duplicate deliveries
+        # of an in-flight video (stage retries and broker redeliveries resume)
+        redelivered = resume or self.request.retries > 0 or bool(
+            (self.request.delivery_info or {}).get("redelivered")
+        )
+        duplicate = video.status == VideoStatus.PROCESSING and not redelivered
+        if video.status == VideoStatus.COMPLETED or duplicate:
             print(f"⚠️  [Task {task_id}] Video {video_id} already {video.status}, skipping...")
             logger.publish(0, f"⚠️  Video already {video.status}, skipping duplicate task")
             return {"status": "skipped", "reason": f"Already {video.status}"}
 
-        print(f"📝 [Task {task_id}] Video details:")
-        print(f"   ID: {video.id}")
-        print(f"   User ID: {video.user_id}")
-        print(f"   Model: {video.model}")
-        print(f"   Prompt: {video.prompt[:100]}...")
-        print(f"   Reference Image: {video.reference_image_url}")
+        # Circuit open (the job's provider, or every provider that could take a
+        # new render): park the video instead of claiming it and burning retries
+        if video.sora_job_id:
+            parked_for = _parked_for(_provider(video).endpoint("retrieve"))
+        else:
+            parked_for = _parked_for(
+                f"{_model_id(video)}.create", provider_router.open_for(_model_id(video))
+            )
+        if parked_for:
+            print(f"🔌 [Task {task_id}] Provider circuit open, parking video {video_id} for {parked_for}s")
+            if video.status == VideoStatus.PROCESSING:
+                _renew_lease(video)  # Keep the reaper off the parked video
+                db.commit()
+            enqueue_video_generation(
+                video_id, video.queue_lane, countdown=parked_for,
+                kwargs={"resume": video.status == VideoStatus.PROCESSING},
+            )
+            return {"status": "parked", "video_id": video_id}
+
+        if video.status == VideoStatus.PENDING and queue_lanes.lane_is_full(db, queue_lanes.normalize_lane(video.queue_lane)):
+            # Lane at its concurrency cap: wait in the lane instead of taking a Sora slot
+            lane = queue_lanes.normalize_lane(video.queue_lane)
+            print(f"⏸️  [Task {task_id}] Lane {lane} is full, deferring video {video_id}...")
+            metrics.incr("video_lane_deferred_total", lane=lane)
+            enqueue_video_generation(video_id, lane, countdown=settings.VIDEO_LANE_DEFER_SECONDS)
+            return {"status": "deferred", "video_id": video_id, "lane": lane}
+
+        if video.status == VideoStatus.PENDING:
+            # Claim atomically so two queued tasks for one video (double-clicks,
+            # deduplicated requests) never both submit to Sora
+            claimed = (
+                db.query(Video)
+                .filter(Video.id == video_id, Video.status == VideoStatus.PENDING)
+                .update({Video.status: VideoStatus.PROCESSING}, synchronize_session=False)
+            )
+            db.commit()
+            if not claimed:
+                print(f"⚠️  [Task {task_id}] Video {video_id} claimed by another task, skipping...")
+                return {"status": "skipped", "reason": "Claimed by another task"}
+            db.refresh(video)
+            waited = queue_lanes.record_queue_wait(video)
+            if waited is not None:
+                stage_timings.record("queue", _model_id(video), video.duration, waited)
+
+        resumed = _resume_existing_job(db, video, logger)
+        if resumed:
+            return resumed
 
         # Validate required fields
         if not video.reference_image_url:
-            raise Exception("Reference image URL is required")
+            raise ValueError("Reference image URL is required")
 
         if not video.prompt:
-            raise Exception("Prompt is required")
+            raise ValueError("Prompt is required")
 
-        # Step 1: Update status to PROCESSING
-        print(f"\n⚙️  [Task {task_id}] Updating status to PROCESSING...")
-        update_video_status(db, video_id, VideoStatus.PROCESSING)
-        logger.publish(0, "🚀 Video generation task started")
-
-        # Step 2: Call Sora service (会自动通过 SSE 推送详细日志)
-        print(f"\n🚀 [Task {task_id}] Calling Sora service...")
-
-        # Create unique output filename
-        output_filename = f"user_{video.user_id}_video_{video.id}.mp4"
-
-        # Call Sora service - 传递 video_id 以启用 SSE 日志
-        # Get duration from video record (default to 8 if not set)
-        requested_duration = video.duration if video.duration else 8
         # Ensure duration is supported by Sora (4, 8, 12 seconds)
-        if requested_duration not in (4, 8, 12):
+        requested_duration = video.duration if video.duration else 8
+        if requested_duration not in SUPPORTED_DURATIONS:
             print(f"⚠️  Unsupported duration {requested_duration}s detected, defaulting to 8s")
             requested_duration = 8
 
-        print(f"   Duration: {requested_duration}s")
+        print(f"   Model: {video.model}, Duration: {requested_duration}s")
+        print(f"   Reference Image: {video.reference_image_url}")
 
-        result = asyncio.run(
-            sora_service.generate_and_wait(
-                prompt=video.prompt,
-                image_url=video.reference_image_url,
-                output_filename=output_filename,
-                video_id=video_id,  # 🔥 关键：传递 video_id 启用 SSE 日志
-                duration=requested_duration,  # Pass duration from database
-                max_wait_seconds=1200,  # 20 minutes
+        video.status = VideoStatus.PROCESSING
+        video.error_message = None
+        _set_stage(db, video, GenerationStage.SUBMIT)
+
+        provider, result = _submit_with_failover(task_id, video, logger, requested_duration)
+        if provider is None:
+            # Every provider throttled or parked: result is the shortest wait
+            wait = result
+            print(f"⏸️  [Task {task_id}] No provider can take video {video_id} now, retrying in {wait}s")
+            logger.publish(0, "⏳ Waiting for video generation capacity...")
+            enqueue_video_generation(
+                video_id, video.queue_lane, countdown=wait, kwargs={"resume": True}
             )
-        )
+            return {"status": "throttled", "video_id": video_id}
 
-        print(f"\n📊 [Task {task_id}] Generation result: {result['status']}")
+        video.provider = provider.name
+        video.sora_job_id = result["job_id"]
+        video.sora_submitted_at = datetime.utcnow()
+        video.sora_attempt = (video.sora_attempt or 0) + 1
+        video.sora_last_status = result["status"]
+        video.duration = result["duration"]
+        video.resolution = result["resolution"]
+        _set_stage(db, video, GenerationStage.POLL)
 
-        # Step 3: Handle result
-        if result["status"] == "completed":
-            # ✅ 成功 - Upload video to GCS
-            local_video_path = result["video_path"]
+        logger.publish(3, f"✅ Video job submitted (Job ID: {result['job_id'][:16]}...)")
+        logger.publish(4, "⏳ Waiting for AI processing (this may take 2-5 minutes)...")
 
-            print(f"\n✅ [Task {task_id}] Video generation COMPLETED!")
-            print(f"   Local path: {local_video_path}")
+        # First check once a useful share of the expected render time has passed
+        render_estimate = stage_timings.estimate_render(_provider_model(video), video.duration, 0, provider=video.provider)
+        _schedule_poll(video_id, render_estimate.next_poll_seconds)
 
-            # Step 3.1: Upload video to Google Cloud Storage
-            print(f"\n☁️  [Task {task_id}] Uploading video to GCS...")
-            logger.publish(8, "☁️  Uploading video to cloud storage...")
+        return {"status": "submitted", "video_id": video_id, "job_id": result["job_id"], "provider": provider.name}
 
-            try:
-                # Read local video file
-                with open(local_video_path, 'rb') as f:
-                    video_content = f.read()
+    except Exception as e:
+        return _handle_stage_exception(self, db, video_id, logger, e)
 
-                print(f"   Video size: {len(video_content) / (1024*1024):.2f} MB")
+    finally:
+        logger.close()
+        db.close()
 
-                # Create UploadFile object for GCS
-                temp_file = UploadFile(
-                    filename=output_filename,
-                    file=BytesIO(video_content)
-                )
-                temp_file.content_type = "video/mp4"
 
-                # Upload to GCS
-                blob_name, video_gcs_url, _ = gcs_service.upload_file(
-                    file=temp_file,
+@celery_app.task(name="poll_video_task", bind=True, max_retries=3)
+def poll_video_task(self, video_id: int):
+    """
+    Poll stage: check the Sora job once and re-schedule itself
+
+    Args:
+        video_id: Database ID of the video record
+
+    Each invocation performs a single status check. While the job is still
+    rendering the task re-enqueues itself with a countdown instead of
+    sleeping, so the worker slot is released between checks.
+    """
+    db = SessionLocal()
+    logger = SSELogger(video_id)
+
+    try:
+        video = get_video_by_id(db, video_id)
+
+        if video.status != VideoStatus.PROCESSING or video.generation_stage != GenerationStage.POLL.value:
+            return {"status": "skipped", "reason": f"Video in stage {video.generation_stage}"}
+
+        elapsed = (datetime.utcnow() - video.sora_submitted_at).total_seconds()
+        if elapsed > MAX_WAIT_SECONDS:
+            status_result = {"status": "timeout", "job_id": video.sora_job_id}
+        else:
+            provider = _provider(video)
+            parked_for = _parked_for(provider.endpoint("retrieve"))
+            if parked_for:
+                _renew_lease(video)
+                db.commit()
+                _schedule_poll(video_id, countdown=parked_for)
+                return {"status": "parked", "video_id": video_id}
+
+            decision = sora_rate_limiter.acquire_poll(_provider_model(video), video_id)
+            if not decision.allowed:
+                # Over the request budget: check again once a token is available
+                _renew_lease(video)
+                db.commit()
+                _schedule_poll(video_id, countdown=decision.retry_after)
+                return {"status": "throttled", "video_id": video_id}
+
+            status_result = provider.check_status(video.sora_job_id)
+
+        result = _apply_job_status(db, video, logger, status_result)
+
+        if result["status"] in ("queued", "in_progress"):
+            _schedule_poll(video_id, result.get("next_poll_seconds"))
+
+        return result
+
+    except Exception as e:
+        return _handle_stage_exception(self, db, video_id, logger, e)
+
+    finally:
+        logger.close()
+        db.close()
+
+
+@celery_app.task(name="apply_sora_status_task", bind=True, max_retries=3)
+def apply_sora_status_task(self, video_id: int, status_result: dict):
+    """
+    Apply a terminal job status observed by the dedicated Sora poller
+
+    Args:
+        video_id: Database ID of the video record
+        status_result: Status dict ("completed", "failed" or "timeout")
+    """
+    db = SessionLocal()
+    logger = SSELogger(video_id)
+
+    try:
+        video = get_video_by_id(db, video_id)
+
+        if video.status != VideoStatus.PROCESSING or video.generation_stage != GenerationStage.POLL.value:
+            return {"status": "skipped", "reason": f"Video in stage {video.generation_stage}"}
+
+        if status_result.get("job_id") and status_result["job_id"] != video.sora_job_id:
+            return {"status": "skipped", "reason": "Stale job status"}
+
+        return _apply_job_status(db, video, logger, status_result)
+
+    except Exception as e:
+        return _handle_stage_exception(self, db, video_id, logger, e)
+
+    finally:
+        logger.close()
+        db.close()
+
+
+@celery_app.task(name="download_video_task", bind=True, max_retries=3)
+def download_video_task(self, video_id: int):
+    """
+    Download stage: fetch the rendered video from OpenAI
+
+    Args:
+        video_id: Database ID of the video record
+
+    The content is saved to local storage and the process/upload stages are
+    routed to this worker's direct queue, because the downloaded file only
+    exists on this host. Without post-processing, VIDEO_STREAM_UPLOAD streams
+    the content straight into GCS and the video completes here.
+    """
+    db = SessionLocal()
+    logger = SSELogger(video_id)
+
+    try:
+        video = get_video_by_id(db, video_id)
+
+        if video.status != VideoStatus.PROCESSING or video.generation_stage != GenerationStage.DOWNLOAD.value:
+            return {"status": "skipped", "reason": f"Video in stage {video.generation_stage}"}
+
+        _renew_lease(video)
+        db.commit()
+
+        provider = _provider(video)
+        parked_for = _parked_for(provider.endpoint("content"))
+        if parked_for:
+            print(f"🔌 {provider.name} content circuit open, parking download of video {video_id} for {parked_for}s")
+            download_video_task.apply_async((video_id,), countdown=parked_for)
+            return {"status": "parked", "video_id": video_id}
+
+        if settings.VIDEO_STREAM_UPLOAD and not settings.VIDEO_POSTPROCESS_ENABLED:
+            # Pipe the download straight into a resumable GCS upload:
+            # no temp file, memory bounded by GCS_UPLOAD_CHUNK_SIZE
+            logger.publish(6, f"💾 Streaming generated video to cloud storage (Job ID: {video.sora_job_id[:16]}...)...")
+            started = time.monotonic()
+            try:
+                _, video_gcs_url, file_size = gcs_service.upload_stream(
+                    provider.stream(video.sora_job_id),
                     user_id=video.user_id,
+                    filename=_output_filename(video),
                     file_type="video",
-                    content_type="video/mp4"
+                    content_type="video/mp4",
                 )
+            except JobNotFoundError as e:
+                video.sora_last_status = "expired"
+                return _resubmit_or_fail(db, video, logger, f"{provider.name} job content expired: {e}")
+
+            record_download_metrics("stream", file_size, time.monotonic() - started)
+            stage_timings.record("download", _provider_model(video), video.duration, time.monotonic() - started)
+            print(f"✅ Video {video_id} streamed to GCS ({file_size / (1024*1024):.2f} MB): {video_gcs_url}")
+            _complete_video(db, video, logger, video_gcs_url)
+            return {"status": "success", "video_id": video_id, "video_url": video_gcs_url}
+
+        logger.publish(6, f"💾 Downloading generated video (Job ID: {video.sora_job_id[:16]}...)...")
+        started = time.monotonic()
+        try:
+            local_video_path = provider.download(video.sora_job_id, _output_filename(video))
+        except JobNotFoundError as e:
+            # Rendered content expired before we fetched it - needs a new render
+            video.sora_last_status = "expired"
+            return _resubmit_or_fail(db, video, logger, f"{provider.name} job content expired: {e}")
+        stage_timings.record("download", _provider_model(video), video.duration, time.monotonic() - started)
+
+        video.local_video_path = local_video_path
+        next_task = upload_video_task
+        if settings.VIDEO_POSTPROCESS_ENABLED:
+            _set_stage(db, video, GenerationStage.PROCESS)
+            next_task = process_video_task
+        else:
+            _set_stage(db, video, GenerationStage.UPLOAD)
+        logger.publish(7, "📦 Saving video to storage...")
 
-                print(f"✅ [Task {task_id}] Video uploaded to GCS!")
-                print(f"   GCS URL: {video_gcs_url}")
-                logger.publish(9, f"✅ Video uploaded successfully!")
-
-                # Step 3.2: Delete local temporary file
-                try:
-                    os.remove(local_video_path)
-                    print(f"🗑️  [Task {task_id}] Deleted local temporary file: {local_video_path}")
-                except Exception as cleanup_error:
-                    print(f"⚠️  [Task {task_id}] Failed to delete local file: {cleanup_error}")
-
-            except Exception as upload_error:
-                error_message = f"Failed to upload video to GCS: {str(upload_error)}"
-                print(f"❌ [Task {task_id}] {error_message}")
-                logger.publish_error(error_message)
-
-                # Update video status to failed
-                update_video_status(
-                    db,
-                    video_id,
-                    VideoStatus.FAILED,
-                    error_message=error_message
-                )
+        next_task.apply_async((video_id,), queue=worker_direct(self.request.hostname))
+        return {"status": "downloaded", "video_id": video_id, "video_path": local_video_path}
 
-                return {
-                    "status": "failed",
-                    "video_id": video_id,
-                    "error": error_message
-                }
-
-            # Step 3.3: Update database with GCS URL
-            update_video_status(
-                db,
-                video_id,
-                VideoStatus.COMPLETED,
-                video_url=video_gcs_url,  # GCS public URL
-                poster_url=None,  # TODO: Generate poster from first frame
-            )
+    except Exception as e:
+        return _handle_stage_exception(self, db, video_id, logger, e)
 
-            # Update resolution and ensure duration persisted
-            video.resolution = "1280x720"  # TODO: Get from actual video metadata
-            video.duration = requested_duration
-            db.commit()
+    finally:
+        logger.close()
+        db.close()
 
-            # 🎉 Update is_new_user flag on first successful video generation
-            from app.models.user import User
-            user = db.query(User).filter(User.id == video.user_id).first()
-            if user and user.is_new_user:
-                user.is_new_user = False
-                db.commit()
-                print(f"✅ [Task {task_id}] User {user.id} ({user.email}) is no longer a new user")
-                logger.publish(10, "🎉 First video completed! Welcome to AIVideo.DIY!")
-
-            print(f"\n🎉 [Task {task_id}] Task completed successfully!")
-            return {
-                "status": "success",
-                "video_id": video_id,
-                "video_url": video_gcs_url,  # Return GCS URL
-            }
-
-        elif result["status"] == "failed":
-            # ❌ 失败
-            error_message = result.get("error_message", "Unknown error")
-
-            print(f"\n❌ [Task {task_id}] Video generation FAILED!")
-            print(f"   Error: {error_message}")
-
-            update_video_status(
-                db,
-                video_id,
-                VideoStatus.FAILED,
-                error_message=error_message,
-            )
 
-            # 🔄 自动重试（如果未达到最大重试次数）
-            if self.request.retries < self.max_retries:
-                print(f"🔄 [Task {task_id}] Scheduling retry {self.request.retries + 1}/{self.max_retries}...")
-                logger.publish(0, f"🔄 Retrying... (attempt {self.request.retries + 1}/{self.max_retries})")
-                raise self.retry(countdown=60, exc=Exception(error_message))
-
-            return {
-                "status": "failed",
-                "video_id": video_id,
-                "error": error_message,
-            }
-
-        elif result["status"] == "timeout":
-            # ⏰ 超时
-            error_message = result.get("error_message", "Generation timeout after 20 minutes")
-
-            print(f"\n⏰ [Task {task_id}] Video generation TIMEOUT!")
-            print(f"   Error: {error_message}")
-
-            update_video_status(
-                db,
-                video_id,
-                VideoStatus.FAILED,
-                error_message=error_message,
-            )
+def _redownload_if_missing(db, video, task_id: str) -> Optional[dict]:
+    """Send the video back to the download stage if its local file is gone"""
+    if video.local_video_path and os.path.exists(video.local_video_path):
+        return None
 
-            # 超时不重试（已经等了 20 分钟）
-            return {
-                "status": "timeout",
-                "video_id": video_id,
-                "error": error_message,
-            }
+    # File lives on another host (or was cleaned up) - download again
+    print(f"⚠️  [Task {task_id}] Local file missing for video {video.id}, re-running download stage")
+    _set_stage(db, video, GenerationStage.DOWNLOAD)
+    download_video_task.delay(video.id)
+    return {"status": "redownload", "video_id": video.id}
 
-        else:
-            # ❓ 未知状态
-            error_message = f"Unknown status: {result['status']}"
-            print(f"\n❓ [Task {task_id}] Unknown status!")
-
-            update_video_status(
-                db,
-                video_id,
-                VideoStatus.FAILED,
-                error_message=error_message,
-            )
 
-            return {
-                "status": "failed",
-                "video_id": video_id,
-                "error": error_message,
-            }
+def _extract_and_upload_poster(video, local_video_path: str) -> Optional[str]:
+    """Extract the first keyframe as a JPEG, upload it to GCS and return its URL"""
+    if not ffmpeg_available():
+        print(f"⚠️  {settings.FFMPEG_BINARY} not found, skipping poster for video {video.id}")
+        return None
+
+    poster_path = f"{os.path.splitext(local_video_path)[0]}_poster.jpg"
+    try:
+        extract_poster(local_video_path, poster_path)
+        _, poster_url, _ = gcs_service.upload_local_file(
+            poster_path,
+            user_id=video.user_id,
+            file_type="poster",
+            content_type="image/jpeg",
+        )
+        return poster_url
+    finally:
+        if os.path.exists(poster_path):
+            os.remove(poster_path)
+
+
+@celery_app.task(name="process_video_task", bind=True, max_retries=3)
+def process_video_task(self, video_id: int):
+    """
+    Process stage: read real MP4 metadata, faststart-remux and publish a poster frame
+
+    Runs on the worker that downloaded the file. Post-processing is
+    best-effort: a failure here is logged and the video is still uploaded.
+
+    Args:
+        video_id: Database ID of the video record
+    """
+    task_id = self.request.id
+    db = SessionLocal()
+    logger = SSELogger(video_id)
+
+    try:
+        video = get_video_by_id(db, video_id)
+
+        if video.status != VideoStatus.PROCESSING or video.generation_stage != GenerationStage.PROCESS.value:
+            return {"status": "skipped", "reason": f"Video in stage {video.generation_stage}"}
+
+        redownload = _redownload_if_missing(db, video, task_id)
+        if redownload:
+            return redownload
+
+        _renew_lease(video)
+        db.commit()
+
+        local_video_path = video.local_video_path
+        process_started = time.monotonic()
+
+        try:
+            metadata = read_mp4_metadata(local_video_path)
+            video.duration = round(metadata.duration) or video.duration
+            video.resolution = metadata.resolution or video.resolution
+            video.bitrate = metadata.bitrate
+            print(f"🎞️  [Task {task_id}] Video {video_id}: {metadata.resolution}, {metadata.duration:.2f}s, {metadata.bitrate} bps")
+
+            # moov at the end forces browsers to fetch most of the file before playing
+            if settings.VIDEO_FASTSTART_ENABLED and not metadata.faststart:
+                started = time.monotonic()
+                faststart(local_video_path)
+                metrics.incr("video_faststart_remuxed_total")
+                print(f"⚡ [Task {task_id}] Moved moov ahead of mdat in {time.monotonic() - started:.2f}s")
+        except Mp4Error as e:
+            print(f"⚠️  [Task {task_id}] Could not read/remux MP4 for video {video_id}: {e}")
+
+        try:
+            poster_url = _extract_and_upload_poster(video, local_video_path)
+            if poster_url:
+                video.poster_url = poster_url
+                print(f"🖼️  [Task {task_id}] Poster uploaded: {poster_url}")
+        except Exception as e:
+            print(f"⚠️  [Task {task_id}] Poster extraction failed for video {video_id}: {e}")
+
+        stage_timings.record("process", _model_id(video), video.duration, time.monotonic() - process_started)
+        _set_stage(db, video, GenerationStage.UPLOAD)
+        upload_video_task.apply_async((video_id,), queue=worker_direct(self.request.hostname))
+        return {"status": "processed", "video_id": video_id, "poster_url": video.poster_url}
 
     except Exception as e:
-        # 💥 异常处理
-        import traceback
-        error_message = f"Task error: {str(e)}"
-        print(f"\n💥 [Task {task_id}] Exception occurred!")
-        print(f"   Error: {error_message}")
-        print(traceback.format_exc())
+        return _handle_stage_exception(self, db, video_id, logger, e)
+
+    finally:
+        logger.close()
+        db.close()
+
+
+@celery_app.task(name="upload_video_task", bind=True, max_retries=3)
+def upload_video_task(self, video_id: int):
+    """
+    Upload stage: push the downloaded video to GCS and complete the record
+
+    Args:
+        video_id: Database ID of the video record
+    """
+    task_id = self.request.id
+    db = SessionLocal()
+    logger = SSELogger(video_id)
+
+    try:
+        video = get_video_by_id(db, video_id)
+
+        if video.status != VideoStatus.PROCESSING or video.generation_stage != GenerationStage.UPLOAD.value:
+            return {"status": "skipped", "reason": f"Video in stage {video.generation_stage}"}
+
+        redownload = _redownload_if_missing(db, video, task_id)
+        if redownload:
+            return redownload
+
+        local_video_path = video.local_video_path
+
+        _renew_lease(video)
+        db.commit()
+
+        print(f"\n☁️  [Task {task_id}] Uploading video {video_id} to GCS...")
+        logger.publish(8, "☁️  Uploading video to cloud storage...")
+
+        started = time.monotonic()
+        blob_name, video_gcs_url, file_size = gcs_service.upload_local_file(
+            local_video_path,
+            user_id=video.user_id,
+            file_type="video",
+            content_type="video/mp4",
+        )
+        stage_timings.record("upload", _model_id(video), video.duration, time.monotonic() - started)
+
+        print(f"✅ [Task {task_id}] Video uploaded to GCS ({file_size / (1024*1024):.2f} MB): {video_gcs_url}")
 
         try:
-            update_video_status(
-                db,
-                video_id,
-                VideoStatus.FAILED,
-                error_message=error_message,
-            )
-            logger.publish_error(error_message)
-        except Exception as db_error:
-            print(f"   Failed to update database: {db_error}")
+            os.remove(local_video_path)
+        except Exception as cleanup_error:
+            print(f"⚠️  [Task {task_id}] Failed to delete local file: {cleanup_error}")
 
-        # 🔄 自动重试
-        if self.request.retries < self.max_retries:
-            print(f"🔄 [Task {task_id}] Scheduling retry {self.request.retries + 1}/{self.max_retries}...")
-            raise self.retry(countdown=60, exc=e)
+        _complete_video(db, video, logger, video_gcs_url)
+        return {
+            "status": "success",
+            "video_id": video_id,
+            "video_url": video_gcs_url,  # Return GCS URL
+        }
 
-        # Re-raise exception for Celery to track
-        raise
+    except Exception as e:
+        return _handle_stage_exception(self, db, video_id, logger, e)
 
     finally:
-        # 清理资源
         logger.close()
         db.close()
-        print(f"\n{'='*60}")
-        print(f"🏁 [Task {task_id}] Task finished for video_id: {video_id}")
-        print(f"{'='*60}\n")
@@ -0,0 +1,123 @@
+"""
+Celery tasks for post-generation video processing
+
+These run in the background after a video is already COMPLETED (or for
+showcase videos at any time), so they never delay the user-visible result.
+A failure only means the optional asset is missing; the video stays playable.
+
+    generate_renditions_task - HLS bitrate ladder (VIDEO_RENDITIONS_ENABLED)
+    generate_preview_task    - 2-3s gallery preview clip (VIDEO_PREVIEWS_ENABLED)
+
+Each has a showcase_* twin for ShowcaseVideo rows.
+"""
+from typing import Callable
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.showcase import ShowcaseVideo
+from app.models.video import Video, VideoStatus
+from app.services.rendition_service import rendition_service
+from app.utils.ffmpeg_utils import ffmpeg_available
+
+POSTPROCESS_RETRY_COUNTDOWN = 120
+
+
+def _is_remote(url: str) -> bool:
+    return bool(url) and url.startswith(("http://", "https://"))
+
+
+def _build_hls(video_url: str, fallback_prefix: str) -> str:
+    return rendition_service.create_renditions(
+        video_url, rendition_service.hls_prefix_for(video_url, fallback_prefix)
+    )
+
+
+def _build_preview(video_url: str, fallback_prefix: str) -> str:
+    return rendition_service.create_preview(
+        video_url, rendition_service.preview_blob_name_for(video_url, fallback_prefix)
+    )
+
+
+def _run_postprocess(
+    task,
+    model,
+    record_id: int,
+    column: str,
+    build: Callable[[str, str], str],
+    fallback_prefix: Callable[[object], str],
+) -> dict:
+    """
+    Build one derived asset for a Video/ShowcaseVideo and store its URL
+
+    Args:
+        task: Bound Celery task (for retries)
+        model: Video or ShowcaseVideo
+        record_id: Row ID
+        column: Column receiving the asset URL (e.g., "hls_url")
+        build: Callable(video_url, fallback_prefix) -> asset URL
+        fallback_prefix: Callable(record) -> GCS prefix used when the source
+            video is not in our bucket
+    """
+    label = f"{model.__tablename__[:-1]} {record_id}"
+
+    if not ffmpeg_available():
+        print(f"⚠️  {settings.FFMPEG_BINARY} not found, skipping {column} for {label}")
+        return {"status": "skipped", "reason": "ffmpeg not available"}
+
+    db = SessionLocal()
+
+    try:
+        record = db.query(model).filter(model.id == record_id).first()
+        if not record or not _is_remote(record.video_url):
+            # Showcase files served by the frontend (relative URLs) can't be fetched here
+            return {"status": "skipped", "id": record_id}
+        if model is Video and record.status != VideoStatus.COMPLETED:
+            return {"status": "skipped", "id": record_id}
+
+        print(f"🎚️  Building {column} for {label}...")
+        asset_url = build(record.video_url, fallback_prefix(record))
+
+        setattr(record, column, asset_url)
+        db.commit()
+        print(f"✅ {column} ready for {label}: {asset_url}")
+        return {"status": "success", "id": record_id, column: asset_url}
+
+    except Exception as e:
+        print(f"❌ Building {column} failed for {label}: {e}")
+        raise task.retry(exc=e, countdown=POSTPROCESS_RETRY_COUNTDOWN)
+
+    finally:
+        db.close()
+
+
+def _video_prefix(video: Video) -> str:
+    return f"{settings.GCS_FOLDER_PREFIX}/users/{video.user_id}/videos/{video.id}"
+
+
+def _showcase_prefix(showcase: ShowcaseVideo) -> str:
+    return f"{settings.GCS_FOLDER_PREFIX}/showcase/{showcase.id}"
+
+
+@celery_app.task(name="generate_renditions_task", bind=True, max_retries=2)
+def generate_renditions_task(self, video_id: int):
+    """Build HLS renditions for a completed video and store the master playlist URL"""
+    return _run_postprocess(self, Video, video_id, "hls_url", _build_hls, _video_prefix)
+
+
+@celery_app.task(name="generate_showcase_renditions_task", bind=True, max_retries=2)
+def generate_showcase_renditions_task(self, showcase_video_id: int):
+    """Build HLS renditions for a showcase video"""
+    return _run_postprocess(self, ShowcaseVideo, showcase_video_id, "hls_url", _build_hls, _showcase_prefix)
+
+
+@celery_app.task(name="generate_preview_task", bind=True, max_retries=2)
+def generate_preview_task(self, video_id: int):
+    """Build the gallery preview clip for a completed video"""
+    return _run_postprocess(self, Video, video_id, "preview_url", _build_preview, _video_prefix)
+
+
+@celery_app.task(name="generate_showcase_preview_task", bind=True, max_retries=2)
+def generate_showcase_preview_task(self, showcase_video_id: int):
+    """Build the gallery preview clip for a showcase video"""
+    return _run_postprocess(self, ShowcaseVideo, showcase_video_id, "preview_url", _build_preview, _showcase_prefix)
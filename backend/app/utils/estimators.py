@@ -0,0 +1,100 @@
+"""
+Streaming quantile estimation with the P² algorithm (Jain & Chlamtac, 1985)
+
+A P² estimator tracks one quantile with five markers (min, p/2, p, (1+p)/2,
+max) whose heights are adjusted with a piecewise-parabolic fit as values
+arrive. It needs O(1) memory and O(1) time per observation, and its state is
+a handful of floats, so it can be serialized to Redis and shared by workers.
+"""
+import bisect
+from typing import Dict, List, Optional
+
+
+class P2Quantile:
+    """Running estimate of the p-quantile of a stream of values"""
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError(f"Quantile must be in (0, 1), got {p}")
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []  # Marker heights (the first five values, sorted, until then)
+        self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.desired = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, value: float):
+        """Observe one value"""
+        value = float(value)
+        self.count += 1
+        if self.count <= 5:
+            bisect.insort(self.heights, value)
+            return
+
+        q, n = self.heights, self.positions
+
+        # Cell k the value falls into, extending the extremes if needed
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = bisect.bisect_right(q, value) - 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            offset = self.desired[i] - n[i]
+            if (offset >= 1 and n[i + 1] - n[i] > 1) or (offset <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if offset > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = self._linear(i, d)
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+    def value(self) -> Optional[float]:
+        """Current quantile estimate (None before the first observation)"""
+        if not self.count:
+            return None
+        if self.count <= 5:
+            # Too few values for the markers: nearest rank of what we have
+            return self.heights[min(len(self.heights) - 1, int(round(self.p * (len(self.heights) - 1))))]
+        return self.heights[2]
+
+    def to_dict(self) -> Dict:
+        """Serializable state (see from_dict)"""
+        return {
+            "p": self.p,
+            "count": self.count,
+            "heights": self.heights,
+            "positions": self.positions,
+            "desired": self.desired,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "P2Quantile":
+        """Restore an estimator saved with to_dict()"""
+        estimator = cls(state["p"])
+        estimator.count = int(state["count"])
+        estimator.heights = [float(h) for h in state["heights"]]
+        estimator.positions = [float(n) for n in state["positions"]]
+        estimator.desired = [float(n) for n in state["desired"]]
+        return estimator
@@ -0,0 +1,111 @@
+"""
+FFmpeg helpers for video post-processing
+
+FFmpeg is an optional system dependency (apt install ffmpeg). Callers check
+ffmpeg_available() and skip the feature when it is missing.
+"""
+import shutil
+import subprocess
+from typing import List, Optional
+
+from app.core.config import settings
+
+
+class FFmpegError(RuntimeError):
+    """Raised when an ffmpeg command fails"""
+
+
+def ffmpeg_available() -> bool:
+    """Whether the configured ffmpeg binary can be found"""
+    return shutil.which(settings.FFMPEG_BINARY) is not None
+
+
+def run_ffmpeg(args: List[str], timeout: Optional[int] = None):
+    """
+    Run ffmpeg with the given arguments
+
+    Args:
+        args: Arguments after the binary name
+        timeout: Seconds before the process is killed
+
+    Raises:
+        FFmpegError: If ffmpeg exits with an error or times out
+    """
+    cmd = [settings.FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y", *args]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, timeout=timeout or settings.FFMPEG_TIMEOUT_SECONDS)
+    except subprocess.CalledProcessError as e:
+        raise FFmpegError(f"ffmpeg failed: {e.stderr.decode(errors='replace').strip()}")
+    except subprocess.TimeoutExpired:
+        raise FFmpegError(f"ffmpeg timed out after {timeout or settings.FFMPEG_TIMEOUT_SECONDS}s")
+
+
+def extract_poster(video_path: str, output_path: str, quality: int = 3) -> str:
+    """
+    Extract the first keyframe of a video as a JPEG poster
+
+    Only keyframes are decoded (-skip_frame nokey), so this stays fast
+    regardless of the video length.
+
+    Args:
+        video_path: Local video file
+        output_path: Destination JPEG path
+        quality: JPEG quality scale, 2 (best) to 31 (worst)
+
+    Returns:
+        Poster file path
+    """
+    run_ffmpeg([
+        "-skip_frame", "nokey",
+        "-i", video_path,
+        "-frames:v", "1",
+        "-q:v", str(quality),
+        output_path,
+    ])
+    return output_path
+
+
+def extract_preview(
+    source: str,
+    output_path: str,
+    seconds: float = 3,
+    short_side: int = 240,
+    fps: int = 12,
+) -> str:
+    """
+    Cut a short, small, silent preview clip from the start of a video
+
+    The source may be a local path or an HTTP(S) URL; for a faststart MP4
+    ffmpeg then only fetches the first few seconds of the file. The output
+    format follows the extension: .mp4 (H.264) or .webp (animated WebP).
+
+    Args:
+        source: Local path or URL of the video
+        output_path: Destination path (.mp4 or .webp)
+        seconds: Preview length
+        short_side: Height (landscape) or width (portrait) of the preview
+        fps: Frame rate of the preview
+
+    Returns:
+        Preview file path
+    """
+    landscape = "gt(iw,ih)"
+    scale = f"scale='if({landscape},-2,{short_side})':'if({landscape},{short_side},-2)'"
+
+    if output_path.endswith(".webp"):
+        codec = ["-c:v", "libwebp", "-loop", "0", "-q:v", "50", "-compression_level", "4"]
+    else:
+        codec = [
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "30",
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+        ]
+
+    run_ffmpeg([
+        "-t", str(seconds),
+        "-i", source,
+        "-vf", f"fps={fps},{scale}",
+        "-an",
+        *codec,
+        output_path,
+    ])
+    return output_path
@@ -126,7 +126,7 @@ def validate_image_content(content: bytes, allowed_types: Optional[list] = None)
         raise ValueError(f"Error validating image: {str(e)}")
 
 
-def resize_image_for_sora(content: bytes) -> bytes:
+def resize_image_for_sora(content: bytes, orientation: Optional[str] = None) -> bytes:
     """
     Resize image to Sora-compatible dimensions (1280x720 or 720x1280)
 
@@ -134,6 +134,7 @@ def resize_image_for_sora(content: bytes) -> bytes:
     - Landscape images (width > height) → 1280x720
     - Portrait images (height > width) → 720x1280
     - Square images (width == height) → 1280x720 (default to landscape)
+    - orientation="landscape" / "portrait" forces the target instead
 
     Uses crop-and-resize to maintain aspect ratio:
     1. Crop to target aspect ratio (16:9 or 9:16)
@@ -141,6 +142,7 @@ def resize_image_for_sora(content: bytes) -> bytes:
 
     Args:
         content: Original image bytes
+        orientation: Optional "landscape" or "portrait" target (default: detected)
 
     Returns:
         Resized image bytes (JPEG format)
@@ -163,18 +165,17 @@ def resize_image_for_sora(content: bytes) -> bytes:
         original_width, original_height = img.size
 
         # Determine target dimensions based on orientation
-        if original_width > original_height:
+        if orientation is None:
+            orientation = "portrait" if original_height > original_width else "landscape"
+
+        if orientation == "landscape":
             # Landscape image → 1280x720 (16:9)
             target_width, target_height = 1280, 720
             target_aspect_ratio = 16 / 9
-        elif original_height > original_width:
+        else:
             # Portrait image → 720x1280 (9:16)
             target_width, target_height = 720, 1280
             target_aspect_ratio = 9 / 16
-        else:
-            # Square image (width == height) → default to landscape 1280x720
-            target_width, target_height = 1280, 720
-            target_aspect_ratio = 16 / 9
 
         # Calculate current aspect ratio
         current_aspect_ratio = original_width / original_height
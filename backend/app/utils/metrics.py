@@ -0,0 +1,106 @@
+"""
+Lightweight Redis-backed metrics
+
+API processes and Celery workers record counters and observations into one
+Redis hash, so the numbers aggregate across hosts without a metrics agent.
+GET /metrics renders them in the Prometheus text format.
+
+Usage:
+    from app.utils import metrics
+
+    metrics.incr("video_download_bytes_total", 1048576, mode="ranged")
+    metrics.observe("video_download_seconds", 3.2, mode="ranged")
+
+Recording never raises: metrics must not break the code being measured.
+"""
+import redis
+from typing import Dict, Sequence
+from app.core.clients import redis_control_client
+
+
+METRICS_KEY = "metrics:v1"
+
+# Default histogram buckets (seconds)
+DEFAULT_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _client() -> redis.Redis:
+    return redis_control_client.get()
+
+
+def _field(name: str, labels: Dict[str, object]) -> str:
+    if not labels:
+        return name
+    label_str = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{label_str}}}"
+
+
+def incr(name: str, amount: float = 1, **labels):
+    """
+    Increment a counter
+
+    Args:
+        name: Metric name (e.g., "video_cache_hits_total")
+        amount: Increment
+        **labels: Metric labels
+    """
+    try:
+        _client().hincrbyfloat(METRICS_KEY, _field(name, labels), amount)
+    except Exception as e:
+        print(f"⚠️  [Metrics] Failed to record {name}: {e}")
+
+
+def set_gauge(name: str, value: float, **labels):
+    """
+    Set a gauge to an absolute value
+
+    Args:
+        name: Metric name (e.g., "video_queue_depth")
+        value: Current value
+        **labels: Metric labels
+    """
+    try:
+        _client().hset(METRICS_KEY, _field(name, labels), value)
+    except Exception as e:
+        print(f"⚠️  [Metrics] Failed to record {name}: {e}")
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels):
+    """
+    Record one observation in a histogram (count, sum and cumulative buckets)
+
+    Args:
+        name: Metric name (e.g., "video_download_seconds")
+        value: Observed value
+        buckets: Upper bounds of the histogram buckets
+        **labels: Metric labels
+    """
+    try:
+        pipe = _client().pipeline(transaction=False)
+        pipe.hincrbyfloat(METRICS_KEY, _field(f"{name}_count", labels), 1)
+        pipe.hincrbyfloat(METRICS_KEY, _field(f"{name}_sum", labels), value)
+        for bound in list(buckets) + ["+Inf"]:
+            if bound == "+Inf" or value <= bound:
+                pipe.hincrbyfloat(METRICS_KEY, _field(f"{name}_bucket", {**labels, "le": bound}), 1)
+        pipe.execute()
+    except Exception as e:
+        print(f"⚠️  [Metrics] Failed to record {name}: {e}")
+
+
+def snapshot() -> Dict[str, float]:
+    """
+    Current value of every recorded series
+
+    Returns:
+        Dict of series name (with labels) to value, empty if Redis is down
+    """
+    try:
+        return {field: float(value) for field, value in _client().hgetall(METRICS_KEY).items()}
+    except Exception as e:
+        print(f"⚠️  [Metrics] Failed to read metrics: {e}")
+        return {}
+
+
+def render_prometheus() -> str:
+    """Render all series in the Prometheus text exposition format"""
+    return "".join(f"{field} {value:g}\n" for field, value in sorted(snapshot().items()))
@@ -0,0 +1,330 @@
+"""
+MP4 container utilities
+
+A minimal ISO-BMFF box parser over a memory-mapped file: only the boxes we
+need are touched, so reading metadata from a large video costs a few page
+faults instead of reading the whole file.
+
+Usage:
+    from app.utils.mp4_utils import read_mp4_metadata, faststart
+
+    meta = read_mp4_metadata("video.mp4")
+    meta.duration, meta.resolution, meta.bitrate
+
+    faststart("video.mp4")  # Move moov before mdat, in place
+"""
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+COPY_BLOCK_SIZE = 8 * 1024 * 1024  # Bytes copied per write when remuxing
+
+# Boxes whose payload is a plain list of child boxes
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf", b"udta", b"mvex"}
+
+
+class Mp4Error(ValueError):
+    """Raised when a file is not a parseable MP4"""
+
+
+@dataclass
+class Box:
+    """One ISO-BMFF box located in the file"""
+    type: bytes
+    start: int  # Offset of the box header
+    size: int  # Total size including the header
+    header_size: int
+
+    @property
+    def payload_start(self) -> int:
+        return self.start + self.header_size
+
+    @property
+    def end(self) -> int:
+        return self.start + self.size
+
+
+@dataclass
+class Mp4Metadata:
+    """Container-level metadata of an MP4 file"""
+    duration: float  # Seconds
+    width: Optional[int]
+    height: Optional[int]
+    bitrate: Optional[int]  # Average bits per second over the whole file
+    file_size: int
+    faststart: bool  # True if moov precedes mdat (playback can start early)
+    has_audio: bool = False
+
+    @property
+    def resolution(self) -> Optional[str]:
+        if not self.width or not self.height:
+            return None
+        return f"{self.width}x{self.height}"
+
+
+def iter_boxes(buf, start: int, end: int) -> Iterator[Box]:
+    """
+    Iterate over the boxes in buf[start:end]
+
+    Args:
+        buf: bytes-like object or mmap
+        start: Offset of the first box header
+        end: End offset of the enclosing box (or file)
+
+    Yields:
+        Box
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", buf, offset)
+        header_size = 8
+
+        if size == 1:
+            if offset + 16 > end:
+                raise Mp4Error(f"Truncated 64-bit box header at offset {offset}")
+            size = struct.unpack_from(">Q", buf, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset  # Box extends to the end of its container
+
+        if size < header_size or offset + size > end:
+            raise Mp4Error(f"Invalid size {size} for box {box_type!r} at offset {offset}")
+
+        yield Box(box_type, offset, size, header_size)
+        offset += size
+
+
+def find_box(buf, parent: Box, path: List[bytes]) -> Optional[Box]:
+    """Find the first box matching a path of types below parent (e.g. [b"mdia", b"hdlr"])"""
+    box = parent
+    for box_type in path:
+        box = next((b for b in iter_boxes(buf, box.payload_start, box.end) if b.type == box_type), None)
+        if box is None:
+            return None
+    return box
+
+
+def _full_box_version(buf, box: Box) -> int:
+    return buf[box.payload_start]
+
+
+def _read_mvhd(buf, mvhd: Box):
+    """Return (timescale, duration) from the movie header"""
+    if _full_box_version(buf, mvhd) == 1:
+        return struct.unpack_from(">IQ", buf, mvhd.payload_start + 20)
+    return struct.unpack_from(">II", buf, mvhd.payload_start + 12)
+
+
+def _read_tkhd_dimensions(buf, tkhd: Box):
+    """Return display (width, height) from a track header, honouring 90° rotation"""
+    # The 3x3 matrix and the 16.16 fixed-point width/height close the box
+    matrix_a, matrix_b = struct.unpack_from(">ii", buf, tkhd.end - 44)
+    width, height = struct.unpack_from(">II", buf, tkhd.end - 8)
+    width, height = width >> 16, height >> 16
+
+    if matrix_a == 0 and abs(matrix_b) == 0x10000:
+        width, height = height, width
+    return width, height
+
+
+def _handler_type(buf, trak: Box) -> Optional[bytes]:
+    hdlr = find_box(buf, trak, [b"mdia", b"hdlr"])
+    if hdlr is None:
+        return None
+    return bytes(buf[hdlr.payload_start + 8:hdlr.payload_start + 12])
+
+
+def parse_metadata(buf) -> Mp4Metadata:
+    """
+    Parse container metadata from an in-memory or memory-mapped MP4
+
+    Args:
+        buf: bytes-like object or mmap with the whole file
+
+    Returns:
+        Mp4Metadata
+
+    Raises:
+        Mp4Error: If the file has no valid moov box
+    """
+    file_size = len(buf)
+    top_level = list(iter_boxes(buf, 0, file_size))
+
+    moov = next((b for b in top_level if b.type == b"moov"), None)
+    mdat = next((b for b in top_level if b.type == b"mdat"), None)
+    if moov is None:
+        raise Mp4Error("No moov box found")
+
+    mvhd = find_box(buf, moov, [b"mvhd"])
+    if mvhd is None:
+        raise Mp4Error("No mvhd box found")
+
+    timescale, duration_units = _read_mvhd(buf, mvhd)
+    duration = duration_units / timescale if timescale else 0.0
+
+    width = height = None
+    has_audio = False
+    for trak in (b for b in iter_boxes(buf, moov.payload_start, moov.end) if b.type == b"trak"):
+        handler = _handler_type(buf, trak)
+        if handler == b"soun":
+            has_audio = True
+        elif handler == b"vide" and width is None:
+            tkhd = find_box(buf, trak, [b"tkhd"])
+            if tkhd is not None:
+                width, height = _read_tkhd_dimensions(buf, tkhd)
+
+    return Mp4Metadata(
+        duration=duration,
+        width=width,
+        height=height,
+        bitrate=int(file_size * 8 / duration) if duration else None,
+        file_size=file_size,
+        faststart=mdat is None or moov.start < mdat.start,
+        has_audio=has_audio,
+    )
+
+
+def read_mp4_metadata(path: str) -> Mp4Metadata:
+    """
+    Read container metadata from an MP4 file via mmap
+
+    Args:
+        path: Local file path
+
+    Returns:
+        Mp4Metadata
+
+    Raises:
+        Mp4Error: If the file is empty or not a valid MP4
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise Mp4Error(f"Cannot map {path}: {e}")
+
+        with mm:
+            try:
+                return parse_metadata(mm)
+            except struct.error as e:
+                raise Mp4Error(f"Truncated MP4 box in {path}: {e}")
+
+
+def _chunk_offset_boxes(buf, start: int, end: int) -> Iterator[Box]:
+    """Yield every stco/co64 box below buf[start:end]"""
+    for box in iter_boxes(buf, start, end):
+        if box.type in (b"stco", b"co64"):
+            yield box
+        elif box.type in CONTAINER_BOXES:
+            yield from _chunk_offset_boxes(buf, box.payload_start, box.end)
+
+
+def _relocate_chunk_offsets(moov: bytearray, deltas: List[tuple]):
+    """
+    Rewrite the chunk offset tables of a moov box copy in place
+
+    Args:
+        moov: The complete moov box (header included)
+        deltas: (old_start, old_end, delta) for each top-level box that moves
+    """
+    def relocate(offset: int) -> int:
+        for old_start, old_end, delta in deltas:
+            if old_start <= offset < old_end:
+                return offset + delta
+        return offset
+
+    moov_header = 16 if struct.unpack_from(">I", moov, 0)[0] == 1 else 8
+    for box in _chunk_offset_boxes(moov, moov_header, len(moov)):
+        entry_count = struct.unpack_from(">I", moov, box.payload_start + 4)[0]
+        entries_start = box.payload_start + 8
+
+        if box.type == b"stco":
+            offsets = struct.unpack_from(f">{entry_count}I", moov, entries_start)
+            new_offsets = [relocate(o) for o in offsets]
+            if new_offsets and max(new_offsets) > 0xFFFFFFFF:
+                raise Mp4Error("Relocated chunk offsets overflow stco (co64 upgrade not supported)")
+            struct.pack_into(f">{entry_count}I", moov, entries_start, *new_offsets)
+        else:
+            offsets = struct.unpack_from(f">{entry_count}Q", moov, entries_start)
+            struct.pack_into(f">{entry_count}Q", moov, entries_start, *(relocate(o) for o in offsets))
+
+
+def faststart(input_path: str, output_path: Optional[str] = None) -> bool:
+    """
+    Move the moov box ahead of the media data, without re-encoding
+
+    Browsers can start playback as soon as they have moov; with moov at the
+    end they must fetch (nearly) the whole file first. Every top-level box
+    is copied through a memory map in blocks, and the chunk offsets in
+    stco/co64 are shifted by however far their media data moved.
+
+    Args:
+        input_path: Source MP4
+        output_path: Destination (defaults to replacing input_path atomically)
+
+    Returns:
+        True if the file was remuxed, False if moov already precedes mdat
+
+    Raises:
+        Mp4Error: If the file is not a remuxable MP4 (e.g. compressed moov)
+    """
+    output_path = output_path or input_path
+    temp_path = f"{output_path}.faststart"
+
+    with open(input_path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise Mp4Error(f"Cannot map {input_path}: {e}")
+
+        with mm:
+            top_level = list(iter_boxes(mm, 0, len(mm)))
+            moov = next((b for b in top_level if b.type == b"moov"), None)
+            first_mdat = next((i for i, b in enumerate(top_level) if b.type == b"mdat"), None)
+
+            if moov is None:
+                raise Mp4Error("No moov box found")
+            if first_mdat is None or moov.start < top_level[first_mdat].start:
+                return False
+
+            moov_data = bytearray(mm[moov.start:moov.end])
+            if find_box(moov_data, Box(b"moov", 0, moov.size, moov.header_size), [b"cmov"]):
+                raise Mp4Error("Compressed moov boxes are not supported")
+
+            # New layout: [boxes before the first mdat] moov [everything else]
+            others = [b for b in top_level if b is not moov]
+            layout = others[:first_mdat] + [moov] + others[first_mdat:]
+
+            new_starts: Dict[int, int] = {}
+            position = 0
+            for box in layout:
+                new_starts[box.start] = position
+                position += box.size
+
+            deltas = [
+                (box.start, box.end, new_starts[box.start] - box.start)
+                for box in others
+                if new_starts[box.start] != box.start
+            ]
+            try:
+                _relocate_chunk_offsets(moov_data, deltas)
+            except struct.error as e:
+                raise Mp4Error(f"Truncated chunk offset table: {e}")
+
+            try:
+                with open(temp_path, "wb") as out:
+                    for box in layout:
+                        if box is moov:
+                            out.write(moov_data)
+                            continue
+                        for block_start in range(box.start, box.end, COPY_BLOCK_SIZE):
+                            out.write(mm[block_start:min(block_start + COPY_BLOCK_SIZE, box.end)])
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+    os.replace(temp_path, output_path)
+    return True
@@ -0,0 +1,115 @@
+"""
+Perceptual image hashing (dHash) and a BK-tree for Hamming-distance lookup
+
+A dHash compares the brightness of neighbouring pixels of a 9x8 grayscale
+thumbnail, so re-compressed, re-exported or slightly resized copies of a
+photo hash to the same or a nearby 64-bit value, unlike a sha256 of the bytes.
+"""
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image as PILImage, ImageOps
+
+HASH_SIZE = 8  # 8x8 comparisons -> 64-bit hash
+
+
+def dhash(image: Union[bytes, PILImage.Image], hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of an image
+
+    Args:
+        image: Encoded image bytes or a PIL image
+        hash_size: Comparisons per row/column (hash has hash_size² bits)
+
+    Returns:
+        Hash as an unsigned integer
+    """
+    if isinstance(image, (bytes, bytearray)):
+        image = PILImage.open(BytesIO(image))
+
+    # Honour EXIF rotation so a re-exported (rotated on save) copy still matches
+    thumbnail = ImageOps.exif_transpose(image).convert("L").resize(
+        (hash_size + 1, hash_size), PILImage.LANCZOS
+    )
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def dhash_hex(image: Union[bytes, PILImage.Image]) -> str:
+    """dhash() as a fixed-width hex string (stored as UploadedImage.phash)"""
+    return f"{dhash(image):0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance
+
+    Each child edge is labelled with its distance to the parent, so a search
+    within radius r only descends into edges labelled d-r..d+r (triangle
+    inequality) instead of comparing against every stored hash.
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, int]] = ()):
+        # node = (hash, [item ids], {distance: child node})
+        self._root: Optional[tuple] = None
+        self._size = 0
+        for value, item_id in items:
+            self.add(value, item_id)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item_id: int):
+        """
+        Insert a hash
+
+        Args:
+            value: Hash value
+            item_id: ID stored with it (e.g., UploadedImage.id)
+        """
+        self._size += 1
+        if self._root is None:
+            self._root = (value, [item_id], {})
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            children: Dict[int, tuple] = node[2]
+            if distance not in children:
+                children[distance] = (value, [item_id], {})
+                return
+            node = children[distance]
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, int]]:
+        """
+        All stored items within max_distance of value
+
+        Returns:
+            (distance, item id) pairs, closest first
+        """
+        if self._root is None:
+            return []
+
+        matches = []
+        stack = [self._root]
+        while stack:
+            node_value, item_ids, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= max_distance:
+                matches.extend((distance, item_id) for item_id in item_ids)
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+
+        return sorted(matches)
@@ -15,12 +15,16 @@ Usage:
     logger.publish_progress(5, "⏳ Processing...", progress=75)
     logger.publish_completion("/uploads/videos/video.mp4")
     logger.close()
+
+Loggers publish through the process-wide Redis connection pool
+(app.core.clients.redis_client), so a task no longer opens and tears down
+its own connection.
 """
 import json
 import redis
 from datetime import datetime
 from typing import Dict, Any, Optional
-from app.core.config import settings
+from app.core.clients import redis_client
 
 
 class SSELogger:
@@ -43,13 +47,8 @@ class SSELogger:
         self.redis_client = None
 
         try:
-            self.redis_client = redis.from_url(
-                settings.REDIS_URL,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-            )
-            # Test connection
+            self.redis_client = redis_client.get()
+            # Test connection (a pooled connection: one round trip, no connect)
             self.redis_client.ping()
             print(f"📡 [SSELogger] Initialized for video {video_id}, channel: {self.channel}")
         except redis.ConnectionError as e:
@@ -99,7 +98,7 @@ class SSELogger:
             print(f"❌ [SSELogger] Unexpected error while publishing: {e}")
             return False
 
-    def publish_progress(self, step: int, message: str, progress: int) -> bool:
+    def publish_progress(self, step: int, message: str, progress: int, **kwargs) -> bool:
         """
         Publish a progress update with percentage
 
@@ -107,11 +106,12 @@ class SSELogger:
             step: Step number
             message: Progress message
             progress: Progress percentage (0-100)
+            **kwargs: Additional data (e.g., eta_seconds)
 
         Returns:
             bool: Success status
         """
-        return self.publish(step, message, progress=progress)
+        return self.publish(step, message, progress=progress, **kwargs)
 
     def publish_completion(self, video_url: str, video_path: Optional[str] = None) -> bool:
         """
@@ -158,18 +158,12 @@ class SSELogger:
 
     def close(self):
         """
-        Close Redis connection
+        Release the logger's Redis client
 
-        Should be called when done publishing (e.g., in finally block)
+        Should be called when done publishing (e.g., in finally block). The
+        connection stays in the process-wide pool for the next task.
         """
-        if self.redis_client:
-            try:
-                self.redis_client.close()
-                print(f"🔌 [SSELogger] Redis connection closed for video {self.video_id}")
-            except Exception as e:
-                print(f"⚠️  [SSELogger] Error closing Redis connection: {e}")
-            finally:
-                self.redis_client = None
+        self.redis_client = None
 
     def __enter__(self):
         """Context manager support"""
@@ -0,0 +1,99 @@
+"""
+Standard Webhooks signatures (as used by OpenAI webhooks)
+
+A delivery carries three headers:
+
+    webhook-id         unique message ID (stable across retries)
+    webhook-timestamp  Unix seconds when the message was signed
+    webhook-signature  space-separated "v1,<base64 HMAC-SHA256>" entries
+
+The HMAC key is the base64 part of the "whsec_..." secret, and the signed
+content is "{webhook-id}.{webhook-timestamp}.{raw body}".
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from typing import Mapping, Optional
+
+SECRET_PREFIX = "whsec_"
+DEFAULT_TOLERANCE_SECONDS = 300
+
+
+class WebhookVerificationError(ValueError):
+    """Webhook headers missing, stale or not signed with our secret"""
+
+
+def _secret_key(secret: str) -> bytes:
+    encoded = secret[len(SECRET_PREFIX):] if secret.startswith(SECRET_PREFIX) else secret
+    try:
+        return base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        # Not base64 - treat as a raw shared secret
+        return encoded.encode("utf-8")
+
+
+def sign(secret: str, msg_id: str, timestamp: int, payload: bytes) -> str:
+    """
+    Signature header value for a message
+
+    Args:
+        secret: Webhook secret ("whsec_...")
+        msg_id: webhook-id header
+        timestamp: webhook-timestamp header (Unix seconds)
+        payload: Raw request body
+
+    Returns:
+        "v1,<base64 signature>"
+    """
+    signed_content = f"{msg_id}.{timestamp}.".encode("utf-8") + payload
+    digest = hmac.new(_secret_key(secret), signed_content, hashlib.sha256).digest()
+    return f"v1,{base64.b64encode(digest).decode('ascii')}"
+
+
+def verify(
+    secret: str,
+    headers: Mapping[str, str],
+    payload: bytes,
+    tolerance: int = DEFAULT_TOLERANCE_SECONDS,
+    now: Optional[float] = None,
+) -> str:
+    """
+    Verify a webhook delivery
+
+    Args:
+        secret: Webhook secret ("whsec_...")
+        headers: Request headers (case-insensitive mapping, e.g. Starlette's)
+        payload: Raw request body, exactly as received
+        tolerance: Max age/skew of webhook-timestamp in seconds (replay window)
+        now: Current Unix time (for tests)
+
+    Returns:
+        The webhook-id of the verified message
+
+    Raises:
+        WebhookVerificationError: If the delivery is not authentic
+    """
+    msg_id = headers.get("webhook-id")
+    timestamp = headers.get("webhook-timestamp")
+    signatures = headers.get("webhook-signature")
+    if not (msg_id and timestamp and signatures):
+        raise WebhookVerificationError("Missing webhook-id, webhook-timestamp or webhook-signature header")
+
+    try:
+        timestamp = int(timestamp)
+    except ValueError:
+        raise WebhookVerificationError("Invalid webhook-timestamp header")
+
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > tolerance:
+        raise WebhookVerificationError("Webhook timestamp outside the tolerance window")
+
+    expected = sign(secret, msg_id, timestamp, payload).split(",", 1)[1]
+    for candidate in signatures.split():
+        version, _, value = candidate.partition(",")
+        if version == "v1" and hmac.compare_digest(value, expected):
+            return msg_id
+
+    raise WebhookVerificationError("No matching webhook signature")
@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models.user import User
+from app.services import credit_ledger
 
 
 def add_credits(identifier: str, credits_amount: float):
@@ -47,7 +48,7 @@ def add_credits(identifier: str, credits_amount: float):
 
         # Add credits
         old_credits = user.credits
-        user.credits += credits_amount
+        credit_ledger.grant(db, user, credits_amount, reason="admin")
 
         db.commit()
 
@@ -0,0 +1,65 @@
+"""
+Script to compute perceptual hashes for existing uploaded images
+Usage: python scripts/backfill_image_phash.py [--limit N]
+
+Downloads each uploaded image without a phash and stores its dHash so older
+uploads take part in near-duplicate lookup.
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.models.uploaded_image import UploadedImage
+from app.services.generation_cache import content_hash
+from app.services.image_dedup import image_phash
+from app.utils.image_utils import read_image_from_url
+
+
+def backfill(limit: int = 1000):
+    """
+    Compute phash (and content_hash where missing) for uploaded images
+
+    Args:
+        limit: Max images processed
+    """
+    db = SessionLocal()
+    updated = failed = 0
+
+    try:
+        images = (
+            db.query(UploadedImage)
+            .filter(UploadedImage.phash.is_(None))
+            .order_by(UploadedImage.id.desc())
+            .limit(limit)
+            .all()
+        )
+        for image in images:
+            try:
+                content = read_image_from_url(image.file_url)
+            except Exception as e:
+                print(f"❌ Image {image.id}: {e}")
+                failed += 1
+                continue
+
+            image.phash = image_phash(content)
+            if not image.content_hash:
+                image.content_hash = content_hash(content)
+            db.commit()
+            updated += 1
+
+        print(f"✅ Hashed {updated} image(s), {failed} failed")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute perceptual hashes for existing uploaded images")
+    parser.add_argument("--limit", type=int, default=1000, help="Max images to process")
+    args = parser.parse_args()
+
+    backfill(limit=args.limit)
@@ -0,0 +1,77 @@
+"""
+Script to queue derived assets (HLS renditions, preview clips) for existing videos
+Usage: python scripts/backfill_video_assets.py [--asset hls|preview|all] [--showcase-only] [--limit N]
+
+Queues the post-processing tasks for completed user videos and showcase
+videos that don't have the asset yet.
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.models.showcase import ShowcaseVideo
+from app.models.video import Video, VideoStatus
+from app.tasks.video_postprocess import (
+    generate_preview_task,
+    generate_renditions_task,
+    generate_showcase_preview_task,
+    generate_showcase_renditions_task,
+)
+
+# asset -> (column, user video task, showcase video task)
+ASSETS = {
+    "hls": ("hls_url", generate_renditions_task, generate_showcase_renditions_task),
+    "preview": ("preview_url", generate_preview_task, generate_showcase_preview_task),
+}
+
+
+def backfill(asset: str, showcase_only: bool = False, limit: int = 100):
+    """
+    Queue post-processing tasks for videos missing an asset
+
+    Args:
+        asset: "hls" or "preview"
+        showcase_only: Only queue showcase videos
+        limit: Max user videos queued
+    """
+    column, video_task, showcase_task = ASSETS[asset]
+    db = SessionLocal()
+
+    try:
+        showcase_ids = [
+            v.id for v in db.query(ShowcaseVideo.id).filter(getattr(ShowcaseVideo, column).is_(None))
+        ]
+        for showcase_id in showcase_ids:
+            showcase_task.delay(showcase_id)
+        print(f"✅ [{asset}] Queued {len(showcase_ids)} showcase video(s)")
+
+        if showcase_only:
+            return
+
+        video_ids = [
+            v.id for v in db.query(Video.id)
+            .filter(Video.status == VideoStatus.COMPLETED, getattr(Video, column).is_(None))
+            .order_by(Video.id.desc())
+            .limit(limit)
+        ]
+        for video_id in video_ids:
+            video_task.delay(video_id)
+        print(f"✅ [{asset}] Queued {len(video_ids)} user video(s)")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue HLS renditions / preview clips for existing videos")
+    parser.add_argument("--asset", choices=["hls", "preview", "all"], default="all")
+    parser.add_argument("--showcase-only", action="store_true", help="Only queue showcase videos")
+    parser.add_argument("--limit", type=int, default=100, help="Max user videos to queue per asset")
+    args = parser.parse_args()
+
+    for asset in (ASSETS if args.asset == "all" else [args.asset]):
+        backfill(asset, showcase_only=args.showcase_only, limit=args.limit)
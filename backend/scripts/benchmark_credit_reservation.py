@@ -0,0 +1,211 @@
+"""
+Benchmark concurrent credit debits: read-modify-write vs the credit ledger
+Usage: python scripts/benchmark_credit_reservation.py [--requests 2000] [--threads 32]
+           [--cost 10] [--funded-share 0.5] [--database-url sqlite:///...]
+
+Hammers one user's balance from many threads, each with its own session,
+first with the old pattern (load the user, check user.credits, then
+user.credits -= cost and commit) and then with credit_ledger.reserve (one
+conditional UPDATE ... WHERE credits >= :cost RETURNING). The balance covers
+only --funded-share of the requests, so both the debit and the
+"enough credits" check are contended.
+
+For each mode it reports throughput, latency percentiles, accepted and
+refused debits, and checks the final balance:
+
+    lost updates = (final balance - (initial - accepted x cost)) / cost
+    overdraft    = accepted x cost > initial balance
+
+The ledger run must show no lost updates, no overdraft and ledger entries
+that add up to the balance change; the script exits non-zero otherwise.
+
+Runs against a throwaway SQLite file by default (tables are created there);
+pass --database-url to run against a scratch PostgreSQL database. Metrics
+are not recorded during the run, so Redis is not needed.
+"""
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="credit-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(SCRATCH_DIR, 'bench.db')}")
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - registers every table on Base.metadata
+from app.core.exceptions import InsufficientCreditsException
+from app.database import Base
+from app.models.credit_ledger import CreditLedgerEntry
+from app.models.user import User
+from app.services import credit_ledger
+
+
+def make_engine(url: str, threads: int):
+    if url.startswith("sqlite"):
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": 60},
+            pool_size=threads,
+            max_overflow=0,
+        )
+    return create_engine(url, pool_size=threads, max_overflow=0)
+
+
+def naive_debit(db, user_id: int, cost: float) -> bool:
+    """The pre-ledger pattern: check and debit in Python, then commit"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if user.credits < cost:
+        return False
+    user.credits -= cost
+    db.commit()
+    return True
+
+
+def ledger_debit(db, user_id: int, cost: float) -> bool:
+    """Reservation through the ledger (one conditional UPDATE ... RETURNING)"""
+    user = db.query(User).filter(User.id == user_id).first()
+    try:
+        credit_ledger.reserve(db, user, cost)
+    except InsufficientCreditsException:
+        db.rollback()
+        return False
+    db.commit()
+    return True
+
+
+def run(Session, debit, user_id: int, requests: int, threads: int, cost: float) -> dict:
+    """Fire `requests` debits from `threads` workers; returns counts and latencies"""
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    results = {"accepted": 0, "refused": 0, "errors": 0, "latencies": []}
+
+    def worker():
+        db = Session()
+        latencies, accepted, refused, errors = [], 0, 0, 0
+        try:
+            while True:
+                with lock:
+                    if next(counter, None) is None:
+                        break
+                start = time.perf_counter()
+                try:
+                    if debit(db, user_id, cost):
+                        accepted += 1
+                    else:
+                        refused += 1
+                except Exception as e:
+                    db.rollback()
+                    errors += 1
+                    if errors == 1:
+                        print(f"   ⚠️  {type(e).__name__}: {str(e).splitlines()[0]}")
+                latencies.append(time.perf_counter() - start)
+                db.expire_all()
+        finally:
+            db.close()
+        with lock:
+            results["accepted"] += accepted
+            results["refused"] += refused
+            results["errors"] += errors
+            results["latencies"].extend(latencies)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results["elapsed"] = time.perf_counter() - start
+    return results
+
+
+def percentile(values, q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[int(q) - 1]
+
+
+def benchmark(Session, mode: str, debit, args) -> bool:
+    initial = args.cost * int(args.requests * args.funded_share)
+
+    db = Session()
+    user = User(
+        google_id=f"bench-{uuid.uuid4().hex}",
+        email=f"bench-{uuid.uuid4().hex[:12]}@example.invalid",
+        name=f"Credit benchmark ({mode})",
+        credits=initial,
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    result = run(Session, debit, user_id, args.requests, args.threads, args.cost)
+
+    db = Session()
+    try:
+        final = db.query(User.credits).filter(User.id == user_id).scalar()
+        ledger_total = (
+            db.query(func.coalesce(func.sum(CreditLedgerEntry.amount), 0.0))
+            .filter(CreditLedgerEntry.user_id == user_id)
+            .scalar()
+        )
+        expected = initial - result["accepted"] * args.cost
+        lost = round((final - expected) / args.cost, 2)
+        overdraft = result["accepted"] * args.cost > initial
+
+        latencies_ms = [latency * 1000 for latency in result["latencies"]]
+        print(f"\n📊 {mode}")
+        print(f"   Requests: {args.requests} from {args.threads} threads in {result['elapsed']:.2f}s "
+              f"({args.requests / result['elapsed']:.0f} req/s)")
+        print(f"   Latency: p50 {percentile(latencies_ms, 50):.1f}ms, p99 {percentile(latencies_ms, 99):.1f}ms")
+        print(f"   Accepted: {result['accepted']}, refused: {result['refused']}, errors: {result['errors']}")
+        print(f"   Balance: {initial} -> {final} (expected {expected})")
+        print(f"   Lost updates: {lost}, overdraft: {'yes' if overdraft else 'no'}")
+
+        if mode != "ledger":
+            return True
+
+        ledger_ok = abs(ledger_total - (final - initial)) < 1e-6
+        print(f"   Ledger entries: {ledger_total} ({'matches' if ledger_ok else 'does NOT match'} the balance change)")
+        return lost == 0 and not overdraft and final >= 0 and ledger_ok
+
+    finally:
+        db.query(CreditLedgerEntry).filter(CreditLedgerEntry.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent credit reservations")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--cost", type=float, default=10.0)
+    parser.add_argument("--funded-share", type=float, default=0.5, help="Share of requests the balance covers")
+    parser.add_argument("--database-url", default=os.environ["DATABASE_URL"])
+    parser.add_argument("--ledger-only", action="store_true", help="Skip the read-modify-write baseline")
+    args = parser.parse_args()
+
+    credit_ledger.metrics = SimpleNamespace(incr=lambda *a, **k: None)
+
+    engine = make_engine(args.database_url, args.threads)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    print(f"🗄️  {engine.url.render_as_string(hide_password=True)}")
+
+    if not args.ledger_only:
+        benchmark(Session, "read-modify-write", naive_debit, args)
+    ok = benchmark(Session, "ledger", ledger_debit, args)
+
+    print("\n" + ("✅ No lost updates or overdrafts with the ledger" if ok else "❌ Ledger benchmark failed"))
+    sys.exit(0 if ok else 1)
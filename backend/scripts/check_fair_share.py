@@ -0,0 +1,108 @@
+"""
+Script to verify that one heavy user cannot starve light users
+Usage: python scripts/check_fair_share.py [--heavy 20] [--light-users 3] [--workers 4] [--cap 2]
+
+Runs the real fair-share Lua scripts against REDIS_URL (under a throwaway
+key prefix) with a simulated worker pool: the heavy user submits its whole
+batch first, then each light user submits two videos. Workers take queued
+videos FIFO and finish the oldest running video each tick, which releases
+held videos round-robin. The same workload is replayed without caps for
+comparison.
+
+Passes when every light user's videos start before the heavy user's backlog
+has been worked off, i.e. light users wait for a few slots, not for the batch.
+"""
+import sys
+import os
+import argparse
+import uuid
+from collections import deque
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.fair_share import FairShareScheduler
+
+HEAVY_USER = 1
+
+
+def simulate(submissions, workers: int, cap: int):
+    """
+    Replay submissions through the scheduler and a FIFO worker pool
+
+    Args:
+        submissions: (user_id, video_id) in submit order
+        workers: Videos processed concurrently
+        cap: Per-user in-flight cap (0 = no fair share)
+
+    Returns:
+        (user_id, video_id) in the order they started
+    """
+    scheduler = FairShareScheduler(key_prefix=f"fairshare-check:{uuid.uuid4().hex[:8]}:")
+    queue = deque()
+    running = deque()
+    started = []
+
+    try:
+        for user_id, video_id in submissions:
+            if scheduler.admit(user_id, video_id, cap):
+                queue.append((user_id, video_id))
+
+        while queue or running:
+            while queue and len(running) < workers:
+                job = queue.popleft()
+                running.append(job)
+                started.append(job)
+
+            user_id, video_id = running.popleft()
+            released = scheduler.release(user_id, video_id) if cap else []
+            while released:
+                queue.extend(released)
+                released = scheduler.release()
+    finally:
+        client = scheduler._client()
+        keys = list(client.scan_iter(f"{scheduler.key_prefix}*"))
+        if keys:
+            client.delete(*keys)
+
+    return started
+
+
+def last_light_start(started) -> int:
+    """Start position (1-based) of the last light-user video"""
+    return max(i for i, (user_id, _) in enumerate(started, 1) if user_id != HEAVY_USER)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check per-user fair-share scheduling")
+    parser.add_argument("--heavy", type=int, default=20, help="Videos submitted by the heavy user")
+    parser.add_argument("--light-users", type=int, default=3, help="Number of light users (2 videos each)")
+    parser.add_argument("--workers", type=int, default=4, help="Simulated worker slots")
+    parser.add_argument("--cap", type=int, default=2, help="Per-user in-flight cap")
+    args = parser.parse_args()
+
+    submissions = [(HEAVY_USER, n) for n in range(1, args.heavy + 1)]
+    next_id = args.heavy + 1
+    for user_id in range(2, args.light_users + 2):
+        for _ in range(2):
+            submissions.append((user_id, next_id))
+            next_id += 1
+
+    fifo = last_light_start(simulate(submissions, args.workers, cap=0))
+    fair_order = simulate(submissions, args.workers, cap=args.cap)
+    fair = last_light_start(fair_order)
+
+    print(f"   Without caps: last light-user video started at position {fifo}/{len(submissions)}")
+    print(f"   With cap {args.cap}:  last light-user video started at position {fair}/{len(submissions)}")
+    print(f"   Start order: {' '.join(str(user_id) for user_id, _ in fair_order)}")
+
+    # Each light user needs at most two rounds of the ring once its first video is in
+    bound = args.workers + 2 * (args.light_users + 1) * 2
+    if len(fair_order) != len(submissions):
+        print(f"❌ {len(submissions) - len(fair_order)} video(s) never started")
+        sys.exit(1)
+    if fair > bound:
+        print(f"❌ Light users waited behind the heavy user's batch (position {fair} > {bound})")
+        sys.exit(1)
+
+    print("✅ Light users were not starved by the heavy user")
@@ -0,0 +1,120 @@
+"""
+Script to verify the pure-Python MP4 faststart remux
+Usage: python scripts/check_faststart.py [<video.mp4> ...]
+
+For each file: remux a copy, then check that
+- moov now precedes mdat and the metadata (duration, resolution) is unchanged
+- every chunk offset still points at the same media bytes as in the original
+
+Without arguments a synthetic MP4 (moov at the end, stco + co64 tracks) is used.
+"""
+import sys
+import os
+import shutil
+import struct
+import tempfile
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.mp4_utils import (
+    _chunk_offset_boxes,
+    faststart,
+    iter_boxes,
+    read_mp4_metadata,
+)
+
+SAMPLE_BYTES = 32  # Bytes compared at every chunk offset
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def build_sample_mp4(path: str):
+    """Write a minimal MP4 with moov after mdat and two tracks (stco and co64)"""
+    media = bytes(range(256)) * 64
+    ftyp = _box(b"ftyp", b"isom\0\0\0\0isomavc1")
+    mdat_start = len(ftyp)
+    mdat = _box(b"mdat", media)
+    video_chunks = [mdat_start + 8 + i * 1024 for i in range(8)]
+    audio_chunks = [mdat_start + 8 + 8192 + i * 512 for i in range(8)]
+
+    mvhd = _box(b"mvhd", b"\0" * 4 + struct.pack(">IIII", 0, 0, 1000, 8000) + b"\0" * 80)
+    matrix = struct.pack(">9i", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+
+    def trak(handler: bytes, offsets_box: bytes, width: int, height: int) -> bytes:
+        tkhd = _box(b"tkhd", b"\0\0\0\3" + struct.pack(">IIIII", 0, 0, 1, 0, 8000) + b"\0" * 16 + matrix
+                    + struct.pack(">II", width << 16, height << 16))
+        hdlr = _box(b"hdlr", b"\0" * 8 + handler + b"\0" * 13)
+        stbl = _box(b"stbl", offsets_box)
+        return _box(b"trak", tkhd + _box(b"mdia", hdlr + _box(b"minf", stbl)))
+
+    stco = _box(b"stco", b"\0" * 4 + struct.pack(f">I{len(video_chunks)}I", len(video_chunks), *video_chunks))
+    co64 = _box(b"co64", b"\0" * 4 + struct.pack(f">I{len(audio_chunks)}Q", len(audio_chunks), *audio_chunks))
+    moov = _box(b"moov", mvhd + trak(b"vide", stco, 1280, 720) + trak(b"soun", co64, 0, 0))
+
+    with open(path, "wb") as f:
+        f.write(ftyp + mdat + moov)
+
+
+def chunk_offsets(path: str):
+    """All chunk offsets in the file, in track order"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    moov = next(b for b in iter_boxes(data, 0, len(data)) if b.type == b"moov")
+    offsets = []
+    for box in _chunk_offset_boxes(data, moov.payload_start, moov.end):
+        count = struct.unpack_from(">I", data, box.payload_start + 4)[0]
+        fmt = f">{count}I" if box.type == b"stco" else f">{count}Q"
+        offsets.extend(struct.unpack_from(fmt, data, box.payload_start + 8))
+    return data, offsets
+
+
+def check(path: str) -> bool:
+    """Remux a copy of path and verify it; returns True on success"""
+    with tempfile.TemporaryDirectory() as tmp:
+        remuxed = os.path.join(tmp, "faststart.mp4")
+        shutil.copy(path, remuxed)
+
+        before = read_mp4_metadata(path)
+        changed = faststart(remuxed)
+        after = read_mp4_metadata(remuxed)
+
+        original, old_offsets = chunk_offsets(path)
+        result, new_offsets = chunk_offsets(remuxed)
+
+        errors = []
+        if not after.faststart:
+            errors.append("moov still follows mdat")
+        if (before.duration, before.resolution, before.file_size) != (after.duration, after.resolution, after.file_size):
+            errors.append(f"metadata changed: {before} -> {after}")
+        if len(old_offsets) != len(new_offsets):
+            errors.append("chunk count changed")
+        for old, new in zip(old_offsets, new_offsets):
+            if original[old:old + SAMPLE_BYTES] != result[new:new + SAMPLE_BYTES]:
+                errors.append(f"chunk at {old} -> {new} points at different media bytes")
+                break
+
+    if errors:
+        print(f"❌ {path}: " + "; ".join(errors))
+        return False
+
+    action = "remuxed" if changed else "already faststart"
+    print(f"✅ {path}: {action}, {len(new_offsets)} chunk offsets verified")
+    return True
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+
+    with tempfile.TemporaryDirectory() as sample_dir:
+        if not paths:
+            sample_path = os.path.join(sample_dir, "sample_moov_at_end.mp4")
+            build_sample_mp4(sample_path)
+            paths = [sample_path]
+
+        results = [check(p) for p in paths]
+
+    sys.exit(0 if all(results) else 1)
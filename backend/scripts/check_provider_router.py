@@ -0,0 +1,178 @@
+"""
+Script to verify provider routing and submit failover against local stand-in providers
+Usage: python scripts/check_provider_router.py
+
+Builds stand-in providers whose routing signals (p95 render time, in-flight
+load, cost, circuit state) and submit behaviour are set by the script, then
+checks that ProviderRouter picks by latency, load and cost, skips providers
+with an open circuit, and that the submit stage's failover
+(_submit_with_failover) moves on to the next provider when a submit fails
+with a retryable error or hits an open circuit - but not on terminal errors.
+
+No provider API is called. The Sora rate limiter is disabled for the run and
+stage timings go to a throwaway Redis key.
+"""
+import sys
+import os
+import uuid
+from types import SimpleNamespace
+
+import httpx
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+from app.services.stage_timings import stage_timings
+from app.services.video_providers import NoProviderError, ProviderRouter, VideoProvider
+from app.tasks import video_generation
+
+MODEL = "sora-2"
+DURATION = 8
+
+
+class StandInService:
+    """Records submits and fails them with a configured error"""
+
+    def __init__(self, name: str, error: Exception = None):
+        self.name = name
+        self.error = error
+        self.submits = 0
+
+    def submit_generation(self, prompt: str, image_url: str, duration: int = 8, model: str = None):
+        self.submits += 1
+        if self.error is not None:
+            raise self.error
+        return {"job_id": f"{self.name}_job_{self.submits}", "status": "queued", "resolution": "1280x720"}
+
+
+class StandInProvider(VideoProvider):
+    """Provider whose routing signals are fixed by the test"""
+
+    models = (MODEL,)
+
+    def __init__(self, name: str, p95: float = 200.0, load: float = 0.0, cost_per_second: float = 0.1,
+                 open_for: float = 0.0, error: Exception = None):
+        super().__init__()
+        self.name = name
+        self._p95 = p95
+        self._load = load
+        self._cost_per_second = cost_per_second
+        self._open_for = open_for
+        self._service = StandInService(name, error)
+
+    def open_for(self) -> float:
+        return self._open_for
+
+    def load(self, model: str) -> float:
+        return self._load
+
+    def p95_render_seconds(self, model, duration) -> float:
+        return self._p95
+
+    def cost(self, model, duration) -> float:
+        return self._cost_per_second * (duration or 0)
+
+
+class StandInLogger:
+    def publish(self, step, message, **kwargs):
+        pass
+
+
+def retryable_error() -> Exception:
+    request = httpx.Request("POST", "http://stand-in.local/videos")
+    return httpx.HTTPStatusError("503 Service Unavailable", request=request, response=httpx.Response(503, request=request))
+
+
+def submit(providers):
+    """Run the submit stage's failover against the stand-ins"""
+    video_generation.provider_router = ProviderRouter(providers)
+    video = SimpleNamespace(
+        id=0, model=MODEL, provider=None, sora_attempt=0,
+        prompt="A stand-in product shot", reference_image_url="https://stand-in.local/image.jpg",
+    )
+    return video_generation._submit_with_failover("check", video, StandInLogger(), DURATION)
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    return ok
+
+
+def run_checks() -> bool:
+    results = []
+
+    fast, slow = StandInProvider("fast", p95=120), StandInProvider("slow", p95=400)
+    chosen = ProviderRouter([slow, fast]).choose(MODEL, DURATION)
+    results.append(check("Picks the lower p95 render time", chosen is fast, chosen.name))
+
+    busy, idle = StandInProvider("busy", p95=120, load=3.0), StandInProvider("idle", p95=400)
+    chosen = ProviderRouter([busy, idle]).choose(MODEL, DURATION)
+    results.append(check("Avoids a saturated provider", chosen is idle, chosen.name))
+
+    pricey, cheap = StandInProvider("pricey", cost_per_second=0.10), StandInProvider("cheap", cost_per_second=0.05)
+    chosen = ProviderRouter([pricey, cheap]).choose(MODEL, DURATION)
+    results.append(check("Breaks ties on cost", chosen is cheap, chosen.name))
+
+    down, backup = StandInProvider("down", p95=60, open_for=25), StandInProvider("backup", p95=400)
+    chosen = ProviderRouter([down, backup]).choose(MODEL, DURATION)
+    results.append(check("Skips a provider whose circuit is open", chosen is backup, chosen.name))
+
+    try:
+        ProviderRouter([StandInProvider("a", open_for=25), StandInProvider("b", open_for=12)]).choose(MODEL, DURATION)
+        results.append(check("All circuits open raises CircuitOpenException", False))
+    except CircuitOpenException as e:
+        results.append(check("All circuits open raises CircuitOpenException", e.retry_after == 12, f"retry in {e.retry_after}s"))
+
+    try:
+        ProviderRouter([StandInProvider("a")]).choose("sora-2-pro", DURATION)
+        results.append(check("Unsupported model raises NoProviderError", False))
+    except NoProviderError:
+        results.append(check("Unsupported model raises NoProviderError", True))
+
+    flaky, steady = StandInProvider("flaky", p95=60, error=retryable_error()), StandInProvider("steady", p95=400)
+    provider, result = submit([flaky, steady])
+    results.append(check(
+        "Fails over after a retryable submit error",
+        provider is steady and flaky.service.submits == 1,
+        f"{provider and provider.name}: {result}",
+    ))
+
+    tripped = StandInProvider("tripped", p95=60, error=CircuitOpenException("tripped.create", retry_after=30))
+    steady = StandInProvider("steady", p95=400)
+    provider, _ = submit([tripped, steady])
+    results.append(check("Fails over when the circuit opens during submit", provider is steady))
+
+    rejecting, steady = StandInProvider("rejecting", p95=60, error=ValueError("bad image")), StandInProvider("steady")
+    try:
+        submit([rejecting, steady])
+        results.append(check("Terminal submit error is raised without failover", False))
+    except ValueError:
+        results.append(check("Terminal submit error is raised without failover", steady.service.submits == 0))
+
+    provider, wait = submit([StandInProvider("a", open_for=40), StandInProvider("b", open_for=15)])
+    results.append(check("Parks when every circuit is open", provider is None and wait == 15, f"wait {wait}s"))
+
+    try:
+        submit([StandInProvider("a", error=retryable_error()), StandInProvider("b", error=retryable_error())])
+        results.append(check("Raises the last error when every provider fails", False))
+    except httpx.HTTPStatusError:
+        results.append(check("Raises the last error when every provider fails", True))
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    settings.SORA_RATE_LIMIT_ENABLED = False
+    stage_timings.key = f"stage-timings-check:{uuid.uuid4().hex[:8]}"
+    try:
+        ok = run_checks()
+    finally:
+        try:
+            stage_timings._client().delete(stage_timings.key)
+        except Exception:
+            pass
+
+    print("\n" + ("✅ Provider routing checks passed" if ok else "❌ Provider routing checks failed"))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,77 @@
+"""
+Script to verify HLS rendition output on short sample clips
+Usage: python scripts/check_renditions.py [<video.mp4> ...]
+
+For each clip: render the HLS ladder locally (no upload) and check that the
+master playlist lists every expected rung and each rung has segments.
+
+Without arguments, short landscape and portrait test clips (with audio) are
+generated with ffmpeg's lavfi sources. Requires ffmpeg.
+"""
+import sys
+import os
+import tempfile
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.rendition_service import rendition_service
+from app.utils.ffmpeg_utils import ffmpeg_available, run_ffmpeg
+from app.utils.mp4_utils import read_mp4_metadata
+
+
+def make_sample_clip(path: str, width: int, height: int, seconds: int = 6):
+    """Generate a short test clip with a video and an audio track"""
+    run_ffmpeg([
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=24:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest",
+        path,
+    ])
+
+
+def check(path: str) -> bool:
+    """Render HLS for path and verify the playlists; returns True on success"""
+    metadata = read_mp4_metadata(path)
+    expected = [r.name for r in rendition_service.ladder_for(metadata.width, metadata.height)]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        master_path = rendition_service.render_hls(path, output_dir)
+
+        errors = []
+        with open(master_path) as f:
+            master = f.read()
+        for name in expected:
+            if f"{name}/index.m3u8" not in master:
+                errors.append(f"{name} missing from master playlist")
+                continue
+            segments = [s for s in os.listdir(os.path.join(output_dir, name)) if s.endswith(".ts")]
+            if not segments:
+                errors.append(f"{name} has no segments")
+
+    if errors:
+        print(f"❌ {path}: " + "; ".join(errors))
+        return False
+
+    print(f"✅ {path} ({metadata.resolution}): {', '.join(expected)}")
+    return True
+
+
+if __name__ == "__main__":
+    if not ffmpeg_available():
+        print(f"❌ {settings.FFMPEG_BINARY} not found - install ffmpeg to build renditions")
+        sys.exit(1)
+
+    paths = sys.argv[1:]
+
+    with tempfile.TemporaryDirectory() as sample_dir:
+        if not paths:
+            for name, (width, height) in {"landscape": (1280, 720), "portrait": (720, 1280)}.items():
+                sample_path = os.path.join(sample_dir, f"sample_{name}.mp4")
+                make_sample_clip(sample_path, width, height)
+                paths.append(sample_path)
+
+        results = [check(p) for p in paths]
+
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,100 @@
+"""
+Script to send a signed Sora webhook event to a local backend (stand-in for OpenAI)
+Usage: python scripts/emit_sora_webhook.py (--job-id <video_xxx> | --video-id <id>)
+           [--event completed|failed] [--error "message"]
+           [--url http://localhost:8000/api/v1/webhooks/sora] [--secret whsec_...]
+           [--tamper]
+
+Builds the same body and Standard Webhooks headers (webhook-id,
+webhook-timestamp, webhook-signature) OpenAI sends, signed with
+SORA_WEBHOOK_SECRET, and prints the response. --video-id looks the job ID up
+in the database. --tamper flips a byte after signing; the endpoint must
+answer 400.
+
+Typical test: run the stack with USE_MOCK_SORA=true SORA_WEBHOOKS_ENABLED=true,
+generate a video, then emit video.completed for its job.
+"""
+import sys
+import os
+import argparse
+import json
+import time
+import uuid
+
+import httpx
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.utils.webhook_signature import sign
+
+
+def job_id_for_video(video_id: int) -> str:
+    """Sora job ID recorded on a video"""
+    from app.database import SessionLocal
+    from app.models.video import Video
+
+    db = SessionLocal()
+    try:
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if not video or not video.sora_job_id:
+            raise SystemExit(f"❌ Video {video_id} not found or has no Sora job")
+        return video.sora_job_id
+    finally:
+        db.close()
+
+
+def build_event(job_id: str, event: str, error: str = None) -> dict:
+    """Webhook body in OpenAI's event format"""
+    data = {"id": job_id}
+    if event == "failed" and error:
+        data["error"] = {"message": error}
+    return {
+        "object": "event",
+        "id": f"evt_{uuid.uuid4().hex}",
+        "type": f"video.{event}",
+        "created_at": int(time.time()),
+        "data": data,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emit a signed Sora webhook event")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--job-id", help="Sora job ID (video_...)")
+    target.add_argument("--video-id", type=int, help="Video ID (job ID read from the database)")
+    parser.add_argument("--event", choices=("completed", "failed"), default="completed")
+    parser.add_argument("--error", help="Error message for failed events")
+    parser.add_argument("--url", default=f"http://localhost:8000{settings.API_V1_PREFIX}/webhooks/sora")
+    parser.add_argument("--secret", default=settings.SORA_WEBHOOK_SECRET, help="Signing secret (whsec_...)")
+    parser.add_argument("--tamper", action="store_true", help="Corrupt the body after signing")
+    args = parser.parse_args()
+
+    if not args.secret:
+        raise SystemExit("❌ No secret: set SORA_WEBHOOK_SECRET or pass --secret")
+
+    job_id = args.job_id or job_id_for_video(args.video_id)
+    body = json.dumps(build_event(job_id, args.event, args.error)).encode("utf-8")
+
+    msg_id = f"msg_{uuid.uuid4().hex}"
+    timestamp = int(time.time())
+    headers = {
+        "content-type": "application/json",
+        "webhook-id": msg_id,
+        "webhook-timestamp": str(timestamp),
+        "webhook-signature": sign(args.secret, msg_id, timestamp, body),
+    }
+    if args.tamper:
+        body = body.replace(b'"video.', b'"Video.', 1)
+
+    print(f"📤 POST {args.url}")
+    print(f"   video.{args.event} for {job_id} (webhook-id {msg_id})")
+    response = httpx.post(args.url, content=body, headers=headers, timeout=10.0)
+    print(f"   {response.status_code}: {response.text}")
+
+    expected = 400 if args.tamper else 200
+    if response.status_code != expected:
+        print(f"❌ Expected {expected}")
+        sys.exit(1)
+    print("✅ Webhook delivered as expected")
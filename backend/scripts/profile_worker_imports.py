@@ -0,0 +1,144 @@
+"""
+Profile the import cost of the Celery worker entry point
+Usage: python scripts/profile_worker_imports.py [--runs 5] [--top 30] [--budget-ms 3000]
+           [--module app.core.celery_app --module app.tasks] [--forbid fastapi ...]
+
+Imports the worker entry point (what `celery -A app.core.celery_app worker`
+loads before a child can run a task) in fresh interpreters with
+`python -X importtime`. It reports, from the run with the median total:
+
+- the modules with the largest cumulative import time (self + everything
+  they imported first), indented by import depth
+- the cumulative time per top-level package
+
+It fails (exit 1) when:
+- the median total exceeds the budget (--budget-ms, default
+  WORKER_IMPORT_BUDGET_MS)
+- a forbidden module is imported (heavy dependencies that worker tasks must
+  import lazily; see --forbid)
+- an import writes to stdout (banners belong in logs, not in every child)
+
+Run it after touching module-level imports for the full report;
+tests/test_worker_imports.py runs the same checks under pytest. Settings are
+read from the environment/.env as usual.
+"""
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+# Add parent directory to path to import app modules
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKER_MODULES = ["app.core.celery_app", "app.tasks"]
+
+# Only imported inside the functions that need them
+FORBIDDEN_MODULES = ["fastapi", "openai", "google.cloud.storage", "stripe", "PIL"]
+
+
+def profile_once(modules: list) -> dict:
+    """
+    Import the modules in a fresh interpreter
+
+    Returns:
+        {"entries": [(depth, module, self_us, cumulative_us)], "total_us", "stdout"}
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+
+    # Top-level entries (depth 0) add up to the whole import
+    total_us = sum(cumulative for depth, _, _, cumulative in entries if depth == 0)
+    return {"entries": entries, "total_us": total_us, "stdout": result.stdout}
+
+
+def package_totals(entries: list) -> dict:
+    """Cumulative microseconds per top-level package (outermost import of each)"""
+    totals = defaultdict(int)
+    parents = []  # Package of each open ancestor
+    for depth, name, _, cumulative in reversed(entries):
+        # importtime prints children before their parent: walk backwards to see parents first
+        del parents[depth:]
+        package = name.split(".")[0]
+        if package not in parents:
+            totals[package] += cumulative
+        parents.append(package)
+    return totals
+
+
+def report(run: dict, top: int):
+    entries = run["entries"]
+    print(f"\n📦 {len(entries)} modules imported in {run['total_us'] / 1000:.0f}ms")
+
+    print(f"\n⏱️  Top {top} by cumulative import time")
+    print(f"   {'cumulative':>10}  {'self':>8}  module")
+    for depth, name, self_us, cumulative_us in sorted(entries, key=lambda e: e[3], reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:>8.1f}ms  {self_us / 1000:>6.1f}ms  {'  ' * depth}{name}")
+
+    print("\n📊 By top-level package")
+    for package, cumulative_us in sorted(package_totals(entries).items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:>8.1f}ms  {package}")
+
+
+if __name__ == "__main__":
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Profile the Celery worker's import time")
+    parser.add_argument("--module", action="append", dest="modules",
+                        help=f"Module to import (repeatable, default: {' '.join(WORKER_MODULES)})")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters; the median total is reported")
+    parser.add_argument("--top", type=int, default=30)
+    parser.add_argument("--budget-ms", type=float, default=settings.WORKER_IMPORT_BUDGET_MS,
+                        help="Fail above this median total, 0 = no budget")
+    parser.add_argument("--forbid", nargs="*", default=FORBIDDEN_MODULES,
+                        help="Modules the worker entry point must not import")
+    args = parser.parse_args()
+
+    modules = args.modules or WORKER_MODULES
+    print(f"🔍 Importing {', '.join(modules)} ({args.runs} runs)")
+    runs = sorted((profile_once(modules) for _ in range(args.runs)), key=lambda r: r["total_us"])
+    median = runs[len(runs) // 2]
+    totals_ms = [run["total_us"] / 1000 for run in runs]
+
+    report(median, args.top)
+    print(f"\n🧮 Total: median {statistics.median(totals_ms):.0f}ms, "
+          f"min {totals_ms[0]:.0f}ms, max {totals_ms[-1]:.0f}ms")
+
+    ok = True
+    imported = {name for _, name, _, _ in median["entries"]}
+    forbidden = [module for module in args.forbid if module in imported]
+    if forbidden:
+        ok = False
+        print(f"❌ Imported at start-up (import them lazily): {', '.join(forbidden)}")
+    if median["stdout"].strip():
+        ok = False
+        print("❌ Import printed to stdout:")
+        for line in median["stdout"].strip().splitlines()[:10]:
+            print(f"   {line}")
+    if args.budget_ms and statistics.median(totals_ms) > args.budget_ms:
+        ok = False
+        print(f"❌ Over budget: {statistics.median(totals_ms):.0f}ms > {args.budget_ms:.0f}ms")
+
+    print("\n" + ("✅ Worker import within budget" if ok else "❌ Worker import check failed"))
+    sys.exit(0 if ok else 1)
@@ -63,6 +63,15 @@ echo "   $ cd backend"
 echo "   $ source venv/bin/activate"
 echo "   $ uvicorn app.main:app --reload --port 8000"
 echo ""
+echo "   Optional - extra capacity reserved for the premium lane:"
+echo "   $ celery -A app.core.celery_app worker -Q video.premium --loglevel=info --concurrency=2 -n premium@%h"
+echo ""
+echo "   Terminal 2b (Celery Beat - stuck video reaper):"
+echo "   $ celery -A app.core.celery_app beat --loglevel=info"
+echo ""
+echo "   Optional (SORA_POLLER_ENABLED=true) - Sora job poller:"
+echo "   $ python -m app.services.sora_poller"
+echo ""
 echo "   Terminal 3 (Frontend):"
 echo "   $ npm run dev"
 echo ""
@@ -0,0 +1,52 @@
+"""
+Cold-start regression checks for the Celery worker entry point
+
+Imports app.core.celery_app and app.tasks in fresh interpreters (via
+scripts/profile_worker_imports.py) and fails when a heavy dependency is
+imported at start-up, an import prints, or the median import time exceeds
+WORKER_IMPORT_BUDGET_MS.
+"""
+import importlib.util
+import os
+import statistics
+
+import pytest
+
+from app.core.config import settings
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts",
+                      "profile_worker_imports.py")
+RUNS = 3
+
+
+def _load_profiler():
+    spec = importlib.util.spec_from_file_location("profile_worker_imports", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+profiler = _load_profiler()
+
+
+@pytest.fixture(scope="module")
+def runs():
+    return [profiler.profile_once(profiler.WORKER_MODULES) for _ in range(RUNS)]
+
+
+def test_no_forbidden_modules_at_startup(runs):
+    imported = {name for _, name, _, _ in runs[0]["entries"]}
+    forbidden = [module for module in profiler.FORBIDDEN_MODULES if module in imported]
+    assert not forbidden, f"Imported at worker start-up (import them lazily): {forbidden}"
+
+
+def test_imports_do_not_print(runs):
+    assert not runs[0]["stdout"].strip(), f"Import printed to stdout:\n{runs[0]['stdout']}"
+
+
+def test_cold_import_within_budget(runs):
+    median_ms = statistics.median(run["total_us"] / 1000 for run in runs)
+    assert median_ms <= settings.WORKER_IMPORT_BUDGET_MS, (
+        f"Worker import took {median_ms:.0f}ms (median of {RUNS}), "
+        f"budget {settings.WORKER_IMPORT_BUDGET_MS}ms; see scripts/profile_worker_imports.py"
+    )